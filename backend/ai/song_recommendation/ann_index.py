@@ -0,0 +1,359 @@
+from pathlib import Path
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import numpy as np
+
+base_path = Path(__file__).resolve().parent.parent.parent.parent
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Next to the feature store so it is ignored by git as well
+DEFAULT_PATH = Path(__file__).resolve().parent / 'feature_store' / 'ivf_index'
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, block_size=65536) -> np.ndarray:
+    """
+    Index of the most similar centroid of every vector.
+    """
+    assignments = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], block_size):
+        scores = vectors[start:start + block_size] @ centroids.T
+        assignments[start:start + block_size] = scores.argmax(axis=1)
+    return assignments
+
+def _top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Column indices of the k best scores of every row, unsorted.
+    """
+    if scores.shape[1] <= k:
+        return np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+class IVFIndex:
+    def __init__(self, centroids: np.ndarray, vectors: np.ndarray, ids: np.ndarray, offsets: np.ndarray,
+                 mbids=None, stats=None):
+        """
+        Inverted file index for inner product search over unit vectors.
+
+        Vectors are clustered around centroids found with spherical k-means and stored grouped by cluster,
+        so a query only scans the n_probe clusters whose centroids are closest to it.
+        Use IVFIndex.build() or IVFIndex.load() instead of calling this directly.
+
+        Args:
+            centroids (np.ndarray): (n_lists, dim) unit vectors.
+            vectors (np.ndarray): (rows, dim) vectors ordered by cluster.
+            ids (np.ndarray): Id of every row of vectors.
+            offsets (np.ndarray): n_lists + 1 row offsets, cluster i is rows offsets[i]:offsets[i + 1].
+            mbids (list): Track of every id, ids are positions in it. Saved with the index so a
+                        Recommender can map them to its own rows (see Recommender.fit).
+            stats (tuple): (mean, scale) the vectors were normalized with.
+        """
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+        self.mbids = mbids
+        self.stats = stats
+        self.dim = centroids.shape[1]
+        # Vectors added after build/load, scanned separately until merge() folds them in
+        self._pending_vectors = []
+        self._pending_ids = []
+        self._pending_lists = []
+        # Ids left out of every search until merge() drops their vectors
+        self._removed = np.empty(0, dtype=np.int64)
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0] + sum(len(ids) for ids in self._pending_ids) - len(self._removed)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, ids=None, n_lists=None, n_iter=10, sample_size=100_000, seed=0,
+              mbids=None, stats=None):
+        """
+        Cluster the vectors and build the index.
+
+        Args:
+            vectors (np.ndarray): (rows, dim) float32 unit vectors, e.g. Recommender.vectors.
+            ids (np.ndarray): Id of every vector, defaults to the row number.
+            n_lists (int): Number of clusters, defaults to 4 * sqrt(rows).
+            n_iter (int): k-means iterations.
+            sample_size (int): Vectors k-means is trained on.
+            seed (int): Random seed.
+            mbids (list): Track of every id, see __init__.
+            stats (tuple): (mean, scale) the vectors were normalized with.
+
+        Returns:
+            IVFIndex: The built index.
+
+        Raises:
+            InputError: If there are no vectors.
+        """
+        rows = vectors.shape[0]
+        if rows == 0:
+            raise InputError("Can not build an index without vectors")
+        ids = np.arange(rows, dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+        n_lists = min(rows, n_lists or max(1, int(4 * np.sqrt(rows))))
+
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(rows, size=min(rows, max(sample_size, n_lists)), replace=False)]
+        centroids = np.array(sample[rng.choice(sample.shape[0], size=n_lists, replace=False)], dtype=np.float32)
+
+        start = time.perf_counter()
+        for _ in range(n_iter):
+            assignments = _assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their old centroid
+            centroids = np.where(norms > 0, sums / np.where(norms > 0, norms, 1.0), centroids).astype(np.float32)
+
+        assignments = _assign(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=offsets[1:])
+
+        logger.info(f"IVF index with {n_lists} lists built over {rows} vectors in {time.perf_counter() - start:.2f}s")
+        return cls(centroids, np.ascontiguousarray(vectors[order], dtype=np.float32), ids[order], offsets,
+                   mbids=None if mbids is None else list(mbids), stats=stats)
+
+    def add(self, vectors: np.ndarray, ids):
+        """
+        Add vectors to the index without rebuilding it, e.g. tracks new to the feature store.
+
+        Args:
+            vectors (np.ndarray): (rows, dim) float32 unit vectors.
+            ids (np.ndarray): Id of every vector.
+        """
+        if len(vectors) == 0:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self._pending_vectors.append(vectors)
+        self._pending_ids.append(np.asarray(ids, dtype=np.int64))
+        self._pending_lists.append(_assign(vectors, self.centroids))
+
+    def add_tracks(self, vectors: np.ndarray, mbids: list) -> np.ndarray:
+        """
+        Add vectors of tracks, giving them the next free ids.
+
+        Args:
+            vectors (np.ndarray): (rows, dim) float32 unit vectors.
+            mbids (list): Track of every vector.
+
+        Returns:
+            np.ndarray: The ids given to the tracks.
+
+        Raises:
+            InputError: If the index was built without mbids.
+        """
+        if self.mbids is None:
+            raise InputError("The index has no mbids, build it with mbids to add tracks")
+        ids = np.arange(len(self.mbids), len(self.mbids) + len(mbids), dtype=np.int64)
+        self.mbids.extend(mbids)
+        self.add(vectors, ids)
+        return ids
+
+    def remove(self, ids):
+        """
+        Leave vectors out of every later search, e.g. ones replaced through add_tracks().
+
+        Args:
+            ids (np.ndarray): Ids to remove.
+        """
+        self._removed = np.union1d(self._removed, np.asarray(ids, dtype=np.int64))
+
+    def merge(self):
+        """
+        Fold vectors added since build/load into the clustered arrays and drop removed ones.
+        """
+        if not self._pending_ids and not len(self._removed):
+            return
+        lists = np.concatenate([self._list_of_rows()] + self._pending_lists)
+        vectors = np.concatenate([np.asarray(self.vectors)] + self._pending_vectors)
+        ids = np.concatenate([np.asarray(self.ids)] + self._pending_ids)
+        keep = ~np.isin(ids, self._removed)
+        lists, vectors, ids = lists[keep], vectors[keep], ids[keep]
+        order = np.argsort(lists, kind="stable")
+        self.vectors, self.ids = vectors[order], ids[order]
+        self.offsets = np.zeros(self.n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(lists, minlength=self.n_lists), out=self.offsets[1:])
+        self._pending_vectors, self._pending_ids, self._pending_lists = [], [], []
+        self._removed = np.empty(0, dtype=np.int64)
+
+    def _list_of_rows(self) -> np.ndarray:
+        return np.repeat(np.arange(self.n_lists, dtype=np.int32), np.diff(self.offsets))
+
+    def search(self, queries: np.ndarray, k=10, n_probe=8) -> tuple:
+        """
+        Approximate top-k by inner product.
+
+        Args:
+            queries (np.ndarray): (batch, dim) float32 unit vectors.
+            k (int): Number of neighbours.
+            n_probe (int): Clusters scanned per query. More is slower and more accurate.
+
+        Returns:
+            tuple: (ids, scores), both (batch, k) sorted by descending score. Missing neighbours are -1 / -inf.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        n_probe = min(n_probe, self.n_lists)
+        probes = _top_k_rows(queries @ self.centroids.T, n_probe)
+
+        pending_vectors = np.concatenate(self._pending_vectors) if self._pending_vectors else None
+        pending_ids = np.concatenate(self._pending_ids) if self._pending_ids else None
+        pending_lists = np.concatenate(self._pending_lists) if self._pending_lists else None
+
+        result_ids = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        result_scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        for q, (query, lists) in enumerate(zip(queries, probes)):
+            candidate_vectors = [self.vectors[self.offsets[i]:self.offsets[i + 1]] for i in lists]
+            candidate_ids = [self.ids[self.offsets[i]:self.offsets[i + 1]] for i in lists]
+            if pending_lists is not None:
+                mask = np.isin(pending_lists, lists)
+                candidate_vectors.append(pending_vectors[mask])
+                candidate_ids.append(pending_ids[mask])
+
+            candidates = np.concatenate(candidate_vectors)
+            candidate_ids = np.concatenate(candidate_ids)
+            if len(self._removed):
+                keep = ~np.isin(candidate_ids, self._removed)
+                candidates, candidate_ids = candidates[keep], candidate_ids[keep]
+            if candidates.shape[0] == 0:
+                continue
+            scores = candidates @ query
+            best = _top_k_rows(scores[None, :], k)[0]
+            best = best[np.argsort(-scores[best])]
+            result_ids[q, :len(best)] = candidate_ids[best]
+            result_scores[q, :len(best)] = scores[best]
+        return result_ids, result_scores
+
+    def save(self, path=DEFAULT_PATH):
+        """
+        Write the index to a directory, merging pending vectors first.
+
+        Args:
+            path (str | Path): Directory, created if missing.
+        """
+        self.merge()
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, array in (("centroids", self.centroids), ("vectors", self.vectors), ("ids", self.ids), ("offsets", self.offsets)):
+            tmp = path / f"{name}.tmp.npy"
+            np.save(tmp, np.asarray(array))
+            os.replace(tmp, path / f"{name}.npy")
+        if self.mbids is not None:
+            tmp = path / "mbids.tmp"
+            tmp.write_text("".join(f"{mbid}\n" for mbid in self.mbids))
+            os.replace(tmp, path / "mbids.txt")
+        if self.stats is not None:
+            tmp = path / "stats.tmp.npy"
+            np.save(tmp, np.stack(self.stats))
+            os.replace(tmp, path / "stats.npy")
+        (path / "meta.json").write_text(json.dumps({"n_lists": self.n_lists, "dim": self.dim, "rows": len(self),
+                                                    "mbids": self.mbids is not None, "stats": self.stats is not None}))
+        logger.info(f"IVF index saved to {path}")
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH, mmap=True):
+        """
+        Open an index written by save().
+
+        Args:
+            path (str | Path): Directory of the index.
+            mmap (bool): Memory-map the vectors and ids instead of reading them, pages are loaded as clusters are probed.
+
+        Returns:
+            IVFIndex: The index.
+        """
+        path = Path(path)
+        mode = 'r' if mmap else None
+        meta = json.loads((path / "meta.json").read_text())
+        mbids = (path / "mbids.txt").read_text().splitlines() if meta.get("mbids") else None
+        stats = tuple(np.load(path / "stats.npy")) if meta.get("stats") else None
+        return cls(
+            centroids=np.load(path / "centroids.npy"),
+            vectors=np.load(path / "vectors.npy", mmap_mode=mode),
+            ids=np.load(path / "ids.npy", mmap_mode=mode),
+            offsets=np.load(path / "offsets.npy"),
+            mbids=mbids,
+            stats=stats,
+        )
+
+def benchmark(tracks=1_000_000, dim=24, queries=200, k=10, probes=(1, 2, 4, 8, 16, 32), clusters=64, seed=0) -> list:
+    """
+    Recall@k and latency of the index against exact search.
+
+    Random vectors are drawn around a number of clusters so they have some structure, like real features.
+
+    Args:
+        tracks (int): Catalog size.
+        dim (int): Features per track.
+        queries (int): Number of queries.
+        k (int): Neighbours per query.
+        probes (tuple): n_probe values to measure.
+        clusters (int): Number of clusters in the random data.
+        seed (int): Random seed.
+
+    Returns:
+        list: One dict per n_probe with recall and milliseconds per query, plus the exact search as n_probe None.
+    """
+    from backend.ai.song_recommendation.recommender import normalize, top_k
+
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32) * 3
+    data = centers[rng.integers(0, clusters, size=tracks)] + rng.standard_normal((tracks, dim), dtype=np.float32)
+    vectors = normalize(data)
+    query_vectors = vectors[rng.integers(0, tracks, size=queries)]
+
+    start = time.perf_counter()
+    exact, _ = top_k(vectors, query_vectors, k)
+    results = [{"n_probe": None, "recall": 1.0, "ms_per_query": (time.perf_counter() - start) / queries * 1000}]
+
+    index = IVFIndex.build(vectors, seed=seed)
+    for n_probe in probes:
+        start = time.perf_counter()
+        found, _ = index.search(query_vectors, k=k, n_probe=n_probe)
+        elapsed = time.perf_counter() - start
+        recall = np.mean([len(set(f) & set(e)) / k for f, e in zip(found, exact)])
+        results.append({"n_probe": n_probe, "recall": float(recall), "ms_per_query": elapsed / queries * 1000})
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall@k vs latency of the IVF index against exact search")
+    parser.add_argument("--tracks", type=int, default=1_000_000, help="Catalog size")
+    parser.add_argument("--dim", type=int, default=24, help="Features per track")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("-k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--build", action="store_true", help="Build the index from the feature store instead")
+    parser.add_argument("--path", default=str(DEFAULT_PATH), help="Directory the built index is saved to")
+    args = parser.parse_args()
+
+    if args.build:
+        from backend.ai.song_recommendation.recommender import Recommender
+
+        Recommender().fit().build_index().save(args.path)
+        sys.exit(0)
+
+    for row in benchmark(tracks=args.tracks, dim=args.dim, queries=args.queries, k=args.k):
+        label = "exact" if row["n_probe"] is None else f"n_probe={row['n_probe']}"
+        print(f"{label:>12}: recall@{args.k} {row['recall']:.3f}, {row['ms_per_query']:.2f} ms per query")
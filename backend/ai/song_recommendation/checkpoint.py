@@ -0,0 +1,138 @@
+from pathlib import Path
+import mysql.connector
+import logging
+import sys
+
+base_path = Path(__file__).resolve().parent.parent.parent.parent
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+sys.path.append(str(base_path))
+
+from utils.errors import DatabaseConnectionError
+
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Work items are (scope, item) pairs, e.g. ("rock", "Queen") for Last.fm or ("", mbid) for AcousticBrainz
+SELECT_QUERY = """
+                SELECT scope, item FROM Crawl_checkpoints
+                WHERE source = %s;
+                """
+INSERT_QUERY = """
+                INSERT IGNORE INTO Crawl_checkpoints(source, scope, item)
+                VALUES(%s, %s, %s)
+                """
+RESET_QUERY = """
+                DELETE FROM Crawl_checkpoints
+                WHERE source = %s;
+                """
+
+class CrawlCheckpoint:
+    def __init__(self, cursor, source: str):
+        """
+        Records which work items of a crawl are done so a restarted crawl skips them.
+
+        mark_done() does not commit, the caller commits it together with the rows the work produced
+        so a crash can never record work that was not stored.
+
+        Args:
+            cursor (mysql.connector.cursor_cext.CMySQLCursorDict): The database cursor.
+            source (str): Name of the crawl, e.g. "lastfm".
+        """
+        self.cursor = cursor
+        self.source = source
+
+    def completed(self) -> set:
+        """
+        Fetch the finished work items.
+
+        Returns:
+            set: (scope, item) tuples.
+
+        Raises:
+            DatabaseConnectionError: If database error occurs.
+        """
+        try:
+            self.cursor.execute(SELECT_QUERY, (self.source, ))
+            done = {(row["scope"], row["item"]) for row in self.cursor.fetchall()}
+            logger.info(f"{len(done)} {self.source} work items already done")
+            return done
+        except mysql.connector.Error as err:
+            logger.error(f"Error reading checkpoints {err}")
+            raise DatabaseConnectionError(f"Error reading checkpoints {err}")
+
+    def mark_done(self, items: list):
+        """
+        Record finished work items.
+
+        Args:
+            items (list): (scope, item) tuples.
+
+        Raises:
+            DatabaseConnectionError: If database error occurs.
+        """
+        if not items:
+            return
+        try:
+            self.cursor.executemany(INSERT_QUERY, [(self.source, scope, item) for scope, item in items])
+        except mysql.connector.Error as err:
+            logger.error(f"Error writing checkpoints {err}")
+            raise DatabaseConnectionError(f"Error writing checkpoints {err}")
+
+    def reset(self):
+        """
+        Forget every finished work item of the source so the next run starts from scratch.
+        """
+        try:
+            self.cursor.execute(RESET_QUERY, (self.source, ))
+        except mysql.connector.Error as err:
+            logger.error(f"Error resetting checkpoints {err}")
+            raise DatabaseConnectionError(f"Error resetting checkpoints {err}")
+
+class AsyncCrawlCheckpoint:
+    def __init__(self, db_manager, source: str):
+        """
+        Same as CrawlCheckpoint on an AsyncDatabaseManager, every call runs in its own transaction.
+
+        Args:
+            db_manager (AsyncDatabaseManager): Connected async database manager.
+            source (str): Name of the crawl, e.g. "acousticbrainz".
+        """
+        self.db_manager = db_manager
+        self.source = source
+
+    async def completed(self) -> set:
+        """
+        Fetch the finished work items.
+
+        Returns:
+            set: (scope, item) tuples.
+        """
+        rows = await self.db_manager.fetchall(SELECT_QUERY, (self.source, ))
+        return {(row["scope"], row["item"]) for row in rows}
+
+    async def mark_done(self, items: list):
+        """
+        Record finished work items.
+
+        Args:
+            items (list): (scope, item) tuples.
+        """
+        if not items:
+            return
+        await self.db_manager.executemany(INSERT_QUERY, [(self.source, scope, item) for scope, item in items])
+
+    async def reset(self):
+        """
+        Forget every finished work item of the source.
+        """
+        await self.db_manager.execute(RESET_QUERY, (self.source, ))
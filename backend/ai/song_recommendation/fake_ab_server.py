@@ -0,0 +1,214 @@
+from aiohttp import web
+from pathlib import Path
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+base_path = Path(__file__).resolve().parent.parent.parent.parent
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+sys.path.append(str(base_path))
+
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Small documents with a few of the descriptors feature_extraction keeps
+HIGH_LEVEL_DOC = {"highlevel": {"danceability": {"value": "danceable"}, "mood_happy": {"value": "happy"}}}
+LOW_LEVEL_DOC = {
+    "lowlevel": {"average_loudness": 0.8, "spectral_centroid": {"mean": 1200.0}},
+    "rhythm": {"bpm": 120.0, "danceability": 1.1},
+    "tonal": {"key_key": "C", "key_scale": "major"},
+}
+
+class FakeAcousticBrainz:
+    def __init__(self, quota=None, window=1.0, throttle_first=0, retry_after=None, fail_counts=None):
+        """
+        Local stand-in for the AcousticBrainz API that throttles like the real one, for exercising
+        AdaptiveRateLimiter and AcousticBrainzFetcher without touching acousticbrainz.org.
+
+        Serves /{mbid}/high-level, /{mbid}/low-level and the bulk /high-level and /low-level endpoints
+        under /api/v1. Every response carries X-RateLimit-Remaining and X-RateLimit-Reset-In, requests
+        beyond the quota of a window get a 429 with Retry-After. Every request is logged in requests.
+
+        Args:
+            quota (int): Requests allowed per window, unlimited if None.
+            window (float): Length of a rate limit window in seconds.
+            throttle_first (int): Number of first requests answered with 429.
+            retry_after (float): Retry-After sent with those 429s, none if None.
+            fail_counts (dict): mbid -> number of requests for it answered with 503, -1 for always.
+        """
+        self.quota = quota
+        self.window = window
+        self.throttle_first = throttle_first
+        self.retry_after = retry_after
+        self.fail_counts = dict(fail_counts or {})
+        # (arrival time, path, status) per request
+        self.requests = []
+        self._window_start = time.monotonic()
+        self._used = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/v1/high-level", self.bulk_high_level)
+        app.router.add_get("/api/v1/low-level", self.bulk_low_level)
+        app.router.add_get("/api/v1/{mbid}/high-level", self.high_level)
+        app.router.add_get("/api/v1/{mbid}/low-level", self.low_level)
+        return app
+
+    def _rate_limit(self, mbids: list):
+        """
+        Count the request against the quota and return the error response it gets, if any.
+        """
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._window_start, self._used = now, 0
+        self._used += 1
+        reset_in = max(0.0, self.window - (now - self._window_start))
+        headers = {}
+        if self.quota is not None:
+            headers = {"X-RateLimit-Remaining": str(max(0, self.quota - self._used)),
+                       "X-RateLimit-Reset-In": f"{reset_in:.3f}"}
+
+        if len(self.requests) < self.throttle_first:
+            if self.retry_after is not None:
+                headers["Retry-After"] = str(self.retry_after)
+            return web.json_response({"message": "throttled"}, status=429, headers=headers), headers
+        if self.quota is not None and self._used > self.quota:
+            headers["Retry-After"] = f"{reset_in:.3f}"
+            return web.json_response({"message": "rate limit exceeded"}, status=429, headers=headers), headers
+
+        for mbid in mbids:
+            left = self.fail_counts.get(mbid, 0)
+            if left:
+                self.fail_counts[mbid] = left - 1 if left > 0 else left
+                return web.json_response({"message": "unavailable"}, status=503, headers=headers), headers
+        return None, headers
+
+    def _respond(self, request, mbids: list, body_of):
+        error, headers = self._rate_limit(mbids)
+        response = error or web.json_response(body_of(mbids), headers=headers)
+        self.requests.append((time.monotonic(), request.path, response.status))
+        return response
+
+    async def high_level(self, request):
+        return self._respond(request, [request.match_info["mbid"]], lambda mbids: HIGH_LEVEL_DOC)
+
+    async def low_level(self, request):
+        return self._respond(request, [request.match_info["mbid"]], lambda mbids: LOW_LEVEL_DOC)
+
+    async def bulk_high_level(self, request):
+        mbids = request.query.get("recording_ids", "").split(";")
+        return self._respond(request, mbids, lambda mbids: {mbid: {"0": HIGH_LEVEL_DOC} for mbid in mbids})
+
+    async def bulk_low_level(self, request):
+        mbids = request.query.get("recording_ids", "").split(";")
+        return self._respond(request, mbids, lambda mbids: {mbid: {"0": LOW_LEVEL_DOC} for mbid in mbids})
+
+    def statuses(self) -> list:
+        return [status for _, _, status in self.requests]
+
+async def _fetch_against(server: FakeAcousticBrainz, mbids: list, bulk: bool, limiter, retry_rounds=0) -> tuple:
+    """
+    Run an AcousticBrainzFetcher against a fake server on a free local port.
+
+    Returns:
+        tuple: (features fetched, the fetcher).
+    """
+    import aiohttp
+    from backend.ai.song_recommendation.fetch_info_ab import AcousticBrainzFetcher
+    from backend.ai.song_recommendation.feature_extraction import FeatureExtractor
+
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        # No database is touched, the fetcher only stores results in memory until batch_insert_tracks
+        fetcher = AcousticBrainzFetcher(None, base_url=f"http://127.0.0.1:{port}/api/v1", rate_limiter=limiter,
+                                        bulk=bulk, extractor=FeatureExtractor(max_workers=1))
+        async with aiohttp.ClientSession() as session:
+            features = await fetcher.fetch_features_batch(session, mbids)
+            if retry_rounds:
+                features.extend(await fetcher.retry_failed(session, rounds=retry_rounds, cooldown=0))
+        fetcher.extractor.close()
+        return features, fetcher
+    finally:
+        await runner.cleanup()
+
+async def check() -> dict:
+    """
+    Drive the rate limiter and the fetcher through the throttling cases of the real API.
+
+    Returns:
+        dict: Check name -> True if it held.
+    """
+    from backend.ai.song_recommendation.rate_limiter import AdaptiveRateLimiter
+
+    results = {}
+    mbids = [f"00000000-0000-0000-0000-{i:012d}" for i in range(12)]
+
+    # Retry-After on a 429 pauses every caller for at least that long. One request in flight at a time,
+    # requests already sent when the 429 arrives are not held back
+    server = FakeAcousticBrainz(throttle_first=2, retry_after=0.3)
+    limiter = AdaptiveRateLimiter(max_concurrency=1, base_delay=0.01, max_retries=3)
+    features, _ = await _fetch_against(server, mbids[:4], bulk=False, limiter=limiter)
+    last_throttle = max(t for t, _, status in server.requests if status == 429)
+    after = [t for t, _, status in server.requests if t > last_throttle]
+    results["retry_after_respected"] = len(features) == 4 and min(after) - last_throttle >= 0.3 - 0.02
+
+    # 503s back off exponentially and are retried until they succeed
+    server = FakeAcousticBrainz(fail_counts={mbids[0]: 2})
+    limiter = AdaptiveRateLimiter(max_concurrency=4, base_delay=0.05, max_retries=3)
+    features, _ = await _fetch_against(server, mbids[:1], bulk=False, limiter=limiter)
+    results["backoff_retries"] = len(features) == 1 and limiter.get_stats()["retries"] >= 2 \
+        and limiter.get_stats()["throttled"] >= 2
+
+    # An exhausted quota pauses callers until the window resets instead of spending requests on 429s
+    server = FakeAcousticBrainz(quota=5, window=0.5)
+    limiter = AdaptiveRateLimiter(max_concurrency=1, base_delay=0.01, max_retries=5)
+    features, _ = await _fetch_against(server, mbids, bulk=False, limiter=limiter)
+    results["quota_pause"] = len(features) == len(mbids) and 429 not in server.statuses() \
+        and limiter.get_stats()["paused_seconds"] > 0
+
+    # Bulk requests share the same quota handling
+    server = FakeAcousticBrainz(quota=1, window=0.3)
+    limiter = AdaptiveRateLimiter(max_concurrency=1, base_delay=0.01, max_retries=5)
+    features, _ = await _fetch_against(server, mbids, bulk=True, limiter=limiter)
+    results["bulk_quota_pause"] = len(features) == len(mbids) and 429 not in server.statuses()
+
+    # mbids out of retries land in retry_queue, retry_failed drains the ones that recover
+    # and keeps the one that never does
+    server = FakeAcousticBrainz(fail_counts={mbids[0]: 3, mbids[1]: -1})
+    limiter = AdaptiveRateLimiter(max_concurrency=4, base_delay=0.01, max_retries=1)
+    features, fetcher = await _fetch_against(server, mbids[:3], bulk=False, limiter=limiter, retry_rounds=3)
+    fetched = {row["mbid"] for row in features}
+    results["retry_queue_drains"] = fetched == {mbids[0], mbids[2]} and set(fetcher.retry_queue) == {mbids[1]}
+
+    for name, ok in results.items():
+        logger.info(f"{name}: {'ok' if ok else 'FAILED'}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake AcousticBrainz API for exercising the rate limiter")
+    parser.add_argument("--check", action="store_true", help="Run the throttling checks against it and exit")
+    parser.add_argument("--port", type=int, default=8080, help="Port to serve on")
+    parser.add_argument("--quota", type=int, default=10, help="Requests per window")
+    parser.add_argument("--window", type=float, default=10.0, help="Window length in seconds")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if all(asyncio.run(check()).values()) else 1)
+    # e.g. python fetch_info_ab.py --base-url http://127.0.0.1:8080/api/v1
+    web.run_app(FakeAcousticBrainz(quota=args.quota, window=args.window).app(), host="127.0.0.1", port=args.port)
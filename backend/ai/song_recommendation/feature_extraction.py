@@ -0,0 +1,263 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import numpy as np
+
+try:
+    import ijson
+except ImportError:  # Falls back to json.loads, same output with a higher peak memory
+    ijson = None
+
+base_path = Path(__file__).resolve().parent.parent.parent.parent
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+sys.path.append(str(base_path))
+
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Low-level descriptors kept per section, everything else in the document is skipped while parsing.
+# Statistic descriptors are reduced to the mean of their "mean", scalars are kept as they are.
+LOW_LEVEL_DESCRIPTORS = {
+    "lowlevel": (
+        "average_loudness", "dynamic_complexity", "dissonance", "zerocrossingrate",
+        "spectral_centroid", "spectral_energy", "spectral_flux", "spectral_rolloff",
+        "spectral_entropy", "spectral_complexity", "pitch_salience", "hfc", "mfcc",
+    ),
+    "rhythm": (
+        "bpm", "danceability", "onset_rate", "beats_count", "beats_loudness",
+    ),
+    "tonal": (
+        "key_key", "key_scale", "key_strength", "chords_changes_rate", "chords_number_rate",
+        "tuning_frequency", "hpcp_entropy",
+    ),
+}
+
+_SCALAR_EVENTS = ("number", "string", "boolean")
+
+def _wanted_prefixes(root: str = "") -> dict:
+    """
+    Map the ijson prefixes of the kept descriptors to their output name.
+
+    Returns:
+        dict: prefix -> (feature name, True if the prefix is the "mean" of a statistic).
+    """
+    root = f"{root}." if root else ""
+    wanted = {}
+    for section, descriptors in LOW_LEVEL_DESCRIPTORS.items():
+        for descriptor in descriptors:
+            wanted[f"{root}{section}.{descriptor}"] = (descriptor, False)
+            wanted[f"{root}{section}.{descriptor}.mean"] = (descriptor, True)
+    return wanted
+
+def _reduce(value, is_mean: bool):
+    """
+    Reduce one descriptor to a scalar with a vectorized mean, None if it is not kept.
+    """
+    if isinstance(value, list):
+        # Arrays are only kept when they are the mean of a statistic, e.g. the 13 mfcc means
+        if not is_mean or not value:
+            return None
+        return float(np.asarray(value, dtype=np.float64).mean())
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and not is_mean:
+        return value
+    return None
+
+def _iter_stream(stream, wanted: dict):
+    """
+    Walk the parser events and build only the values of the wanted prefixes.
+
+    Yields:
+        tuple: (prefix, value)
+    """
+    builder = None
+    current = None
+    depth = 0
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if depth == 0:
+                    yield current, builder.value
+                    builder = None
+            continue
+
+        if prefix not in wanted:
+            continue
+        if event in _SCALAR_EVENTS:
+            yield prefix, value
+        elif event == "start_array" and wanted[prefix][1]:
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            current = prefix
+            depth = 1
+
+def _iter_loaded(document, wanted: dict):
+    """
+    Same as _iter_stream on an already decoded document.
+    """
+    for prefix in wanted:
+        node = document
+        for key in prefix.split("."):
+            if not isinstance(node, dict) or key not in node:
+                break
+            node = node[key]
+        else:
+            if not isinstance(node, dict):
+                yield prefix, node
+
+def _extract(payload, roots: list) -> dict:
+    """
+    Extract the kept descriptors under each root of one payload in a single pass.
+
+    Args:
+        payload (bytes | str | dict): Raw JSON body or an already decoded document.
+        roots (list): Prefixes the documents live under, "" for a single-track document.
+
+    Returns:
+        dict: root -> {feature: value}
+    """
+    wanted = {}
+    for root in roots:
+        wanted.update({prefix: (root, name, is_mean) for prefix, (name, is_mean) in _wanted_prefixes(root).items()})
+    flags = {prefix: (name, is_mean) for prefix, (_, name, is_mean) in wanted.items()}
+
+    if isinstance(payload, dict):
+        events = _iter_loaded(payload, flags)
+    elif ijson is not None:
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        events = _iter_stream(io.BytesIO(payload), flags)
+    else:
+        events = _iter_loaded(json.loads(payload), flags)
+
+    features = {root: {} for root in roots}
+    for prefix, value in events:
+        root, name, is_mean = wanted[prefix]
+        reduced = _reduce(value, is_mean)
+        if reduced is not None:
+            features[root][name] = reduced
+    return features
+
+def extract_low_level_features(payload) -> dict:
+    """
+    Extract the kept low-level descriptors of one track.
+
+    Args:
+        payload (bytes | str | dict): /{mbid}/low-level response body, raw or decoded.
+
+    Returns:
+        dict: Feature name -> value.
+    """
+    return _extract(payload, [""])[""]
+
+def extract_low_level_bulk(payload, mbids: list) -> dict:
+    """
+    Extract the kept low-level descriptors of every track of a bulk /low-level response.
+
+    Args:
+        payload (bytes | str | dict): Bulk response body, documents keyed by mbid and submission offset.
+        mbids (list): Requested mbids.
+
+    Returns:
+        dict: mbid -> features, mbids without a document are left out.
+    """
+    features = _extract(payload, [f"{mbid}.0" for mbid in mbids])
+    return {mbid: features[f"{mbid}.0"] for mbid in mbids if features[f"{mbid}.0"]}
+
+def _extract_json(payload) -> str:
+    """
+    Extract one track and serialize it for Track_info. Module level so the process pool can pickle it.
+    """
+    return json.dumps(extract_low_level_features(payload))
+
+def _extract_bulk_json(payload, mbids: list) -> dict:
+    """
+    Extract a bulk response and serialize every track for Track_info.
+    """
+    return {mbid: json.dumps(features) for mbid, features in extract_low_level_bulk(payload, mbids).items()}
+
+class FeatureExtractor:
+    def __init__(self, max_workers=None):
+        """
+        Runs low-level feature extraction on a process pool so parsing never blocks the event loop.
+
+        The pool is started on first use.
+
+        Args:
+            max_workers (int): Number of worker processes. Defaults to the number of cores.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                logger.info(f"Feature extraction pool started with {self.max_workers} workers")
+            return self._executor
+
+    async def extract_async(self, payload) -> str:
+        """
+        Extract one low-level document off the event loop.
+
+        Args:
+            payload (bytes): Raw /{mbid}/low-level response body.
+
+        Returns:
+            str: JSON serialized features.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), _extract_json, payload)
+
+    async def extract_bulk_async(self, payload, mbids: list) -> dict:
+        """
+        Extract a bulk low-level response off the event loop.
+
+        Args:
+            payload (bytes): Raw bulk /low-level response body.
+            mbids (list): Requested mbids.
+
+        Returns:
+            dict: mbid -> JSON serialized features.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), _extract_bulk_json, payload, mbids)
+
+    def close(self):
+        """
+        Shut the process pool down.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,316 @@
+from pathlib import Path
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+base_path = Path(__file__).resolve().parent.parent.parent.parent
+env_path = base_path / 'env_files' / 'ai_db_detail.env'
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+load_dotenv(dotenv_path=env_path)
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+from backend.ai.song_recommendation.feature_extraction import LOW_LEVEL_DESCRIPTORS
+
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path(__file__).resolve().parent / 'feature_store'
+
+# Numeric low-level descriptors in column order, plus the key scale as a 0/1 flag
+_TEXT_DESCRIPTORS = {"key_key", "key_scale"}
+FEATURE_COLUMNS = tuple(
+    descriptor
+    for descriptors in LOW_LEVEL_DESCRIPTORS.values()
+    for descriptor in descriptors
+    if descriptor not in _TEXT_DESCRIPTORS
+) + ("key_scale_major",)
+
+class FeatureStore:
+    def __init__(self, path=DEFAULT_PATH, columns=FEATURE_COLUMNS):
+        """
+        Columnar store of track feature vectors, one float32 row per track keyed by mbid.
+
+        Files in path:
+            features.f32  Raw row-major float32 matrix, opened with np.memmap so loading is zero-copy.
+            mbids.txt     mbid of every row, one per line.
+            meta.json     Column names and the number of committed rows.
+
+        Rows are only ever appended. A track appended again gets a new row which shadows the old one
+        until compact() rewrites the files. Missing descriptors are stored as NaN.
+
+        Args:
+            path (str | Path): Directory of the store, created if missing.
+            columns (tuple): Feature names, the width of every row. Has to match an existing store.
+
+        Raises:
+            InputError: If the columns differ from the ones the store was created with.
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.features_file = self.path / 'features.f32'
+        self.mbids_file = self.path / 'mbids.txt'
+        self.meta_file = self.path / 'meta.json'
+        self.compact_features_file = self.features_file.with_suffix('.tmp')
+        self.compact_mbids_file = self.mbids_file.with_suffix('.tmp')
+        self.columns = tuple(columns)
+        self.dim = len(self.columns)
+        self._lock = threading.Lock()
+
+        if self.meta_file.exists():
+            meta = json.loads(self.meta_file.read_text())
+            if tuple(meta["columns"]) != self.columns:
+                logger.error("Feature store columns dont match, rebuild the store")
+                raise InputError("Feature store columns dont match, rebuild the store")
+            self.rows = meta["rows"]
+            self._finish_compact()
+            self._truncate_uncommitted()
+        else:
+            self.rows = 0
+            self._write_meta()
+
+        self._mbids = self._read_mbids()
+        self._index = {mbid: row for row, mbid in enumerate(self._mbids)}
+
+    def _write_meta(self):
+        tmp = self.meta_file.with_suffix('.tmp')
+        tmp.write_text(json.dumps({"columns": list(self.columns), "rows": self.rows, "dtype": "float32"}))
+        os.replace(tmp, self.meta_file)
+
+    def _finish_compact(self):
+        """
+        Finish or drop a compact() that was interrupted.
+
+        compact() writes the compacted files next to the store and commits them by updating meta.json
+        before swapping them in. A file that already has the row count of meta.json is swapped in, otherwise
+        it is a leftover of an uncommitted compaction and is removed.
+        """
+        committed = {
+            self.compact_features_file: lambda: self.compact_features_file.stat().st_size == self.rows * self.dim * 4,
+            self.compact_mbids_file: lambda: len(self.compact_mbids_file.read_text().splitlines()) == self.rows,
+        }
+        for compact_file, target in ((self.compact_features_file, self.features_file),
+                                     (self.compact_mbids_file, self.mbids_file)):
+            if not compact_file.exists():
+                continue
+            if committed[compact_file]():
+                os.replace(compact_file, target)
+                logger.warning(f"Finished swapping in {target.name} of an interrupted compaction")
+            else:
+                compact_file.unlink()
+                logger.warning(f"Dropped {compact_file.name} of an uncommitted compaction")
+
+    def _truncate_uncommitted(self):
+        """
+        Drop rows an interrupted append wrote after the last meta.json update, and lower rows
+        if the files hold fewer than meta.json says.
+        """
+        stored = min(self.features_file.stat().st_size // (self.dim * 4) if self.features_file.exists() else 0,
+                     len(self.mbids_file.read_text().splitlines()) if self.mbids_file.exists() else 0)
+        if stored < self.rows:
+            logger.warning(f"meta.json has {self.rows} rows but the files hold {stored}, using {stored}")
+            self.rows = stored
+            self._write_meta()
+        expected = self.rows * self.dim * 4
+        if self.features_file.exists() and self.features_file.stat().st_size > expected:
+            with open(self.features_file, 'r+b') as f:
+                f.truncate(expected)
+        if self.mbids_file.exists():
+            lines = self.mbids_file.read_text().splitlines()
+            if len(lines) > self.rows:
+                self.mbids_file.write_text("".join(f"{mbid}\n" for mbid in lines[:self.rows]))
+
+    def _read_mbids(self) -> list:
+        if not self.mbids_file.exists():
+            return []
+        return self.mbids_file.read_text().splitlines()[:self.rows]
+
+    def vectorize(self, low_level, high_level=None) -> np.ndarray:
+        """
+        Flatten one track into a row.
+
+        Args:
+            low_level (dict | str): Extracted low-level features, as stored in Track_info.low_level.
+            high_level (dict | str): Extracted high-level features, unused by the default columns.
+
+        Returns:
+            np.ndarray: float32 vector of len(columns), NaN where a descriptor is missing.
+        """
+        if isinstance(low_level, (str, bytes)):
+            low_level = json.loads(low_level)
+        values = dict(low_level)
+        if "key_scale" in values:
+            values["key_scale_major"] = 1.0 if values["key_scale"] == "major" else 0.0
+
+        row = np.full(self.dim, np.nan, dtype=np.float32)
+        for i, column in enumerate(self.columns):
+            value = values.get(column)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                row[i] = value
+        return row
+
+    def append(self, track_infos: list) -> int:
+        """
+        Append tracks to the store.
+
+        Args:
+            track_infos (list): Dictionaries with mbid and low_level (and high_level), e.g. the rows
+                        batch_insert_tracks upserts into Track_info.
+
+        Returns:
+            int: Number of rows appended.
+        """
+        if not track_infos:
+            return 0
+
+        matrix = np.vstack([self.vectorize(info["low_level"], info.get("high_level")) for info in track_infos])
+        mbids = [info["mbid"] for info in track_infos]
+
+        with self._lock:
+            # Data first, meta.json last, so a crash in between is rolled back on the next open
+            with open(self.features_file, 'ab') as f:
+                f.write(np.ascontiguousarray(matrix, dtype=np.float32).tobytes())
+            with open(self.mbids_file, 'a') as f:
+                f.write("".join(f"{mbid}\n" for mbid in mbids))
+
+            for mbid in mbids:
+                self._index[mbid] = self.rows
+                self._mbids.append(mbid)
+                self.rows += 1
+            self._write_meta()
+
+        logger.info(f"Appended {len(mbids)} rows to the feature store")
+        return len(mbids)
+
+    def matrix(self) -> np.ndarray:
+        """
+        Memory-map every row, including rows shadowed by a later append.
+
+        Returns:
+            np.ndarray: Read-only (rows, dim) float32 memmap. Nothing is read until it is used.
+        """
+        if self.rows == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.memmap(self.features_file, dtype=np.float32, mode='r', shape=(self.rows, self.dim))
+
+    def load(self) -> tuple:
+        """
+        Load the current vector of every track.
+
+        Zero-copy unless some rows are shadowed, then the live rows are gathered into a new array.
+        Run compact() to get back to zero-copy loading.
+
+        Returns:
+            tuple: (mbids list, (len(mbids), dim) float32 array) in the same order.
+        """
+        with self._lock:
+            matrix = self.matrix()
+            if len(self._index) == self.rows:
+                return list(self._mbids), matrix
+
+            live_rows = np.fromiter(sorted(self._index.values()), dtype=np.int64)
+            logger.warning(f"{self.rows - len(live_rows)} shadowed rows in the feature store, run compact()")
+            return [self._mbids[row] for row in live_rows], np.asarray(matrix[live_rows])
+
+    def row_of(self, mbid: str):
+        """
+        Returns the row of an mbid, None if the track is not in the store.
+        """
+        return self._index.get(mbid)
+
+    def mbids_since(self, row: int) -> list:
+        """
+        mbids of the rows appended at or after row, in append order.
+        """
+        with self._lock:
+            return self._mbids[row:]
+
+    def compact(self):
+        """
+        Rewrite the store without shadowed rows.
+        """
+        mbids, matrix = self.load()
+        with self._lock:
+            np.ascontiguousarray(matrix, dtype=np.float32).tofile(self.compact_features_file)
+            self.compact_mbids_file.write_text("".join(f"{mbid}\n" for mbid in mbids))
+
+            # meta.json commits the compaction, a crash before the swaps is finished on the next open
+            self.rows = len(mbids)
+            self._write_meta()
+            os.replace(self.compact_features_file, self.features_file)
+            os.replace(self.compact_mbids_file, self.mbids_file)
+
+            self._mbids = list(mbids)
+            self._index = {mbid: row for row, mbid in enumerate(mbids)}
+        logger.info(f"Feature store compacted to {self.rows} rows")
+
+    def rebuild(self, track_info_rows, batch_size=10000) -> int:
+        """
+        Replace the store with the given Track_info rows.
+
+        Args:
+            track_info_rows (iterable): Dictionaries with mbid and low_level, e.g. stream_rows over Track_info.
+            batch_size (int): Rows vectorized and written together.
+
+        Returns:
+            int: Number of rows in the store.
+        """
+        with self._lock:
+            for file in (self.features_file, self.mbids_file):
+                if file.exists():
+                    file.unlink()
+            self.rows = 0
+            self._mbids = []
+            self._index = {}
+            self._write_meta()
+
+        batch = []
+        for row in track_info_rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                self.append(batch)
+                batch = []
+        self.append(batch)
+        return self.rows
+
+if __name__ == "__main__":
+    from backend.database_manager.database_manager import DatabaseManager
+    from backend.database_manager.pagination import stream_rows
+
+    parser = argparse.ArgumentParser(description="Build the feature store from Track_info")
+    parser.add_argument("--path", default=str(DEFAULT_PATH), help="Directory of the store")
+    parser.add_argument("--compact", action="store_true", help="Only drop shadowed rows")
+    args = parser.parse_args()
+
+    store = FeatureStore(args.path)
+    if args.compact:
+        store.compact()
+    else:
+        db_config = {
+        'host': os.getenv('DB_HOST'),
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD'),
+        'database': os.getenv('DB_NAME')
+        }
+        db_manager = DatabaseManager(db_config=db_config)
+        try:
+            rows = store.rebuild(stream_rows(db_manager, view="Track_info", columns="id, mbid, low_level, high_level"))
+            logger.info(f"Feature store rebuilt with {rows} tracks")
+        finally:
+            db_manager.close()
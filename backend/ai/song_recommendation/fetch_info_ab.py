@@ -1,8 +1,8 @@
+import argparse
 import asyncio
 import aiohttp
 import logging
 import json
-from statistics import mean
 from dotenv import load_dotenv
 from pathlib import Path
 import os
@@ -17,7 +17,12 @@ load_dotenv(dotenv_path=env_path)
 
 sys.path.append(str(base_path))
 
-from backend.database_manager.database_manager import DatabaseManager
+from backend.database_manager.async_database_manager import AsyncDatabaseManager
+from backend.models.async_models import Async_track_info_model
+from backend.ai.song_recommendation.checkpoint import AsyncCrawlCheckpoint
+from backend.ai.song_recommendation.rate_limiter import AdaptiveRateLimiter, RETRY_STATUSES
+from backend.ai.song_recommendation.feature_extraction import FeatureExtractor, extract_low_level_features
+from backend.ai.song_recommendation.feature_store import FeatureStore
 
 # Logger setup
 logging.basicConfig(
@@ -30,49 +35,146 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+BASE_URL = "https://acousticbrainz.org/api/v1"
+# Most recording ids the bulk endpoints accept in one call
+MAX_BULK_IDS = 25
+
+PENDING_MBIDS_QUERY = """
+                    SELECT t.mbid FROM Tracks AS t
+                    LEFT JOIN Track_info AS ti ON ti.mbid = t.mbid
+                    LEFT JOIN Crawl_checkpoints AS c ON c.source = 'acousticbrainz' AND c.scope = '' AND c.item = t.mbid
+                    WHERE ti.mbid IS NULL AND c.item IS NULL;
+                    """
+
 class AcousticBrainzFetcher:
 
-    def __init__(self, cursor, db_manager):
-        self.base_url = "https://acousticbrainz.org"
-        self.cursor = cursor
+    def __init__(self, db_manager, base_url=BASE_URL, rate_limiter=None, bulk=True, extractor=None, feature_store=None):
+        """
+        Args:
+            db_manager (AsyncDatabaseManager): Connected async database manager used for the inserts.
+            base_url (str): AcousticBrainz API root, point it to a local fake server for testing (fake_ab_server.py).
+            rate_limiter (AdaptiveRateLimiter): Limiter shared by every request. A default one is created if None.
+            bulk (bool): Use the bulk endpoints, MAX_BULK_IDS mbids per request, instead of one request per mbid.
+            extractor (FeatureExtractor): Process pool parsing the low-level documents. A default one is created if None.
+            feature_store (FeatureStore): Store the inserted tracks are appended to, skipped if None.
+        """
+        self.base_url = base_url
+        self.bulk = bulk
+        self.extractor = extractor or FeatureExtractor()
+        self.feature_store = feature_store
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        # mbids whose requests kept failing with 429/5xx or network errors, fetched again by retry_failed
+        self.retry_queue = []
         self.db_manager = db_manager
+        self.track_info_model = Async_track_info_model(db_manager)
+        self.checkpoint = AsyncCrawlCheckpoint(db_manager, source="acousticbrainz")
+        # mbids AcousticBrainz has no data for, recorded as done so reruns dont ask again
+        self.not_found = []
 
     async def fetch_features_batch(self, session, mbids):
         """
         Fetch features for a batch of MBIDs asynchronously.
+
+        Pacing is left to the rate limiter, which follows the servers rate limit headers.
+        In bulk mode the mbids are grouped into MAX_BULK_IDS sized chunks, one request pair per chunk.
+        """
+        if self.bulk:
+            chunks = [mbids[i:i + MAX_BULK_IDS] for i in range(0, len(mbids), MAX_BULK_IDS)]
+            results = await asyncio.gather(*(self.fetch_bulk_features(session, chunk) for chunk in chunks), return_exceptions=True)
+            return [features for res in results if not isinstance(res, BaseException) for features in res]
+
+        results = await asyncio.gather(*(self.fetch_single_features(session, mbid) for mbid in mbids), return_exceptions=True)
+        return [res for res in results if res and not isinstance(res, BaseException)]
+
+    async def fetch_bulk_features(self, session, mbids):
+        """
+        Fetch high-level and low-level features for up to MAX_BULK_IDS MBIDs with one request per level.
+
+        Both levels are requested concurrently and the documents are fanned out per mbid.
+        mbids missing from either response have no data and are marked as not found.
+
+        Returns:
+            list: Features of the mbids found.
         """
-        tasks = []
+        params = {"recording_ids": ";".join(mbids)}
+        try:
+            high_docs, low_payload = await asyncio.gather(
+                self.fetch_json(session, f"{self.base_url}/high-level", params=params),
+                self.fetch_json(session, f"{self.base_url}/low-level", params=params, raw=True),
+            )
+            # Low-level documents are large, they are parsed as a stream on the process pool
+            low_features = await self.extractor.extract_bulk_async(low_payload, mbids)
+        except aiohttp.ClientResponseError as e:
+            if e.status in RETRY_STATUSES:
+                self.retry_queue.extend(mbids)
+            logger.error(f"Error fetching features for {len(mbids)} MBIDs: {e}")
+            return []
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.retry_queue.extend(mbids)
+            logger.error(f"Error fetching features for {len(mbids)} MBIDs: {e}")
+            return []
+
         results = []
+        for mbid in mbids:
+            # Documents are keyed by mbid and then by submission offset, "0" is the first submission
+            high_data = high_docs.get(mbid, {}).get("0")
+            low_level = low_features.get(mbid)
+            if high_data is None or low_level is None:
+                self.not_found.append(mbid)
+                continue
+            results.append({
+                "mbid": mbid,
+                "high_level": self.extract_high_level_features(high_data),
+                "low_level": low_level,
+            })
+        return results
 
-        for idx, mbid in enumerate(mbids):
-            tasks.append(self.fetch_single_features(session, mbid))
+    async def fetch_json(self, session, url, params=None, raw=False):
+        """
+        GET a JSON document through the rate limiter, retrying 429 and 5xx responses with backoff.
 
-            if (idx + 1) % 10 == 0:
-                logger.info(f"Sleeping for 10 seconds to respect API rate limits after {idx + 1} requests.")
-                results.extend(await asyncio.gather(*tasks, return_exceptions=True))
-                tasks = []  
-                await asyncio.sleep(10)  
+        With raw=True the undecoded body is returned so it can be parsed as a stream.
 
-        if tasks:
-            results.extend(await asyncio.gather(*tasks, return_exceptions=True))
+        Raises:
+            aiohttp.ClientResponseError: If the response is an error and no retries are left.
+        """
+        for attempt in range(self.rate_limiter.max_retries + 1):
+            async with self.rate_limiter:
+                async with session.get(url, params=params) as response:
+                    self.rate_limiter.update(response.headers)
+                    if not self.rate_limiter.should_retry(response.status, attempt):
+                        response.raise_for_status()
+                        if raw:
+                            return await response.read()
+                        return await response.json()
+                    retry_after = response.headers.get("Retry-After")
 
-        return [res for res in results if res]
+            delay = self.rate_limiter.backoff(attempt, retry_after)
+            logger.warning(f"{url} returned {response.status}, retrying in {delay:.1f}s")
 
     async def fetch_single_features(self, session, mbid):
         """
-        Fetch high-level and low-level features for a single MBID.
+        Fetch high-level and low-level features for a single MBID, both documents concurrently.
         """
         features = {"mbid": mbid}
         try:
-            async with session.get(f"{self.base_url}/{mbid}/high-level") as response_high:
-                response_high.raise_for_status()
-                high_data = await response_high.json()
-                features["high_level"] = self.extract_high_level_features(high_data)
-
-            async with session.get(f"{self.base_url}/{mbid}/low-level") as response_low:
-                response_low.raise_for_status()
-                low_data = await response_low.json()
-                features["low_level"] = self.extract_low_level_features(low_data)
+            high_data, low_data = await asyncio.gather(
+                self.fetch_json(session, f"{self.base_url}/{mbid}/high-level"),
+                self.fetch_json(session, f"{self.base_url}/{mbid}/low-level", raw=True),
+            )
+            features["high_level"] = self.extract_high_level_features(high_data)
+            features["low_level"] = await self.extractor.extract_async(low_data)
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404:
+                self.not_found.append(mbid)
+            elif e.status in RETRY_STATUSES:
+                self.retry_queue.append(mbid)
+            logger.error(f"Error fetching features for MBID {mbid}: {e}")
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.retry_queue.append(mbid)
+            logger.error(f"Error fetching features for MBID {mbid}: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error fetching features for MBID {mbid}: {e}")
             return None
@@ -88,36 +190,58 @@ class AcousticBrainzFetcher:
 
     def extract_low_level_features(self, data):
         """
-        Extract low-level features.
+        Extract the kept low-level descriptors, see feature_extraction.LOW_LEVEL_DESCRIPTORS.
         """
-        features = {}
-        for key, key_dict in data.items():
-            for feature, values in key_dict.items():
-                if isinstance(values, dict) and 'mean' in values:
-                    features[feature] = mean(values['mean']) if isinstance(values['mean'], list) else values['mean']
-                elif isinstance(values, (str, float, int)):
-                    features[feature] = values
-        return json.dumps(features)
+        return json.dumps(extract_low_level_features(data))
 
-    def batch_insert_tracks(self, track_infos):
+    async def retry_failed(self, session, rounds=3, cooldown=30):
         """
-        Batch insert tracks into the database.
+        Fetch the mbids in the retry queue again, waiting cooldown seconds before each round.
+
+        Args:
+            session (aiohttp.ClientSession): HTTP session.
+            rounds (int): Maximum number of passes over the queue.
+            cooldown (float): Seconds to wait before a pass so the server can recover.
+
+        Returns:
+            list: Features fetched on the retries. mbids still failing stay in retry_queue.
+        """
+        results = []
+        for round_number in range(rounds):
+            if not self.retry_queue:
+                break
+            queued, self.retry_queue = self.retry_queue, []
+            logger.info(f"Retry round {round_number + 1}: {len(queued)} mbids")
+            await asyncio.sleep(cooldown)
+            results.extend(await self.fetch_features_batch(session, queued))
+
+        if self.retry_queue:
+            logger.warning(f"{len(self.retry_queue)} mbids still failing, they are fetched again on the next run")
+        return results
+
+    async def batch_insert_tracks(self, track_infos):
+        """
+        Batch upsert tracks into the database without blocking the event loop.
+
+        Track_info.mbid is unique, so rows already stored by an interrupted run are updated, not duplicated.
         """
         try:
-            placeholders = ", ".join(["%s"] * len(track_infos[0]))
-            columns = ", ".join(track_infos[0].keys())
-            query = f"""
-                INSERT INTO `Track_info`({columns})
-                VALUES ({placeholders})
-            """
-            values = [tuple(track.values()) for track in track_infos]
-            self.cursor.executemany(query, values)
-            self.db_manager.commit()
+            await self.track_info_model.upsert_many(track_infos, key_columns=["mbid"])
             logger.info(f"Inserted batch of {len(track_infos)} tracks successfully.")
+            if self.feature_store is not None:
+                # Only after the rows are committed, so the store never runs ahead of Track_info
+                self.feature_store.append(track_infos)
         except Exception as e:
             logger.error(f"Error inserting tracks: {e}")
 
-async def main():
+    async def flush_not_found(self):
+        """
+        Record the mbids that returned 404 as processed.
+        """
+        not_found, self.not_found = self.not_found, []
+        await self.checkpoint.mark_done([("", mbid) for mbid in not_found])
+
+async def main(base_url=BASE_URL, max_concurrency=10, bulk=True, feature_store_path=None):
 
     db_config = {
         'host': os.getenv('DB_HOST'),
@@ -125,30 +249,51 @@ async def main():
         'password': os.getenv('DB_PASSWORD'),
         'database': os.getenv('DB_NAME')
     }
-    db_manager = DatabaseManager(db_config=db_config)
-    cursor = db_manager.get_cursor()
 
-    cursor.execute("SELECT mbid FROM Tracks;")
-    mbids = [row['mbid'] for row in cursor.fetchall()]
+    async with AsyncDatabaseManager(db_config=db_config) as db_manager:
+        # Only mbids without features and not known to be missing, so a rerun resumes where it stopped
+        rows = await db_manager.fetchall(PENDING_MBIDS_QUERY)
+        mbids = [row['mbid'] for row in rows]
 
-    fetcher = AcousticBrainzFetcher(cursor, db_manager)
-    batch_size = 25  
+        fetcher = AcousticBrainzFetcher(db_manager, base_url=base_url,
+                                        rate_limiter=AdaptiveRateLimiter(max_concurrency=max_concurrency), bulk=bulk,
+                                        feature_store=FeatureStore(feature_store_path) if feature_store_path else None)
+        # In bulk mode a batch is several bulk requests in flight at once
+        batch_size = MAX_BULK_IDS * max_concurrency if bulk else 25
 
-    all_features = []
+        all_features = []
+        insert_tasks = []
 
-    async with aiohttp.ClientSession() as session:
-        for i in range(0, len(mbids), batch_size):
-            batch = mbids[i:i + batch_size]
-            logger.info(f"Processing batch {i // batch_size + 1}/{len(mbids) // batch_size + 1}")
-            features_batch = await fetcher.fetch_features_batch(session, batch)
-            all_features.extend(features_batch)
+        async with aiohttp.ClientSession() as session:
+            for i in range(0, len(mbids), batch_size):
+                batch = mbids[i:i + batch_size]
+                logger.info(f"Processing batch {i // batch_size + 1}/{len(mbids) // batch_size + 1}")
+                features_batch = await fetcher.fetch_features_batch(session, batch)
+                all_features.extend(features_batch)
 
-            if len(all_features) >= 100:
-                fetcher.batch_insert_tracks(all_features)
-                all_features = [] 
+                if len(all_features) >= 100:
+                    # Flush in the background so fetching carries on while MySQL writes
+                    insert_tasks.append(asyncio.create_task(fetcher.batch_insert_tracks(all_features)))
+                    all_features = [] 
 
-        if all_features:
-            fetcher.batch_insert_tracks(all_features)
+            all_features.extend(await fetcher.retry_failed(session))
+
+            if all_features:
+                insert_tasks.append(asyncio.create_task(fetcher.batch_insert_tracks(all_features)))
+
+        insert_tasks.append(asyncio.create_task(fetcher.flush_not_found()))
+
+        await asyncio.gather(*insert_tasks)
+        fetcher.extractor.close()
+        logger.info(f"Rate limiter: {fetcher.rate_limiter.get_stats()}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Fetch AcousticBrainz features for the crawled tracks")
+    parser.add_argument("--base-url", default=BASE_URL, help="API root, e.g. a local fake server")
+    parser.add_argument("--concurrency", type=int, default=10, help="Maximum requests in flight")
+    parser.add_argument("--no-bulk", action="store_true", help="Request every mbid on its own instead of the bulk endpoints")
+    parser.add_argument("--feature-store", default=None, help="Directory of a feature store to append the new tracks to")
+    args = parser.parse_args()
+
+    asyncio.run(main(base_url=args.base_url, max_concurrency=args.concurrency, bulk=not args.no_bulk,
+                     feature_store_path=args.feature_store))
\ No newline at end of file
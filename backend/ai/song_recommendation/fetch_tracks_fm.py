@@ -1,10 +1,11 @@
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from pathlib import Path
 import os
 import requests
 import mysql.connector
 import sys
+import argparse
 import logging
 
 
@@ -20,6 +21,9 @@ sys.path.append(str(base_path))
 from utils.errors import InputError
 from utils.errors import DatabaseConnectionError
 from backend.database_manager.database_manager import DatabaseManager
+from backend.database_manager.schema_registry import schema_registry
+from backend.ai.song_recommendation.rate_limiter import TokenBucket
+from backend.ai.song_recommendation.checkpoint import CrawlCheckpoint
 
 logging.basicConfig(
     level=logging.DEBUG,  # Set the log level to DEBUG
@@ -37,15 +41,27 @@ API_KEY = os.getenv('API_KEY_fm')
 SHARED_SECRET = os.getenv('SHARED_SECRET_fm')
 REDIRECT_URI = os.getenv('REDIRECT_URI_fm')
 BASE_URL = "http://ws.audioscrobbler.com/2.0/"
+# Last.fm allows about 5 requests per second per API key
+RATE_LIMIT = 5
+# Tracks.mbid is unique, a track seen again (e.g. under another tag) is updated instead of duplicated
+UPSERT_CLAUSE = "ON DUPLICATE KEY UPDATE name = VALUES(name), artist_name = VALUES(artist_name), genre = VALUES(genre)"
 
 class track_info_fetch:
     
-    def __init__(self, cursor, conn):
+    def __init__(self, cursor, conn, base_url=BASE_URL, api_key=None, max_workers=8, requests_per_second=RATE_LIMIT,
+                 batch_size=500, timeout=10):
         """
-        Initialize the UserModel class with database configuration.
+        Initialize the track_info_fetch class with database configuration and the HTTP client.
 
         Args:
             cursor (mysql.connector.cursor_cext.CMySQLCursorDict): The database cursor.
+            conn (mysql.connector.connection_cext.CMySQLConnection): Connection the cursor belongs to, used to commit.
+            base_url (str): Last.fm API root, point it to a local stub server for testing.
+            api_key (str): Last.fm API key. Defaults to API_KEY_fm from the env file.
+            max_workers (int): Maximum number of requests in flight.
+            requests_per_second (float): Sustained request rate allowed by the token bucket.
+            batch_size (int): Number of tracks inserted and committed together.
+            timeout (float): Seconds before a request is abandoned.
 
         Raises:
                 DatabaseConnectionError: If connection to the database fails
@@ -53,12 +69,25 @@ class track_info_fetch:
         try:
             self.cursor = cursor
             self.conn = conn
-            self.cursor.execute("SHOW COLUMNS FROM Tracks;")
-            self.table_columns = self.cursor.fetchall()
+            self.table_columns = schema_registry.get_columns(self.cursor, "Tracks")
             logger.info("Database connection established successfully.")
         except mysql.connector.Error as err:
             logger.error(f"Error connecting to the database: {err}")
             raise DatabaseConnectionError(f"Error connecting to the database: {err}")
+
+        self.base_url = base_url
+        self.api_key = api_key if api_key is not None else API_KEY
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.rate_limiter = TokenBucket(rate=requests_per_second)
+        self.checkpoint = CrawlCheckpoint(cursor, source="lastfm")
+
+        # One keep-alive session shared by every worker, sized so no worker waits for a socket
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         
     def check_if_input_cols_match(self, table_columns: list, input_columns: list, exclude_columns = None, exact_match=True):
         """
@@ -86,66 +115,94 @@ class track_info_fetch:
             logger.error("Inputed columns that are not in the table schema!")
             raise InputError("Inputed columns that are not in the table schema!") 
 
+    def _get(self, params: dict) -> dict:
+        """
+        Send one rate limited GET to the Last.fm API on the shared session.
+
+        Args:
+            params (dict): Query parameters besides api_key and format.
+
+        Returns:
+            dict: Decoded JSON body, None if the request failed, the body is not JSON
+                        or Last.fm answered with an error payload.
+        """
+        self.rate_limiter.acquire()
+        try:
+            response = self.session.get(
+                self.base_url,
+                params={**params, "api_key": self.api_key, "format": "json"},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as err:
+            logger.error(f"Request {params['method']} failed: {err}")
+            return None
+
+        if response.status_code != 200:
+            logger.error(f"Error on {params['method']}: {response.status_code}")
+            return None
+        try:
+            response_data = response.json()
+        except ValueError as err:
+            logger.error(f"Response of {params['method']} is not JSON: {err}")
+            return None
+        # Last.fm reports some errors (unknown artist, rate limit) with a 200 status
+        if not isinstance(response_data, dict) or "error" in response_data:
+            logger.error(f"Error payload on {params['method']}: {response_data}")
+            return None
+        return response_data
+
     def fetch_top_tags(self, limit=100):
         """Fetch the top tags (genres)."""
-        url = (
-            f"http://ws.audioscrobbler.com/2.0/?method=chart.gettoptags"
-            f"&api_key={API_KEY}&format=json&limit={limit}"
-        )
-        response = requests.get(url)
-        if response.status_code == 200:
-            tags = response.json()["tags"]["tag"]
-            return [tag["name"] for tag in tags]
-        else:
-            print(f"Error fetching top tags: {response.status_code}")
+        response_data = self._get({"method": "chart.gettoptags", "limit": limit})
+        if response_data is None:
+            return []
+        try:
+            return [tag["name"] for tag in response_data["tags"]["tag"]]
+        except (KeyError, TypeError) as err:
+            logger.error(f"Unexpected chart.gettoptags response, missing {err}")
             return []
 
     def fetch_top_artists_by_tag(self, tag, limit=100):
         """Fetch the top artists for a given tag."""
-        url = (
-            f"http://ws.audioscrobbler.com/2.0/?method=tag.gettopartists"
-            f"&tag={tag}&api_key={API_KEY}&format=json&limit={limit}"
-        )
-        response = requests.get(url)
-        if response.status_code == 200:
-            artists = response.json()["topartists"]["artist"]
-            return [artist["name"] for artist in artists]
-        else:
-            print(f"Error fetching artists for tag {tag}: {response.status_code}")
+        response_data = self._get({"method": "tag.gettopartists", "tag": tag, "limit": limit})
+        if response_data is None:
+            return []
+        try:
+            return [artist["name"] for artist in response_data["topartists"]["artist"]]
+        except (KeyError, TypeError) as err:
+            logger.error(f"Unexpected tag.gettopartists response for {tag}, missing {err}")
             return []
 
     def fetch_top_tracks_by_artist(self, artist, genre, limit=5, max_fetch=50):
-        """Fetch the top tracks for a given artist, skipping tracks without an mbid."""
-        url = (
-            f"http://ws.audioscrobbler.com/2.0/?method=artist.gettoptracks"
-            f"&artist={artist}&api_key={API_KEY}&format=json&limit={max_fetch}"
-        )
-        response = requests.get(url)
-        if response.status_code == 200:
-            response_data = response.json()
-            if "toptracks" in response_data and "track" in response_data["toptracks"]:
-                
-                tracks = response_data["toptracks"]["track"]
-                filtered_tracks = [
-                    {"mbid": track["mbid"], "name": track["name"], "artist_name": artist, "genre": genre}
-                    for track in tracks
-                    if "mbid" in track and track["mbid"]
-                ]
-
-                if len(filtered_tracks) >= limit:
-                    return filtered_tracks[:limit]
-                else:
-                    return filtered_tracks
-            else:
-                print(f"No 'toptracks' found for artist: {artist}")
-                return []
-        else:
-            print(f"Error fetching top tracks for artist {artist}: {response.status_code}")
-            return []
-        
+        """
+        Fetch the top tracks for a given artist, skipping tracks without an mbid.
+
+        Returns:
+            list: Track dictionaries, empty if the artist has no track with an mbid.
+                        None if the request failed, so the artist is retried by the next run.
+        """
+        response_data = self._get({"method": "artist.gettoptracks", "artist": artist, "limit": max_fetch})
+        if response_data is None:
+            return None
+
+        if "toptracks" not in response_data or "track" not in response_data["toptracks"]:
+            logger.warning(f"No 'toptracks' found for artist: {artist}")
+            return None
+
+        try:
+            filtered_tracks = [
+                {"mbid": track["mbid"], "name": track["name"], "artist_name": artist, "genre": genre}
+                for track in response_data["toptracks"]["track"]
+                if "mbid" in track and track["mbid"]
+            ]
+        except (KeyError, TypeError) as err:
+            logger.error(f"Unexpected artist.gettoptracks response for {artist}, missing {err}")
+            return None
+        return filtered_tracks[:limit]
+
     def track_insertion(self, track_info: dict):
         """
-        Inserts a artist into the Artists database.
+        Inserts a track into the Tracks database, a track with the same mbid is updated instead.
 
         Args:
             user_data (dict): A dictionary containing details about the artist.
@@ -165,7 +222,8 @@ class track_info_fetch:
             placeholders = ", ".join(["%s"] * len(track_info))
             query = f"""
                         INSERT INTO `Tracks`({input_columns_string}) 
-                        VALUES({placeholders});
+                        VALUES({placeholders})
+                        {UPSERT_CLAUSE}
                     """
             track_info_tuple = tuple(track_info.values())
             self.cursor.execute(query, track_info_tuple)
@@ -174,27 +232,118 @@ class track_info_fetch:
             logger.error(f"Error when createing a new track {err}")
             raise DatabaseConnectionError(f"Database connection failed {err}.")
 
-    def main(self):
-        genres = self.fetch_top_tags(limit=100)
-        print(f"Fetched {len(genres)} genres.")
-
-        for genre in genres:
-            print(f"Fetching artists for genre: {genre}")
-            artists = self.fetch_top_artists_by_tag(genre, limit=100)
-            
-            for artist in artists:
-                print(f"Fetching tracks for artist: {artist}")
-                tracks = self.fetch_top_tracks_by_artist(artist, genre, limit=5)
-                if tracks:
-                    for track in tracks:
-                        self.track_insertion(track)
-                        self.conn.commit()
-                
-                time.sleep(0.5)
-
-            time.sleep(1)
+    def track_insertion_batch(self, tracks: list, completed=None):
+        """
+        Upserts many tracks into the Tracks table with one executemany and commits them
+        together with the checkpoints of the (tag, artist) pairs they came from.
+
+        Args:
+            tracks (list): Track dictionaries as returned by fetch_top_tracks_by_artist.
+            completed (list): (tag, artist) pairs whose tracks are all in this batch.
+        Raises:
+            InputError: If the set of columns does not equal the columns from the table.
+            DatabaseConnectionError: If the database connection fails.
+        """
+        if not tracks and not completed:
+            return
+
+        try:
+            if tracks:
+                columns_table = [row["Field"] for row in self.table_columns]
+                columns = list(tracks[0].keys())
+                self.check_if_input_cols_match(table_columns=columns_table, input_columns=columns, exclude_columns=["id"])
+
+                input_columns_string = ", ".join(columns)
+                placeholders = ", ".join(["%s"] * len(columns))
+                query = f"""
+                            INSERT INTO `Tracks`({input_columns_string}) 
+                            VALUES({placeholders})
+                            {UPSERT_CLAUSE}
+                        """
+                # executemany turns a plain INSERT ... VALUES into one multi-row statement
+                self.cursor.executemany(query, [tuple(track[col] for col in columns) for track in tracks])
+            self.checkpoint.mark_done(completed)
+            self.conn.commit()
+            logger.info(f"{len(tracks)} tracks added")
+        except mysql.connector.Error as err:
+            logger.error(f"Error when createing new tracks {err}")
+            raise DatabaseConnectionError(f"Database connection failed {err}.")
+
+    def main(self, tags_limit=100, artists_limit=100, tracks_limit=5):
+        """
+        Crawl the top tracks of the top artists of the top tags and store them.
+
+        HTTP calls run on a thread pool bounded by max_workers and paced by the token bucket,
+        inserts stay on the calling thread and are committed every batch_size tracks.
+        (tag, artist) pairs committed by an earlier run are skipped, so a crashed crawl resumes where it stopped.
+        Pairs whose request failed are not checkpointed and are retried by the next run, pairs without
+        any mbid track are checkpointed like the others.
+
+        Args:
+            tags_limit (int): Number of top tags (genres) to crawl.
+            artists_limit (int): Number of artists per tag.
+            tracks_limit (int): Number of tracks with an mbid kept per artist.
+
+        Returns:
+            int: Number of tracks inserted.
+        """
+        genres = self.fetch_top_tags(limit=tags_limit)
+        logger.info(f"Fetched {len(genres)} genres.")
+
+        done = self.checkpoint.completed()
+        inserted = 0
+        buffer = []
+        completed = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            artist_futures = {
+                executor.submit(self.fetch_top_artists_by_tag, genre, artists_limit): genre
+                for genre in genres
+            }
+
+            track_futures = {}
+            for future in as_completed(artist_futures):
+                genre = artist_futures[future]
+                artists = [artist for artist in future.result() if (genre, artist) not in done]
+                logger.info(f"{len(artists)} artists left to crawl for genre: {genre}")
+                for artist in artists:
+                    track_futures[executor.submit(self.fetch_top_tracks_by_artist, artist, genre, tracks_limit)] = (genre, artist)
+
+            failed = 0
+            for future in as_completed(track_futures):
+                tracks = future.result()
+                if tracks is None:
+                    failed += 1
+                    continue
+                buffer.extend(tracks)
+                completed.append(track_futures[future])
+                if len(buffer) >= self.batch_size:
+                    self.track_insertion_batch(buffer, completed)
+                    inserted += len(buffer)
+                    buffer = []
+                    completed = []
+
+        self.track_insertion_batch(buffer, completed)
+        inserted += len(buffer)
+        logger.info(f"Crawl finished, {inserted} tracks inserted, {failed} artists failed and left for the next run. "
+                    f"Rate limiter: {self.rate_limiter.get_stats()}")
+        return inserted
+
+    def close(self):
+        """
+        Close the HTTP session.
+        """
+        self.session.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl Last.fm top tracks into the Tracks table")
+    parser.add_argument("--base-url", default=BASE_URL, help="API root, e.g. a local stub server")
+    parser.add_argument("--workers", type=int, default=8, help="Maximum requests in flight")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="Requests per second")
+    parser.add_argument("--tags", type=int, default=100, help="Number of top tags to crawl")
+    parser.add_argument("--artists", type=int, default=100, help="Number of artists per tag")
+    parser.add_argument("--restart", action="store_true", help="Forget the checkpoints and crawl everything again")
+    args = parser.parse_args()
+
     db_config = {
     'host': os.getenv('DB_HOST'),
     'user': os.getenv('DB_USER'),
@@ -203,6 +352,14 @@ if __name__ == "__main__":
     }
 
     db_manager = DatabaseManager(db_config=db_config)
-    track_fetch = track_info_fetch(db_manager.get_cursor(), db_manager.conn)
+    track_fetch = track_info_fetch(db_manager.get_cursor(), db_manager.conn, base_url=args.base_url,
+                                   max_workers=args.workers, requests_per_second=args.rate)
     
-    track_fetch.main()
+    try:
+        if args.restart:
+            track_fetch.checkpoint.reset()
+            db_manager.commit()
+        track_fetch.main(tags_limit=args.tags, artists_limit=args.artists)
+    finally:
+        track_fetch.close()
+        db_manager.close()
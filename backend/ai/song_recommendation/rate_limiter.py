@@ -0,0 +1,189 @@
+from pathlib import Path
+import asyncio
+import random
+import threading
+import time
+import sys
+
+base_path = Path(__file__).resolve().parent.parent.parent.parent
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+
+# Status codes worth retrying, everything else is final
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int = None):
+        """
+        Thread safe token bucket limiting how many requests are sent per second.
+
+        The bucket starts full, so up to capacity requests go out at once and afterwards
+        requests are spaced to rate per second.
+
+        Args:
+            rate (float): Tokens added per second, i.e. the sustained requests per second.
+            capacity (int): Maximum burst size. Defaults to one second worth of tokens.
+
+        Raises:
+            InputError: If rate or capacity are not positive.
+        """
+        if rate <= 0:
+            raise InputError("rate must be positive")
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, int(rate))
+        if self.capacity < 1:
+            raise InputError("capacity must be at least 1")
+
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "waited": 0, "wait_seconds": 0.0}
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: int = 1) -> float:
+        """
+        Take tokens from the bucket without blocking.
+
+        Args:
+            tokens (int): Number of tokens needed.
+
+        Returns:
+            float: Seconds the caller has to wait before sending, 0 if it can send right away.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.stats["acquired"] += 1
+            if delay:
+                self.stats["waited"] += 1
+                self.stats["wait_seconds"] += delay
+        return delay
+
+    def acquire(self, tokens: int = 1):
+        """
+        Block until tokens are available.
+
+        Args:
+            tokens (int): Number of tokens needed.
+        """
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    def get_stats(self) -> dict:
+        """
+        Returns how many requests went through the bucket and how long they waited.
+        """
+        with self._lock:
+            return dict(self.stats)
+
+class AdaptiveRateLimiter:
+    def __init__(self, max_concurrency=10, base_delay=1.0, max_delay=60.0, max_retries=5):
+        """
+        Async rate limiter that follows what the server reports instead of a fixed pace.
+
+        After every response update() reads the X-RateLimit-Remaining and X-RateLimit-Reset-In headers
+        and pauses every caller until the window resets once the quota is used up.
+        429 and 5xx responses back off exponentially with full jitter, or for Retry-After seconds when given.
+
+        Args:
+            max_concurrency (int): Maximum number of requests in flight.
+            base_delay (float): First backoff delay in seconds, doubled on every retry.
+            max_delay (float): Upper bound for a single backoff delay.
+            max_retries (int): Attempts after the first one before a request is given up.
+
+        Raises:
+            InputError: If max_concurrency is not positive.
+        """
+        if max_concurrency < 1:
+            raise InputError("max_concurrency must be at least 1")
+
+        self.max_concurrency = max_concurrency
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self._semaphore = None
+        self._blocked_until = 0.0
+        self.stats = {"requests": 0, "throttled": 0, "retries": 0, "paused_seconds": 0.0}
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created on first use so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        # Loop because another response can extend the pause while this caller sleeps
+        delay = self._blocked_until - time.monotonic()
+        while delay > 0:
+            self.stats["paused_seconds"] += delay
+            await asyncio.sleep(delay)
+            delay = self._blocked_until - time.monotonic()
+        self.stats["requests"] += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.semaphore.release()
+
+    def _pause(self, seconds: float):
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def update(self, headers):
+        """
+        Read the rate limit headers of a response.
+
+        Args:
+            headers (Mapping): Response headers.
+        """
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_in = headers.get("X-RateLimit-Reset-In")
+        if remaining is None or reset_in is None:
+            return
+        try:
+            remaining, reset_in = int(remaining), float(reset_in)
+        except ValueError:
+            return
+        if remaining <= 0:
+            self._pause(reset_in)
+
+    def backoff(self, attempt: int, retry_after=None) -> float:
+        """
+        Pause every caller after a throttled or failed response.
+
+        Args:
+            attempt (int): Number of the failed attempt, starting at 0.
+            retry_after (str): Retry-After header of the response, if any.
+
+        Returns:
+            float: Seconds the limiter is paused for.
+        """
+        self.stats["throttled"] += 1
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        self._pause(delay)
+        return delay
+
+    def should_retry(self, status: int, attempt: int) -> bool:
+        """
+        Checks if a response status is retryable and attempts are left.
+        """
+        retry = status in RETRY_STATUSES and attempt < self.max_retries
+        if retry:
+            self.stats["retries"] += 1
+        return retry
+
+    def get_stats(self) -> dict:
+        """
+        Returns how many requests were sent, throttled and retried and how long callers were paused.
+        """
+        return dict(self.stats)
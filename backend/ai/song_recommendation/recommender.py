@@ -0,0 +1,409 @@
+from pathlib import Path
+import argparse
+import logging
+import sys
+import time
+import numpy as np
+
+base_path = Path(__file__).resolve().parent.parent.parent.parent
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+from backend.ai.song_recommendation.feature_store import FeatureStore
+from backend.ai.song_recommendation.ann_index import IVFIndex
+
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+def column_stats(matrix: np.ndarray, block_size=65536) -> tuple:
+    """
+    Mean and inverse standard deviation of every column, ignoring NaN.
+
+    Statistics are accumulated block by block so a memory-mapped matrix is read sequentially once.
+
+    Args:
+        matrix (np.ndarray): (rows, dim) float32 features, NaN where a descriptor is missing.
+        block_size (int): Rows processed at a time.
+
+    Returns:
+        tuple: (mean, scale) float32 arrays of length dim. Constant or empty columns have a scale of 0.
+    """
+    rows, dim = matrix.shape
+    count = np.zeros(dim, dtype=np.float64)
+    total = np.zeros(dim, dtype=np.float64)
+    total_sq = np.zeros(dim, dtype=np.float64)
+    for start in range(0, rows, block_size):
+        block = np.asarray(matrix[start:start + block_size], dtype=np.float64)
+        present = ~np.isnan(block)
+        block = np.where(present, block, 0.0)
+        count += present.sum(axis=0)
+        total += block.sum(axis=0)
+        total_sq += (block * block).sum(axis=0)
+
+    safe_count = np.maximum(count, 1)
+    mean = total / safe_count
+    std = np.sqrt(np.maximum(total_sq / safe_count - mean * mean, 0.0))
+    # Constant or empty columns carry no information, they end up as zeros
+    scale = np.where(std > 0, 1.0 / np.where(std > 0, std, 1.0), 0.0)
+    return mean.astype(np.float32), scale.astype(np.float32)
+
+def normalize(matrix: np.ndarray, block_size=65536, stats=None) -> np.ndarray:
+    """
+    Z-score every column, fill missing values with the column mean and scale rows to unit length,
+    so the dot product of two rows is their cosine similarity.
+
+    Args:
+        matrix (np.ndarray): (rows, dim) float32 features, NaN where a descriptor is missing.
+        block_size (int): Rows processed at a time.
+        stats (tuple): (mean, scale) from column_stats(), computed from matrix if None.
+                    Pass the stats of the fitted catalog to normalize new rows the same way.
+
+    Returns:
+        np.ndarray: New (rows, dim) float32 array.
+    """
+    rows, dim = matrix.shape
+    mean, scale = stats if stats is not None else column_stats(matrix, block_size=block_size)
+
+    normalized = np.empty((rows, dim), dtype=np.float32)
+    for start in range(0, rows, block_size):
+        block = np.asarray(matrix[start:start + block_size], dtype=np.float32)
+        block = (block - mean) * scale
+        np.nan_to_num(block, copy=False, nan=0.0)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        block /= np.where(norms > 0, norms, 1.0)
+        normalized[start:start + block_size] = block
+    return normalized
+
+def top_k(vectors: np.ndarray, queries: np.ndarray, k: int, block_size=65536) -> tuple:
+    """
+    Exact top-k by dot product, computed over blocks of rows with one matrix product per block.
+
+    Args:
+        vectors (np.ndarray): (rows, dim) float32 unit vectors.
+        queries (np.ndarray): (batch, dim) float32 unit vectors.
+        k (int): Number of neighbours.
+        block_size (int): Rows scored at a time, bounds the (block_size, batch) score matrix.
+
+    Returns:
+        tuple: (indices, scores), both (batch, k) and sorted by descending score.
+    """
+    rows = vectors.shape[0]
+    k = min(k, rows)
+    batch = queries.shape[0]
+    best_scores = np.full((batch, 0), -np.inf, dtype=np.float32)
+    best_indices = np.empty((batch, 0), dtype=np.int64)
+
+    for start in range(0, rows, block_size):
+        # (batch, block) so every query's scores are contiguous for argpartition
+        scores = queries @ vectors[start:start + block_size].T
+        if scores.shape[1] > k:
+            part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            part = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        part_scores = np.take_along_axis(scores, part, axis=1)
+
+        candidate_scores = np.concatenate([best_scores, part_scores], axis=1)
+        candidate_indices = np.concatenate([best_indices, part + start], axis=1)
+        if candidate_scores.shape[1] > k:
+            keep = np.argpartition(-candidate_scores, k - 1, axis=1)[:, :k]
+            candidate_scores = np.take_along_axis(candidate_scores, keep, axis=1)
+            candidate_indices = np.take_along_axis(candidate_indices, keep, axis=1)
+        best_scores, best_indices = candidate_scores, candidate_indices
+
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_indices, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+class Recommender:
+    def __init__(self, store=None, cursor=None, block_size=65536, index=None, n_probe=16):
+        """
+        Content based track recommendations over the feature store.
+
+        Args:
+            store (FeatureStore): Feature vectors. The default store is opened if None.
+            cursor (mysql.connector.cursor_cext.CMySQLCursorDict): ai_model cursor, only needed to look up Tracks ids.
+            block_size (int): Rows scored per matrix product.
+            index (IVFIndex): Approximate index, e.g. IVFIndex.load(), exact search is used if None.
+                        It is matched against the store by mbid on fit(), see _sync_index().
+            n_probe (int): Index clusters scanned per query.
+        """
+        self.store = store or FeatureStore()
+        self.cursor = cursor
+        self.block_size = block_size
+        self.index = index
+        self.n_probe = n_probe
+        self.mbids = []
+        self.vectors = np.empty((0, self.store.dim), dtype=np.float32)
+        self.stats = None
+        self._rows = {}
+        self._store_rows = 0
+        # Row of vectors behind every index id, -1 for ids removed from the index
+        self._index_rows = np.empty(0, dtype=np.int64)
+
+    def fit(self, stats=None):
+        """
+        Load and normalize every vector of the store. Call again after the store changed.
+
+        Args:
+            stats (tuple): (mean, scale) to normalize with, e.g. the stats of an earlier fit so scores
+                        stay comparable with ones computed before. Defaults to the stats of the index if there
+                        is one, else they are computed from the store.
+
+        Raises:
+            InputError: If the index does not belong to the store, see _sync_index().
+        """
+        start = time.perf_counter()
+        if stats is None and self.index is not None:
+            stats = self.index.stats
+        self._store_rows = self.store.rows
+        self.mbids, matrix = self.store.load()
+        self.stats = stats if stats is not None else column_stats(matrix, block_size=self.block_size)
+        self.vectors = normalize(matrix, block_size=self.block_size, stats=self.stats)
+        self._rows = {mbid: row for row, mbid in enumerate(self.mbids)}
+        if self.index is not None:
+            self._sync_index()
+        logger.info(f"Recommender fitted on {len(self.mbids)} tracks in {time.perf_counter() - start:.2f}s")
+        return self
+
+    def _sync_index(self, atol=1e-5):
+        """
+        Map the index ids to rows of vectors by mbid and bring the index up to date.
+
+        Store rows move when a track is appended again, so index ids are never used as rows directly.
+        Tracks new to the store, and tracks whose vector changed since the index was built, are added
+        to the index, their outdated vectors are removed from it.
+
+        Raises:
+            InputError: If the index has no mbids or stats, was normalized with other stats,
+                        or holds tracks the store does not have.
+        """
+        index = self.index
+        if index.mbids is None or index.stats is None:
+            raise InputError("The index has no mbids or stats, rebuild it with Recommender.build_index()")
+        if not all(np.allclose(a, b) for a, b in zip(index.stats, self.stats)):
+            raise InputError("The index was normalized with other stats, rebuild it")
+        rows = np.fromiter((self._rows.get(mbid, -1) for mbid in index.mbids), dtype=np.int64, count=len(index.mbids))
+        unknown = int((rows < 0).sum())
+        if unknown:
+            logger.error(f"{unknown} tracks of the index are not in the feature store")
+            raise InputError(f"{unknown} tracks of the index are not in the feature store, rebuild it")
+
+        index.merge()
+        stale = []
+        for start in range(0, len(index.ids), self.block_size):
+            ids = np.asarray(index.ids[start:start + self.block_size])
+            stored = np.asarray(index.vectors[start:start + self.block_size])
+            changed = ~np.all(np.isclose(stored, self.vectors[rows[ids]], atol=atol), axis=1)
+            stale.append(ids[changed])
+        stale = np.concatenate(stale) if stale else np.empty(0, dtype=np.int64)
+
+        missing = np.ones(len(self.mbids), dtype=bool)
+        missing[rows] = False
+        readd = np.concatenate([rows[stale], np.flatnonzero(missing)])
+        rows[stale] = -1
+        index.remove(stale)
+        if len(readd):
+            index.add_tracks(self.vectors[readd], [self.mbids[row] for row in readd])
+            rows = np.concatenate([rows, readd])
+        self._index_rows = rows
+        logger.info(f"Index matched to the store, {len(stale)} changed and {len(readd) - len(stale)} new tracks added")
+
+    def refresh(self) -> int:
+        """
+        Pick up tracks appended to the store since fit() without refitting.
+
+        New rows are normalized with the fitted statistics and inserted into the index.
+        Tracks whose features changed need a new fit().
+
+        Returns:
+            int: Number of tracks added.
+        """
+        appended = self.store.mbids_since(self._store_rows)
+        self._store_rows += len(appended)
+        new_mbids = list(dict.fromkeys(mbid for mbid in appended if mbid not in self._rows))
+        if not new_mbids:
+            return 0
+        matrix = self.store.matrix()
+        new_vectors = normalize(
+            np.asarray(matrix[[self.store.row_of(mbid) for mbid in new_mbids]]),
+            block_size=self.block_size,
+            stats=self.stats,
+        )
+
+        first = len(self.mbids)
+        self.vectors = np.concatenate([self.vectors, new_vectors])
+        for row, mbid in enumerate(new_mbids, start=first):
+            self.mbids.append(mbid)
+            self._rows[mbid] = row
+        if self.index is not None:
+            self.index.add_tracks(new_vectors, new_mbids)
+            self._index_rows = np.concatenate([self._index_rows, np.arange(first, first + len(new_mbids))])
+        logger.info(f"Recommender refreshed with {len(new_mbids)} new tracks")
+        return len(new_mbids)
+
+    def build_index(self, n_lists=None):
+        """
+        Build an IVF index over the fitted vectors and use it for every later query.
+
+        Args:
+            n_lists (int): Number of clusters, see IVFIndex.build().
+
+        Returns:
+            IVFIndex: The index, save() it to skip the build next time.
+        """
+        self.index = IVFIndex.build(self.vectors, n_lists=n_lists, mbids=self.mbids, stats=self.stats)
+        self._index_rows = np.arange(len(self.mbids), dtype=np.int64)
+        return self.index
+
+    def search(self, rows, k: int) -> tuple:
+        """
+        Top-k rows of vectors by similarity to the given rows, through the index if there is one.
+
+        Args:
+            rows (np.ndarray): Rows of vectors to search for.
+            k (int): Number of neighbours.
+
+        Returns:
+            tuple: (rows, scores), both (len(rows), k) sorted by descending score. Missing neighbours are -1.
+        """
+        queries = self.vectors[rows]
+        if self.index is None:
+            return top_k(self.vectors, queries, k, block_size=self.block_size)
+        ids, scores = self.index.search(queries, k=k, n_probe=self.n_probe)
+        return np.where(ids >= 0, self._index_rows[np.maximum(ids, 0)], -1), scores
+
+    def row_of(self, mbid: str):
+        """
+        Returns the row of an mbid in vectors, None if the track was not fitted.
+        """
+        return self._rows.get(mbid)
+
+    def resolve(self, mbid_or_track_id) -> str:
+        """
+        Turn a Tracks id into its mbid, mbids are returned as they are.
+
+        Raises:
+            InputError: If the id is unknown or no cursor was given.
+        """
+        if isinstance(mbid_or_track_id, str):
+            return mbid_or_track_id
+        if self.cursor is None:
+            raise InputError("A cursor is needed to look up tracks by id")
+        self.cursor.execute("SELECT mbid FROM Tracks WHERE id = %s;", (mbid_or_track_id, ))
+        result = self.cursor.fetchone()
+        if not result:
+            raise InputError(f"No track with id {mbid_or_track_id}")
+        return result["mbid"]
+
+    def recommend(self, mbid_or_track_id, k=10) -> list:
+        """
+        Most similar tracks to a track.
+
+        Args:
+            mbid_or_track_id (str | int): mbid or Tracks id of the seed track.
+            k (int): Number of recommendations.
+
+        Returns:
+            list: (mbid, score) tuples, best first, the seed track left out.
+
+        Raises:
+            InputError: If the track has no features.
+        """
+        return self.recommend_many([mbid_or_track_id], k=k)[0]
+
+    def recommend_many(self, seeds: list, k=10) -> list:
+        """
+        Recommendations for many seed tracks, scored together with one matrix product per block.
+
+        Args:
+            seeds (list): mbids or Tracks ids.
+            k (int): Number of recommendations per seed.
+
+        Returns:
+            list: One list of (mbid, score) tuples per seed.
+
+        Raises:
+            InputError: If a track has no features or k is not positive.
+        """
+        if not isinstance(k, int) or k < 1:
+            raise InputError("k must be a positive integer")
+
+        rows = []
+        for seed in seeds:
+            mbid = self.resolve(seed)
+            if mbid not in self._rows:
+                logger.error(f"No features for track {seed}")
+                raise InputError(f"No features for track {seed}")
+            rows.append(self._rows[mbid])
+
+        # One extra neighbour because the seed itself is always its own best match
+        indices, scores = self.search(rows, k + 1)
+        results = []
+        for row, seed_indices, seed_scores in zip(rows, indices, scores):
+            results.append([
+                (self.mbids[i], float(score))
+                for i, score in zip(seed_indices, seed_scores)
+                if i != row and i >= 0
+            ][:k])
+        return results
+
+def benchmark(tracks=1_000_000, dim=24, queries=1000, k=10, batch=64, block_size=65536, seed=0) -> dict:
+    """
+    Measure recommendation throughput on random vectors.
+
+    Args:
+        tracks (int): Catalog size.
+        dim (int): Features per track.
+        queries (int): Number of seed tracks.
+        k (int): Neighbours per query.
+        batch (int): Seeds scored together in the batched run.
+        block_size (int): Rows per matrix product.
+        seed (int): Random seed.
+
+    Returns:
+        dict: Latency of a single query and queries per second, single and batched.
+    """
+    rng = np.random.default_rng(seed)
+    vectors = normalize(rng.standard_normal((tracks, dim), dtype=np.float32), block_size=block_size)
+    seeds = rng.integers(0, tracks, size=queries)
+
+    start = time.perf_counter()
+    single = min(queries, 100)
+    for row in seeds[:single]:
+        top_k(vectors, vectors[row:row + 1], k, block_size=block_size)
+    single_seconds = (time.perf_counter() - start) / single
+
+    start = time.perf_counter()
+    for i in range(0, queries, batch):
+        top_k(vectors, vectors[seeds[i:i + batch]], k, block_size=block_size)
+    batched_seconds = time.perf_counter() - start
+
+    return {
+        "tracks": tracks,
+        "single_query_ms": single_seconds * 1000,
+        "single_qps": 1 / single_seconds,
+        "batched_qps": queries / batched_seconds,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the brute force recommender on random vectors")
+    parser.add_argument("--tracks", type=int, default=1_000_000, help="Catalog size")
+    parser.add_argument("--dim", type=int, default=24, help="Features per track")
+    parser.add_argument("--queries", type=int, default=1000, help="Number of queries")
+    parser.add_argument("-k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--batch", type=int, default=64, help="Queries scored together")
+    args = parser.parse_args()
+
+    results = benchmark(tracks=args.tracks, dim=args.dim, queries=args.queries, k=args.k, batch=args.batch)
+    print(f"{results['tracks']} tracks: {results['single_query_ms']:.1f} ms per query, "
+          f"{results['single_qps']:.0f} queries/sec single, {results['batched_qps']:.0f} queries/sec batched")
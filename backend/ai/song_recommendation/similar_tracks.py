@@ -0,0 +1,305 @@
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from pathlib import Path
+import argparse
+import logging
+import os
+import sys
+import time
+import mysql.connector
+import numpy as np
+
+base_path = Path(__file__).resolve().parent.parent.parent.parent
+env_path = base_path / 'env_files' / 'ai_db_detail.env'
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+load_dotenv(dotenv_path=env_path)
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+from utils.errors import DatabaseConnectionError
+from backend.ai.song_recommendation.recommender import Recommender
+
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "track_similar"
+# Normalization stats of the last rebuild, kept in the feature store directory
+STATS_FILE = "track_similar_stats.npy"
+
+NOW_QUERY = "SELECT NOW(6) AS now;"
+WATERMARK_QUERY = """
+                SELECT watermark FROM Job_watermarks
+                WHERE job = %s;
+                """
+SET_WATERMARK_QUERY = """
+                INSERT INTO Job_watermarks(job, watermark)
+                VALUES(%s, %s)
+                ON DUPLICATE KEY UPDATE watermark = VALUES(watermark);
+                """
+CHANGED_QUERY = """
+                SELECT mbid FROM Track_info
+                WHERE updated_at > %s;
+                """
+THRESHOLD_QUERY = """
+                SELECT mbid, MIN(score) AS threshold, COUNT(*) AS neighbours FROM Track_similar
+                GROUP BY mbid;
+                """
+INSERT_QUERY = """
+                INSERT INTO Track_similar(mbid, `rank`, neighbour_mbid, score)
+                VALUES(%s, %s, %s, %s)
+                """
+
+class SimilarTracksJob:
+    def __init__(self, db_manager, recommender=None, neighbours=50, chunk_size=1024, workers=None):
+        """
+        Precomputes the most similar tracks of every track into Track_similar, so serving them is
+        one indexed read (Async_track_similar_model.fetch_similar) instead of a similarity search.
+
+        Features come from the feature store, so run the AcousticBrainz fetcher with --feature-store
+        (or rebuild the store) before refreshing.
+
+        Args:
+            db_manager (DatabaseManager): ai_model database manager, every chunk is written on a pooled connection.
+            recommender (Recommender): Vectors and search to use, a default one is created if None.
+            neighbours (int): Neighbours stored per track.
+            chunk_size (int): Seed tracks scored and written together.
+            workers (int): Chunks scored in parallel. NumPy releases the GIL in the matrix products
+                        so threads use every core without copying the vectors. Defaults to the number of cores.
+
+        Raises:
+            InputError: If neighbours or chunk_size is not a positive integer.
+        """
+        for name, value in (("neighbours", neighbours), ("chunk_size", chunk_size)):
+            if not isinstance(value, int) or value < 1:
+                logger.error(f"{name} must be a positive integer")
+                raise InputError(f"{name} must be a positive integer")
+
+        self.db_manager = db_manager
+        self.recommender = recommender or Recommender()
+        self.neighbours = neighbours
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+        self.stats_file = self.recommender.store.path / STATS_FILE
+
+    def _neighbours(self, rows: np.ndarray) -> tuple:
+        """
+        Top neighbours of a chunk of rows, the row itself left out.
+        """
+        indices, scores = self.recommender.search(rows, self.neighbours + 1)
+        return rows, indices, scores
+
+    def compute(self, rows):
+        """
+        Score the rows chunk by chunk on a thread pool.
+
+        Args:
+            rows (np.ndarray): Rows of the recommender vectors to compute neighbours for.
+
+        Yields:
+            tuple: (rows, indices, scores) per chunk, indices and scores are (len(rows), neighbours + 1).
+        """
+        chunks = [rows[i:i + self.chunk_size] for i in range(0, len(rows), self.chunk_size)]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # A few chunks per worker at a time so results dont pile up while they are written
+            wave = self.workers * 2
+            for i in range(0, len(chunks), wave):
+                yield from executor.map(self._neighbours, chunks[i:i + wave])
+
+    def write(self, rows, indices, scores) -> int:
+        """
+        Replace the Track_similar rows of one chunk in a single transaction.
+
+        Returns:
+            int: Number of rows written.
+
+        Raises:
+            DatabaseConnectionError: If database error occurs.
+        """
+        mbids = self.recommender.mbids
+        values = []
+        for row, seed_indices, seed_scores in zip(rows, indices, scores):
+            neighbours = [(i, score) for i, score in zip(seed_indices, seed_scores) if i != row and i >= 0]
+            values.extend(
+                (mbids[row], rank, mbids[i], float(score))
+                for rank, (i, score) in enumerate(neighbours[:self.neighbours], start=1)
+            )
+
+        seeds = [mbids[row] for row in rows]
+        placeholders = ", ".join(["%s"] * len(seeds))
+        try:
+            with self.db_manager.connection() as cursor:
+                cursor.execute(f"DELETE FROM Track_similar WHERE mbid IN ({placeholders});", tuple(seeds))
+                if values:
+                    # mysql-connector sends this as multi-row INSERT statements
+                    cursor.executemany(INSERT_QUERY, values)
+        except mysql.connector.Error as err:
+            logger.error(f"Error writing similar tracks {err}")
+            raise DatabaseConnectionError(f"Error writing similar tracks {err}")
+        return len(values)
+
+    def run(self, rows) -> int:
+        """
+        Compute and write the neighbours of the given rows.
+
+        Returns:
+            int: Number of tracks written.
+        """
+        start = time.perf_counter()
+        done = 0
+        for chunk_rows, indices, scores in self.compute(rows):
+            self.write(chunk_rows, indices, scores)
+            done += len(chunk_rows)
+        logger.info(f"Similar tracks of {done} tracks written in {time.perf_counter() - start:.2f}s")
+        return done
+
+    def rebuild(self) -> int:
+        """
+        Recompute every track of the feature store.
+
+        Returns:
+            int: Number of tracks written.
+        """
+        now = self._fetch_one(NOW_QUERY)["now"]
+        self.recommender.fit()
+        done = self.run(np.arange(len(self.recommender.mbids)))
+        np.save(self.stats_file, np.stack(self.recommender.stats))
+        self._set_watermark(now)
+        return done
+
+    def refresh(self) -> int:
+        """
+        Recompute only the tracks whose neighbours can have changed since the last run:
+            - tracks inserted or updated in Track_info since the watermark,
+            - tracks that list one of them as a neighbour,
+            - tracks one of them is now closer to than their current last neighbour.
+
+        Vectors are normalized with the stats of the last rebuild so refreshed scores stay comparable
+        with the stored ones. Rebuild now and then to follow the drift of the catalog.
+        Falls back to rebuild() on the first run.
+
+        Returns:
+            int: Number of tracks written.
+        """
+        now = self._fetch_one(NOW_QUERY)["now"]
+        watermark = self._fetch_one(WATERMARK_QUERY, (JOB_NAME, ))
+        if watermark is None or not self.stats_file.exists():
+            logger.info("No earlier run, rebuilding every similar track")
+            return self.rebuild()
+
+        changed = {row["mbid"] for row in self._fetch_all(CHANGED_QUERY, (watermark["watermark"], ))}
+        if not changed:
+            self._set_watermark(now)
+            logger.info("No changed tracks since the last refresh")
+            return 0
+
+        mean, scale = np.load(self.stats_file)
+        recommender = self.recommender.fit(stats=(mean, scale))
+        changed_rows = np.fromiter(
+            (row for row in map(recommender.row_of, changed) if row is not None), dtype=np.int64
+        )
+
+        affected = set(changed_rows.tolist())
+        affected.update(row for row in map(recommender.row_of, self._listing(changed)) if row is not None)
+        affected.update(self._displaced(changed_rows).tolist())
+
+        done = self.run(np.fromiter(sorted(affected), dtype=np.int64))
+        self._set_watermark(now)
+        logger.info(f"{len(changed)} changed tracks, {done} tracks refreshed")
+        return done
+
+    def _listing(self, mbids: set) -> set:
+        """
+        Tracks that have one of the mbids as a stored neighbour.
+        """
+        listing = set()
+        mbids = list(mbids)
+        for i in range(0, len(mbids), self.chunk_size):
+            chunk = mbids[i:i + self.chunk_size]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            query = f"""
+                    SELECT DISTINCT mbid FROM Track_similar
+                    WHERE neighbour_mbid IN ({placeholders});
+                    """
+            listing.update(row["mbid"] for row in self._fetch_all(query, tuple(chunk)))
+        return listing
+
+    def _displaced(self, changed_rows: np.ndarray) -> np.ndarray:
+        """
+        Rows whose best score against a changed track beats their stored last neighbour.
+        Rows without a full neighbour list are always included.
+        """
+        recommender = self.recommender
+        thresholds = np.full(len(recommender.mbids), -np.inf, dtype=np.float32)
+        for row in self._fetch_all(THRESHOLD_QUERY):
+            index = recommender.row_of(row["mbid"])
+            if index is not None and row["neighbours"] >= self.neighbours:
+                thresholds[index] = row["threshold"]
+        if len(changed_rows) == 0:
+            return np.flatnonzero(thresholds == -np.inf)
+
+        changed_vectors = recommender.vectors[changed_rows]
+        best = np.empty(len(recommender.mbids), dtype=np.float32)
+        for start in range(0, len(best), recommender.block_size):
+            scores = recommender.vectors[start:start + recommender.block_size] @ changed_vectors.T
+            best[start:start + recommender.block_size] = scores.max(axis=1)
+        return np.flatnonzero(best > thresholds)
+
+    def _fetch_one(self, query: str, params=None):
+        rows = self._fetch_all(query, params)
+        return rows[0] if rows else None
+
+    def _fetch_all(self, query: str, params=None) -> list:
+        try:
+            with self.db_manager.connection(buffered=True) as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        except mysql.connector.Error as err:
+            logger.error(f"Error reading similar tracks state {err}")
+            raise DatabaseConnectionError(f"Error reading similar tracks state {err}")
+
+    def _set_watermark(self, watermark):
+        try:
+            with self.db_manager.connection() as cursor:
+                cursor.execute(SET_WATERMARK_QUERY, (JOB_NAME, watermark))
+        except mysql.connector.Error as err:
+            logger.error(f"Error writing the similar tracks watermark {err}")
+            raise DatabaseConnectionError(f"Error writing the similar tracks watermark {err}")
+
+if __name__ == "__main__":
+    from backend.database_manager.database_manager import DatabaseManager
+    from backend.ai.song_recommendation.feature_store import FeatureStore, DEFAULT_PATH
+
+    parser = argparse.ArgumentParser(description="Precompute the similar tracks table")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every track instead of only the changed ones")
+    parser.add_argument("--feature-store", default=str(DEFAULT_PATH), help="Directory of the feature store")
+    parser.add_argument("--neighbours", type=int, default=50, help="Neighbours stored per track")
+    parser.add_argument("--workers", type=int, default=None, help="Chunks scored in parallel")
+    args = parser.parse_args()
+
+    db_config = {
+        'host': os.getenv('DB_HOST'),
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD'),
+        'database': os.getenv('DB_NAME')
+    }
+    db_manager = DatabaseManager(db_config=db_config)
+    try:
+        job = SimilarTracksJob(db_manager, recommender=Recommender(store=FeatureStore(args.feature_store)),
+                               neighbours=args.neighbours, workers=args.workers)
+        if args.rebuild:
+            job.rebuild()
+        else:
+            job.refresh()
+    finally:
+        db_manager.close()
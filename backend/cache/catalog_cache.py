@@ -0,0 +1,33 @@
+from pathlib import Path
+import sys
+
+base_path = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(base_path))
+
+from backend.cache.local_cache import LocalCache
+
+# Catalog data (songs, albums, artists) changes rarely, so reads go through this cache.
+# Write paths in the models drop the affected keys, once right away and again after their transaction commits.
+_catalog_cache = LocalCache(maxsize=20000, ttl=300)
+
+def get_catalog_cache():
+    """
+    Returns the cache backend used by the catalog models.
+    """
+    return _catalog_cache
+
+def configure_catalog_cache(backend):
+    """
+    Swap the catalog cache backend, for example for a shared RedisCache.
+
+    Args:
+        backend: LocalCache, RedisCache or anything with the same get/set/delete/delete_prefix/clear/get_stats methods.
+    """
+    global _catalog_cache
+    _catalog_cache = backend
+
+def catalog_cache_stats() -> dict:
+    """
+    Returns the hit and miss counters of the catalog cache.
+    """
+    return get_catalog_cache().get_stats()
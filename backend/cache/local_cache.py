@@ -0,0 +1,126 @@
+from pathlib import Path
+# Define paths
+base_path = Path(__file__).resolve().parent.parent.parent
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+from collections import OrderedDict
+import logging
+import threading
+import time
+
+# Setup a logger
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Returned by get() on a miss so cached None values can be told apart
+MISSING = object()
+
+class LocalCache:
+    def __init__(self, maxsize=10000, ttl=300):
+        """
+        Thread safe in-process LRU cache with a time to live per entry.
+
+        Args:
+            maxsize (int): Maximum number of entries, the least recently used one is evicted first.
+            ttl (float): Seconds an entry stays valid.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def get(self, key):
+        """
+        Get a value from the cache.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            The cached value or MISSING.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return MISSING
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return MISSING
+
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value in the cache.
+
+        Args:
+            key (str): Cache key.
+            value: Value to be cached.
+            ttl (float): Seconds the entry stays valid, defaults to the cache ttl.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def delete(self, key):
+        """
+        Remove a key from the cache if it is there.
+
+        Args:
+            key (str): Cache key.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str):
+        """
+        Remove every key that starts with a prefix.
+
+        Args:
+            prefix (str): Key prefix. Example: "album_songs:"
+        """
+        with self._lock:
+            for key in [key for key in self._data if key.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self) -> dict:
+        """
+        Returns a snapshot of the hit and miss counters.
+
+        Returns:
+            dict: hits, misses, evictions, expired entries, current size and hit rate.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["size"] = len(self._data)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,178 @@
+from pathlib import Path
+# Define paths
+base_path = Path(__file__).resolve().parent.parent.parent
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+import fnmatch
+import logging
+import pickle
+import sys
+import threading
+import time
+
+try:
+    import redis
+except ImportError:  # redis is optional, FakeRedis stands in for local runs
+    redis = None
+
+# Setup a logger
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+sys.path.append(str(base_path))
+
+from backend.cache.local_cache import MISSING
+
+class FakeRedis:
+    def __init__(self):
+        """
+        In-process stand-in for the few redis commands RedisCache uses.
+
+        Lets the Redis backend run in development and in scripts without a Redis server.
+        """
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def scan_iter(self, match=None, count=None):
+        with self._lock:
+            keys = list(self._data.keys())
+        return [key for key in keys if match is None or fnmatch.fnmatchcase(key, match)]
+
+class RedisCache:
+    def __init__(self, client=None, namespace="music_app:", ttl=300):
+        """
+        Cache backend that stores entries in Redis so every process shares them.
+
+        Has the same interface as LocalCache. Values are pickled.
+
+        Args:
+            client: A redis.Redis client (or anything with get/set/delete/scan_iter).
+                        Defaults to an in-process FakeRedis.
+            namespace (str): Prefix put in front of every key.
+            ttl (float): Seconds an entry stays valid.
+        """
+        self.client = client if client is not None else FakeRedis()
+        self.namespace = namespace
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+
+    @classmethod
+    def from_url(cls, url: str, namespace="music_app:", ttl=300):
+        """
+        Connect to a Redis server.
+
+        Args:
+            url (str): Redis url. Example: "redis://localhost:6379/0"
+
+        Raises:
+            ImportError: If the redis package is not installed.
+        """
+        if redis is None:
+            raise ImportError("The redis package is required for RedisCache.from_url")
+        return cls(client=redis.Redis.from_url(url), namespace=namespace, ttl=ttl)
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def get(self, key):
+        """
+        Get a value from the cache.
+
+        Redis errors are logged and treated as a miss so the caller falls back to MySQL.
+
+        Returns:
+            The cached value or MISSING.
+        """
+        try:
+            raw = self.client.get(self.namespace + key)
+        except Exception as err:
+            logger.warning(f"Redis get failed: {err}")
+            self._count("errors")
+            return MISSING
+
+        if raw is None:
+            self._count("misses")
+            return MISSING
+
+        self._count("hits")
+        return pickle.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value in the cache.
+        """
+        seconds = self.ttl if ttl is None else ttl
+        try:
+            self.client.set(self.namespace + key, pickle.dumps(value), ex=max(1, int(seconds)))
+        except Exception as err:
+            logger.warning(f"Redis set failed: {err}")
+            self._count("errors")
+
+    def delete(self, key):
+        """
+        Remove a key from the cache.
+        """
+        try:
+            self.client.delete(self.namespace + key)
+        except Exception as err:
+            logger.warning(f"Redis delete failed: {err}")
+            self._count("errors")
+
+    def delete_prefix(self, prefix: str):
+        """
+        Remove every key that starts with a prefix.
+        """
+        try:
+            keys = list(self.client.scan_iter(match=self.namespace + prefix + "*", count=500))
+            if keys:
+                self.client.delete(*keys)
+        except Exception as err:
+            logger.warning(f"Redis delete by prefix failed: {err}")
+            self._count("errors")
+
+    def clear(self):
+        """
+        Remove every key in this cache's namespace.
+        """
+        self.delete_prefix("")
+
+    def get_stats(self) -> dict:
+        """
+        Returns a snapshot of the hit and miss counters.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
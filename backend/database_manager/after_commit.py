@@ -0,0 +1,82 @@
+from pathlib import Path
+# Define paths
+base_path = Path(__file__).resolve().parent.parent.parent
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+import logging
+import sys
+import threading
+
+# Setup a logger
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+sys.path.append(str(base_path))
+
+# Callbacks waiting for a commit, keyed by id() of the cursor that made the write. DatabaseManager
+# tracks its main cursor and every leased cursor and runs their list once that connection commits.
+_pending = {}
+_lock = threading.Lock()
+
+def track(cursor) -> list:
+    """
+    Start collecting the after_commit callbacks of writes made with a cursor.
+
+    Args:
+        cursor: Cursor handed out by DatabaseManager.
+
+    Returns:
+        list: Callbacks to pass to run_callbacks after the cursors connection committed.
+    """
+    callbacks = []
+    with _lock:
+        _pending[id(cursor)] = callbacks
+    return callbacks
+
+def untrack(cursor):
+    """
+    Stop collecting callbacks for a cursor, before it is closed and its id can be reused.
+    """
+    with _lock:
+        _pending.pop(id(cursor), None)
+
+def after_commit(cursor, callback):
+    """
+    Run a callback once the connection of the cursor that made a write commits. A rollback drops it.
+
+    Writes on cursors DatabaseManager doesnt track have no commit to wait for, the callback is not run.
+
+    Args:
+        cursor: Cursor the write was executed on.
+        callback (callable): Function called without arguments, e.g. a cache invalidation.
+    """
+    with _lock:
+        callbacks = _pending.get(id(cursor))
+    if callbacks is None:
+        logger.debug("after_commit on an untracked cursor, callback not run")
+        return
+    callbacks.append(callback)
+
+def run_callbacks(callbacks: list):
+    """
+    Run and clear committed callbacks. The commit already happened, so failures are only logged.
+
+    Args:
+        callbacks (list): List returned by track.
+    """
+    pending = list(callbacks)
+    callbacks.clear()
+    for callback in pending:
+        try:
+            callback()
+        except Exception as err:
+            logger.warning(f"Error running an after commit callback: {err}")
@@ -0,0 +1,183 @@
+from pathlib import Path
+# Define paths
+base_path = Path(__file__).resolve().parent.parent.parent
+env_path = base_path / 'env_files' / 'special_detail.env'
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+import aiomysql
+from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+import asyncio
+import os
+import logging
+import sys
+
+# Setup a logger
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+load_dotenv(dotenv_path=env_path)
+
+sys.path.append(str(base_path))
+
+from utils.errors import DatabaseConnectionError
+
+class AsyncDatabaseManager:
+    def __init__(self, db_config, minsize=1, maxsize=10):
+        """
+        Initialize the AsyncDatabaseManager class with database configuration.
+
+        The pool itself is created by connect(), which has to be awaited before the manager is used.
+
+        Args:
+            db_config (dict): A dictionary containing database connection details.
+                        Same keys as DatabaseManager: host, user, password, database.
+            minsize (int): Connections the pool keeps open.
+            maxsize (int): Maximum number of connections the pool will open.
+        """
+        self.db_config = db_config
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.pool = None
+
+    async def connect(self):
+        """
+        Create the aiomysql connection pool.
+
+        Raises:
+            DatabaseConnectionError: If connection to the database fails.
+        """
+        try:
+            self.pool = await aiomysql.create_pool(
+                host=self.db_config.get('host'),
+                port=int(self.db_config.get('port', 3306)),
+                user=self.db_config.get('user'),
+                password=self.db_config.get('password'),
+                db=self.db_config.get('database'),
+                minsize=self.minsize,
+                maxsize=self.maxsize,
+                autocommit=False
+            )
+            logger.info("Async connection pool created")
+        except aiomysql.Error as err:
+            logger.error(f"Error connecting to the database: {err}")
+            raise DatabaseConnectionError(f"Error connecting to the database: {err}")
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Lease a pooled connection and yield a dictionary cursor on it.
+
+        The transaction is committed when the block exits normally and rolled back if it raises.
+
+        Example:
+            async with db_manager.connection() as cursor:
+                await cursor.execute("SELECT mbid FROM Tracks;")
+
+        Yields:
+            aiomysql.DictCursor: A cursor bound to the leased connection.
+
+        Raises:
+            DatabaseConnectionError: If the pool was not created or the commit fails.
+        """
+        if self.pool is None:
+            raise DatabaseConnectionError("Async connection pool is not connected")
+
+        async with self.pool.acquire() as conn:
+            try:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    yield cursor
+                await conn.commit()
+            except aiomysql.Error as err:
+                await conn.rollback()
+                logger.error(f"Database connection failed {err}")
+                raise DatabaseConnectionError(f"Database connection failed {err}")
+            except BaseException:
+                await conn.rollback()
+                raise
+
+    async def fetchall(self, query: str, params=None) -> list:
+        """
+        Run a query on a leased connection and fetch every row.
+
+        Args:
+            query (str): SQL query.
+            params (tuple): Query parameters.
+
+        Returns:
+            list: List of row dictionaries.
+        """
+        async with self.connection() as cursor:
+            await cursor.execute(query, params)
+            return await cursor.fetchall()
+
+    async def execute(self, query: str, params=None) -> int:
+        """
+        Run a single statement in its own transaction.
+
+        Args:
+            query (str): SQL query.
+            params (tuple): Query parameters.
+
+        Returns:
+            int: Id generated by the statement, 0 if none was.
+        """
+        async with self.connection() as cursor:
+            await cursor.execute(query, params)
+            return cursor.lastrowid
+
+    async def executemany(self, query: str, params_seq: list) -> int:
+        """
+        Run a statement for every parameter tuple in one transaction.
+
+        Args:
+            query (str): SQL query.
+            params_seq (list): List of parameter tuples.
+
+        Returns:
+            int: Number of affected rows.
+        """
+        async with self.connection() as cursor:
+            await cursor.executemany(query, params_seq)
+            return cursor.rowcount
+
+    async def close(self):
+        """
+        Close the connection pool and wait for leased connections to be returned.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+            logger.info("Async connection pool closed")
+
+if __name__ == "__main__":
+
+    db_config = {
+    'host': os.getenv('DB_HOST'),
+    'user': os.getenv('DB_USER'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_NAME')
+}
+
+    async def main():
+        async with AsyncDatabaseManager(db_config=db_config) as db_manager:
+            print(await db_manager.fetchall("SELECT 1 AS ok;"))
+
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+from pathlib import Path
+# Define paths
+base_path = Path(__file__).resolve().parent.parent.parent
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+import logging
+import sys
+
+# Setup a logger
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+
+def rows_columns(rows: list) -> list:
+    """
+    Returns the columns shared by every row.
+
+    Args:
+        rows (list): List of dictionaries with column-value pairs.
+
+    Returns:
+        list: Column names in the order of the first row.
+
+    Raises:
+        InputError: If rows is empty or the rows dont all have the same columns.
+    """
+    if not rows:
+        logger.error("No rows to insert")
+        raise InputError("No rows to insert")
+
+    columns = list(rows[0].keys())
+    column_set = set(columns)
+    for row in rows:
+        if len(row) != len(columns) or set(row.keys()) != column_set:
+            logger.error("All rows must have the same columns")
+            raise InputError("All rows must have the same columns")
+    return columns
+
+def insert_in_chunks(cursor, table: str, columns: list, rows: list, chunk_size=500, db_manager=None) -> list:
+    """
+    Inserts rows with multi-row INSERT ... VALUES (...),(...) statements.
+
+    One statement is sent per chunk. The ids of a chunk are taken from lastrowid, which
+    InnoDB guarantees to be consecutive for a single multi-row insert with
+    innodb_autoinc_lock_mode 0 or 1. With lock mode 2 and concurrent inserts into the same
+    table, fetch the ids again by a natural key instead.
+
+    Args:
+        cursor (mysql.connector.cursor_cext.CMySQLCursorDict): The database cursor.
+        table (str): Table name. Example: "Songs"
+        columns (list): Columns to insert, already validated against the table.
+        rows (list): List of dictionaries with column-value pairs.
+        chunk_size (int): Rows per INSERT statement.
+        db_manager (DatabaseManager): If given, every chunk is committed through it.
+                        Otherwise committing is left to the caller like in the single row methods.
+
+    Returns:
+        list: Generated ids, in the same order as rows.
+
+    Raises:
+        InputError: If chunk_size is smaller than 1.
+        mysql.connector.Error: If a statement fails. Models translate this into DatabaseConnectionError.
+    """
+    if chunk_size < 1:
+        logger.error("chunk_size must be at least 1")
+        raise InputError("chunk_size must be at least 1")
+
+    input_columns_string = ", ".join(columns)
+    row_placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    inserted_ids = []
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        query = f"""
+                INSERT INTO `{table}`({input_columns_string})
+                VALUES {", ".join([row_placeholders] * len(chunk))};
+                """
+        values = tuple(row[col] for row in chunk for col in columns)
+        cursor.execute(query, values)
+
+        first_id = cursor.lastrowid
+        inserted_ids.extend(range(first_id, first_id + len(chunk)))
+
+        if db_manager is not None:
+            db_manager.commit()
+        logger.info(f"Inserted {len(chunk)} rows into {table} ({start + len(chunk)}/{len(rows)})")
+
+    return inserted_ids
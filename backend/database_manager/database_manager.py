@@ -7,9 +7,13 @@ log_file = log_dir / 'app.log'
 
 import mysql.connector
 from dotenv import load_dotenv
+from contextlib import contextmanager
 import os
 import logging
+import queue
 import sys
+import threading
+import time
 
 # Setup a logger
 logging.basicConfig(
@@ -29,14 +33,223 @@ sys.path.append(str(base_path))
 
 from utils.errors import InputError
 from utils.errors import DatabaseConnectionError
+from backend.database_manager.statement_registry import StatementRegistry, statement_stats
+from backend.database_manager.after_commit import track, untrack, run_callbacks
+
+class ConnectionPool:
+    def __init__(self, db_config, pool_size=5, pool_timeout=10, max_idle_time=300, max_statements=128):
+        """
+        Initialize a bounded pool of mysql connections.
+
+        Connections are opened lazily, up to pool_size, the first time they are needed.
+
+        Args:
+            db_config (dict): A dictionary containing database connection details.
+            pool_size (int): Maximum number of connections the pool will open.
+            pool_timeout (float): Seconds to wait for a free connection before giving up.
+            max_idle_time (float): Seconds a connection may sit unused before it is recycled.
+            max_statements (int): Maximum number of prepared statements kept per connection.
+        """
+        if pool_size < 1:
+            raise InputError("pool_size must be at least 1")
+
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.max_idle_time = max_idle_time
+        self.max_statements = max_statements
+
+        # Prepared statements live as long as their connection, keyed by id(connection)
+        self._statements = {}
+        # Idle connections are stored as (connection, time it was returned)
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+        self.stats = {
+            "leases": 0,
+            "waits": 0,
+            "exhausted": 0,
+            "created": 0,
+            "recycled": 0,
+            "failed_health_checks": 0,
+            "in_use": 0,
+        }
+
+    def _open_connection(self):
+        """
+        Open a new connection to the database.
+
+        Raises:
+            DatabaseConnectionError: If connection to the database fails.
+        """
+        try:
+            conn = mysql.connector.connect(**self.db_config)
+        except mysql.connector.Error as err:
+            with self._lock:
+                self._opened -= 1
+            logger.error(f"Error connecting to the database: {err}")
+            raise DatabaseConnectionError(f"Error connecting to the database: {err}")
+
+        with self._lock:
+            self.stats["created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        """
+        Close a connection and free its slot in the pool.
+        """
+        with self._lock:
+            self._statements.pop(id(conn), None)
+        try:
+            conn.close()
+        except mysql.connector.Error as err:
+            logger.warning(f"Error closing a pooled connection: {err}")
+        with self._lock:
+            self._opened -= 1
+
+    def _is_healthy(self, conn, idle_since):
+        """
+        Checks if an idle connection can be handed out again.
+
+        Connections that sat idle longer than max_idle_time are recycled, the rest get pinged.
+        """
+        if time.monotonic() - idle_since > self.max_idle_time:
+            with self._lock:
+                self.stats["recycled"] += 1
+            return False
+
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            with self._lock:
+                self.stats["failed_health_checks"] += 1
+            return False
+
+    def acquire(self):
+        """
+        Lease a connection from the pool.
+
+        Returns:
+            mysql.connector.connection_cext.CMySQLConnection: A healthy connection.
+
+        Raises:
+            DatabaseConnectionError: If the pool is closed or no connection frees up within pool_timeout.
+        """
+        if self._closed:
+            raise DatabaseConnectionError("Connection pool is closed")
+
+        deadline = time.monotonic() + self.pool_timeout
+        waited = False
+
+        while True:
+            try:
+                conn, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_open = self._opened < self.pool_size
+                    if can_open:
+                        self._opened += 1
+
+                if can_open:
+                    conn = self._open_connection()
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    with self._lock:
+                        self.stats["exhausted"] += 1
+                    logger.error(f"Connection pool exhausted after waiting {self.pool_timeout}s")
+                    raise DatabaseConnectionError(f"Connection pool exhausted after waiting {self.pool_timeout}s")
+
+                if not waited:
+                    waited = True
+                    with self._lock:
+                        self.stats["waits"] += 1
+                try:
+                    conn, idle_since = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+
+            if self._is_healthy(conn, idle_since):
+                break
+            self._discard(conn)
+
+        with self._lock:
+            self.stats["leases"] += 1
+            self.stats["in_use"] += 1
+        return conn
+
+    def release(self, conn):
+        """
+        Return a leased connection to the pool.
+
+        Args:
+            conn (mysql.connector.connection_cext.CMySQLConnection): Connection returned by acquire.
+        """
+        with self._lock:
+            self.stats["in_use"] -= 1
+
+        if self._closed:
+            self._discard(conn)
+            return
+
+        self._idle.put_nowait((conn, time.monotonic()))
+
+    def statements_for(self, conn) -> StatementRegistry:
+        """
+        Get the prepared statement registry of a leased connection.
+
+        Args:
+            conn (mysql.connector.connection_cext.CMySQLConnection): Connection returned by acquire.
+
+        Returns:
+            StatementRegistry: Registry that stays with the connection across leases.
+        """
+        with self._lock:
+            statements = self._statements.get(id(conn))
+            if statements is None:
+                statements = StatementRegistry(conn, max_statements=self.max_statements)
+                self._statements[id(conn)] = statements
+        return statements
+
+    def get_stats(self) -> dict:
+        """
+        Returns a snapshot of the pool metrics.
+
+        Returns:
+            dict: Counters for leases, waits, exhausted leases, created, recycled and unhealthy connections.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["open"] = self._opened
+        stats["idle"] = self._idle.qsize()
+        return stats
+
+    def close(self):
+        """
+        Close every idle connection. Leased connections are closed when they are released.
+        """
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
 
 class DatabaseManager:
-    def __init__(self, db_config):
+    def __init__(self, db_config, pool_size=5, pool_timeout=10, max_idle_time=300, max_statements=128):
         """
         Initialize the DatabaseManager class with database configuration.
 
         Args:
             db_config (dict): A dictionary containing database connection details.
+            pool_size (int): Maximum number of pooled connections served by connection().
+            pool_timeout (float): Seconds connection() waits for a free connection.
+            max_idle_time (float): Seconds a pooled connection may sit unused before it is recycled.
+            max_statements (int): Maximum number of prepared statements kept per connection.
         """
         try:
             self.conn = mysql.connector.connect(**db_config)
@@ -45,6 +258,130 @@ class DatabaseManager:
             logger.error(f"Error connecting to the database: {err}")
             raise DatabaseConnectionError(f"Error connecting to the database: {err}")
 
+        self.statements = StatementRegistry(self.conn, max_statements=max_statements)
+        # after_commit callbacks of writes on the main cursor, run by commit()
+        self.callbacks = track(self.cursor)
+        self.pool = ConnectionPool(db_config=db_config, pool_size=pool_size, pool_timeout=pool_timeout,
+                                   max_idle_time=max_idle_time, max_statements=max_statements)
+
+    @contextmanager
+    def connection(self, buffered=False):
+        """
+        Lease a pooled connection and yield a dictionary cursor on it.
+
+        The transaction is committed when the block exits normally and rolled back if it raises,
+        so the connection always goes back to the pool clean. Callbacks registered with after_commit
+        on the cursor, e.g. cache invalidations, run after the commit.
+
+        Example:
+            with db_manager.connection() as cursor:
+                song_model = Song_model(cursor)
+                song_model.add_new_song(song_info)
+
+        Args:
+            buffered (bool): If the cursor should buffer whole result sets.
+
+        Yields:
+            mysql.connector.cursor_cext.CMySQLCursorDict: A cursor bound to the leased connection.
+
+        Raises:
+            DatabaseConnectionError: If no connection can be leased or the commit fails.
+        """
+        with self._lease(buffered) as (cursor, _):
+            yield cursor
+
+    @contextmanager
+    def prepared_connection(self, buffered=False):
+        """
+        Same as connection() but also yields the prepared statement registry of the leased connection.
+
+        Example:
+            with db_manager.prepared_connection() as (cursor, statements):
+                song_model = Song_model(cursor, statements=statements)
+                song_model.add_new_song(song_info)
+
+        Args:
+            buffered (bool): If the cursor should buffer whole result sets.
+
+        Yields:
+            tuple: (cursor, StatementRegistry) bound to the leased connection.
+
+        Raises:
+            DatabaseConnectionError: If no connection can be leased or the commit fails.
+        """
+        with self._lease(buffered) as (cursor, statements):
+            yield cursor, statements
+
+    @contextmanager
+    def _lease(self, buffered):
+        """
+        Lease a connection, commit or roll it back and return it to the pool.
+        """
+        conn = self.pool.acquire()
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True, buffered=buffered)
+            callbacks = track(cursor)
+            yield cursor, self.pool.statements_for(conn)
+            self._drop_unread_result(conn)
+            try:
+                conn.commit()
+            except mysql.connector.Error as err:
+                logger.error(f"Error committing a pooled connection: {err}")
+                raise DatabaseConnectionError(f"Error committing a pooled connection: {err}")
+            run_callbacks(callbacks)
+        except BaseException:
+            try:
+                self._drop_unread_result(conn)
+                conn.rollback()
+            except mysql.connector.Error as err:
+                logger.error(f"Error rolling back a pooled connection: {err}")
+            raise
+        finally:
+            if cursor is not None:
+                untrack(cursor)
+                try:
+                    cursor.close()
+                except mysql.connector.Error as err:
+                    logger.warning(f"Error closing a pooled cursor: {err}")
+            self.pool.release(conn)
+
+    @staticmethod
+    def _drop_unread_result(conn):
+        """
+        Discard rows an unbuffered cursor left unread, e.g. when a streaming generator is closed early,
+        so the connection can be committed and reused.
+        """
+        if conn.unread_result:
+            conn.consume_results()
+
+    def pool_stats(self) -> dict:
+        """
+        Get the connection pool metrics.
+
+        Returns:
+            dict: Pool counters, see ConnectionPool.get_stats.
+        """
+        return self.pool.get_stats()
+
+    def statement_stats(self) -> dict:
+        """
+        Get the prepared statement cache metrics of every connection.
+
+        Returns:
+            dict: hits, prepares, evictions and hit_rate, see statement_registry.statement_stats.
+        """
+        return statement_stats()
+
+    def get_statements(self) -> StatementRegistry:
+        """
+        Get the prepared statement registry of the main connection.
+
+        Returns:
+            StatementRegistry: Registry bound to the same connection as get_cursor().
+        """
+        return self.statements
+
     def get_cursor(self):
         """
         Get the database cursor.
@@ -63,6 +400,7 @@ class DatabaseManager:
         """
         try:
             self.conn.rollback()
+            self.callbacks.clear()
             logger.info("Rollback succesful!")
         except mysql.connector.Error as err:
             logger.error(f"Error connecting to the database: {err}")
@@ -70,7 +408,7 @@ class DatabaseManager:
 
     def commit(self):
         """
-        Commit the current transaction.
+        Commit the current transaction and run the after_commit callbacks registered on get_cursor().
 
         Raises:
             DatabaseConnectionError: If there is an error committing the transaction.
@@ -82,13 +420,17 @@ class DatabaseManager:
         except mysql.connector.Error as err:
             logger.error(f"Error connecting to the database: {err}")
             raise DatabaseConnectionError(f"Error connecting to the database: {err}")
+        run_callbacks(self.callbacks)
 
     def close(self):
         """
-        Close the database connection and cursor.
+        Close the database connection, cursor and the connection pool.
         """
+        self.statements.close()
+        untrack(self.cursor)
         self.cursor.close()
         self.conn.close()
+        self.pool.close()
 
 if __name__ == "__main__":
 
@@ -0,0 +1,177 @@
+import os
+import argparse
+import json
+import logging
+import mysql.connector
+import statistics
+import time
+from dotenv import load_dotenv
+from pathlib import Path
+import sys
+
+base_path = Path(__file__).resolve().parent.parent.parent
+env_path = base_path / 'env_files' / 'special_detail.env'
+log_dir = base_path / 'logger'
+log_file =  log_dir / 'app.log'
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+from utils.errors import DatabaseConnectionError
+from backend.database_manager.database_manager import DatabaseManager
+
+# Setup a logger
+
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Connect to the env file and get system variables
+logger.info(f"Loading .env file from: {env_path}")
+load_dotenv(dotenv_path=env_path)
+
+# The view lookups migrations/001_composite_indexes.sql indexes, with values from seed_data.sql.
+BENCHMARK_QUERIES = {
+    "song_by_name": (
+        "SELECT * FROM non_deleted_songs WHERE name = %s;",
+        ("Come Together", )),
+    "songs_of_album": (
+        """SELECT al.name AS album_name, s.name AS song_name FROM non_deleted_albums AS al
+        JOIN non_deleted_songs AS s ON al.id = s.album_id
+        WHERE al.name = %s;""",
+        ("Abbey Road", )),
+    "albums_of_artist": (
+        """SELECT ar.name AS artist_name, al.name AS album_name FROM non_deleted_artists AS ar
+        JOIN non_deleted_albums AS al ON ar.id = al.artist_id
+        WHERE ar.name = %s;""",
+        ("The Beatles", )),
+    "playlists_of_user": (
+        """SELECT p.name AS Playlists FROM non_deleted_playlists AS p
+        JOIN non_deleted_users AS u ON u.id = p.creator_id
+        WHERE u.username = %s;""",
+        ("john_doe", )),
+    "song_by_id": (
+        "SELECT * FROM non_deleted_songs WHERE id = %s;",
+        (1, )),
+    "playlists_of_user_by_id": (
+        "SELECT name AS Playlists FROM non_deleted_playlists WHERE creator_id = %s;",
+        (1, )),
+}
+
+# EXPLAIN columns kept per table of a plan
+PLAN_COLUMNS = ("table", "type", "key", "key_len", "rows", "filtered", "Extra")
+
+def explain(cursor, query: str, params: tuple) -> list:
+    """
+    Get the plan MySQL picks for a query.
+
+    Returns:
+        list: One dict of PLAN_COLUMNS per table the plan reads.
+    """
+    cursor.execute(f"EXPLAIN {query}", params)
+    return [{column: row.get(column) for column in PLAN_COLUMNS} for row in cursor.fetchall()]
+
+def time_query(cursor, query: str, params: tuple, runs: int) -> dict:
+    """
+    Run a query runs times and time it, rows included.
+
+    Returns:
+        dict: median_ms, min_ms and max_ms over the runs and the number of rows returned.
+    """
+    timings = []
+    rows = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        cursor.execute(query, params)
+        rows = len(cursor.fetchall())
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(timings), 3), "min_ms": round(min(timings), 3),
+            "max_ms": round(max(timings), 3), "rows": rows}
+
+def run_benchmark(db_manager: DatabaseManager, runs=50) -> dict:
+    """
+    Record the plan and the timings of every benchmark query against the configured database.
+
+    Args:
+        db_manager (DatabaseManager): Manager connected to the database to measure.
+        runs (int): Executions timed per query.
+
+    Returns:
+        dict: Query name -> {"plan": [...], "timing": {...}}.
+
+    Raises:
+        InputError: If runs is not a positive integer.
+        DatabaseConnectionError: If database connection error occurs.
+    """
+    if isinstance(runs, bool) or not isinstance(runs, int) or runs < 1:
+        raise InputError("runs must be a positive integer")
+
+    results = {}
+    try:
+        with db_manager.connection(buffered=True) as cursor:
+            for name, (query, params) in BENCHMARK_QUERIES.items():
+                # One untimed run so every query is measured with a warm buffer pool
+                cursor.execute(query, params)
+                cursor.fetchall()
+                results[name] = {"plan": explain(cursor, query, params),
+                                 "timing": time_query(cursor, query, params, runs)}
+                logger.info(f"{name}: {results[name]['timing']}")
+    except mysql.connector.Error as err:
+        logger.error(f"Error running the index benchmark {err}")
+        raise DatabaseConnectionError(f"Error running the index benchmark {err}")
+    return results
+
+def compare(before: dict, after: dict) -> list:
+    """
+    Put two recorded runs side by side, e.g. before and after a migration.
+
+    Returns:
+        list: One line per query and table with access type, key and rows estimate, then the median timings.
+    """
+    lines = []
+    for name in [name for name in before if name in after]:
+        lines.append(f"{name}: median {before[name]['timing']['median_ms']} ms -> "
+                     f"{after[name]['timing']['median_ms']} ms")
+        for old, new in zip(before[name]["plan"], after[name]["plan"]):
+            lines.append(f"  {old['table']}: {old['type']}/{old['key']}/{old['rows']} rows -> "
+                         f"{new['type']}/{new['key']}/{new['rows']} rows")
+    return lines
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record EXPLAIN plans and timings of the view lookups")
+    parser.add_argument("--runs", type=int, default=50, help="Executions timed per query")
+    parser.add_argument("--out", type=Path, help="Write the recorded run to this json file")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("BEFORE", "AFTER"),
+                        help="Compare two recorded runs instead of measuring")
+    args = parser.parse_args()
+
+    if args.compare:
+        before, after = (json.loads(path.read_text()) for path in args.compare)
+        print("\n".join(compare(before, after)))
+        sys.exit(0)
+
+    db_config = {
+    'host': os.getenv('DB_HOST'),
+    'user': os.getenv('DB_USER'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_NAME')
+    }
+
+    db_manager = DatabaseManager(db_config=db_config)
+    try:
+        results = run_benchmark(db_manager, runs=args.runs)
+    finally:
+        db_manager.close()
+
+    output = json.dumps(results, indent=2, default=str)
+    if args.out:
+        args.out.write_text(output)
+    else:
+        print(output)
@@ -0,0 +1,109 @@
+from pathlib import Path
+# Define paths
+base_path = Path(__file__).resolve().parent.parent.parent
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+import logging
+import sys
+
+# Setup a logger
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+
+MAX_PAGE_SIZE = 1000
+
+def check_page_args(after_id: int, limit: int):
+    """
+    Validates keyset pagination arguments.
+
+    Raises:
+        InputError: If after_id is negative or limit is not between 1 and MAX_PAGE_SIZE.
+    """
+    if not isinstance(after_id, int) or after_id < 0:
+        logger.error("after_id must be a non negative integer")
+        raise InputError("after_id must be a non negative integer")
+
+    if not isinstance(limit, int) or not 1 <= limit <= MAX_PAGE_SIZE:
+        logger.error(f"limit must be an integer between 1 and {MAX_PAGE_SIZE}")
+        raise InputError(f"limit must be an integer between 1 and {MAX_PAGE_SIZE}")
+
+def fetch_page(cursor, view: str, columns: str, after_id=0, limit=100) -> list:
+    """
+    Fetch one page of rows ordered by id, starting after a given id.
+
+    Uses WHERE id > %s ORDER BY id LIMIT %s so every page is a primary key range scan,
+    no matter how deep into the table it is.
+
+    Args:
+        cursor (mysql.connector.cursor_cext.CMySQLCursorDict): The database cursor.
+        view (str): Table or view to read. Example: "non_deleted_songs"
+        columns (str): Columns to select, id has to be one of them. Example: "id, name"
+        after_id (int): Last id of the previous page, 0 for the first page.
+        limit (int): Page size.
+
+    Returns:
+        list: Row dictionaries, empty when there are no more rows.
+
+    Raises:
+        InputError: If the pagination arguments are invalid.
+        mysql.connector.Error: If the query fails. Models translate this into DatabaseConnectionError.
+    """
+    check_page_args(after_id, limit)
+
+    query = f"""
+            SELECT {columns} FROM {view}
+            WHERE id > %s
+            ORDER BY id
+            LIMIT %s;
+            """
+    cursor.execute(query, (after_id, limit))
+    return cursor.fetchall()
+
+def stream_rows(db_manager, view: str, columns: str, batch_size=1000):
+    """
+    Stream every row of a table or view with constant memory.
+
+    Runs one query on a connection leased from the pool with an unbuffered cursor, so rows are
+    read from the server with fetchmany as the caller consumes them. The shared model cursor is
+    left free while the stream is open.
+
+    Args:
+        db_manager (DatabaseManager): Database manager to lease the connection from.
+        view (str): Table or view to read. Example: "non_deleted_songs"
+        columns (str): Columns to select. Example: "id, name"
+        batch_size (int): Rows fetched from the server per round trip.
+
+    Yields:
+        dict: One row at a time, ordered by id.
+    """
+    if not isinstance(batch_size, int) or batch_size < 1:
+        logger.error("batch_size must be a positive integer")
+        raise InputError("batch_size must be a positive integer")
+
+    query = f"""
+            SELECT {columns} FROM {view}
+            ORDER BY id;
+            """
+    with db_manager.connection(buffered=False) as cursor:
+        cursor.execute(query)
+        streamed = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            streamed += len(rows)
+            yield from rows
+        logger.info(f"Streamed {streamed} rows from {view}")
@@ -0,0 +1,137 @@
+from pathlib import Path
+# Define paths
+base_path = Path(__file__).resolve().parent.parent.parent
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+import mysql.connector
+import logging
+import sys
+import threading
+
+# Setup a logger
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+from utils.errors import DatabaseConnectionError
+
+# Same column names SHOW COLUMNS returns so models can keep using row["Field"]
+COLUMNS_QUERY = """
+                SELECT TABLE_NAME AS `Table`, COLUMN_NAME AS `Field`, COLUMN_TYPE AS `Type`,
+                       IS_NULLABLE AS `Null`, COLUMN_KEY AS `Key`, COLUMN_DEFAULT AS `Default`, EXTRA AS `Extra`
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                ORDER BY TABLE_NAME, ORDINAL_POSITION;
+                """
+
+class SchemaRegistry:
+    def __init__(self):
+        """
+        Process-wide cache of table columns.
+
+        The first lookup reads every table of the current database from information_schema
+        in one query, later lookups are served from memory. Call invalidate() after a migration.
+        """
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _store(self, rows: list):
+        """
+        Group information_schema rows by table and store them.
+        """
+        tables = {}
+        for row in rows:
+            table = row.pop("Table")
+            tables.setdefault(table, []).append(row)
+
+        with self._lock:
+            self._tables.update(tables)
+        logger.info(f"Schema registry loaded {len(tables)} tables")
+
+    def _lookup(self, table: str):
+        with self._lock:
+            return self._tables.get(table)
+
+    def get_columns(self, cursor, table: str) -> list:
+        """
+        Get the columns of a table.
+
+        Args:
+            cursor (mysql.connector.cursor_cext.CMySQLCursorDict): The database cursor, only used on a cache miss.
+            table (str): Table name. Example: "Songs"
+
+        Returns:
+            list: Rows shaped like SHOW COLUMNS output.
+                Example: [{'Field': 'id', 'Type': 'int', 'Null': 'NO', 'Key': 'PRI', 'Default': None, 'Extra': 'auto_increment'}, ...]
+
+        Raises:
+            InputError: If the table does not exist.
+            DatabaseConnectionError: If the database connection fails.
+        """
+        columns = self._lookup(table)
+        if columns is not None:
+            return columns
+
+        try:
+            cursor.execute(COLUMNS_QUERY)
+            self._store(cursor.fetchall())
+        except mysql.connector.Error as err:
+            logger.error(f"Error loading the table schema: {err}")
+            raise DatabaseConnectionError(f"Error loading the table schema: {err}")
+
+        return self._checked_lookup(table)
+
+    async def get_columns_async(self, db_manager, table: str) -> list:
+        """
+        Async variant of get_columns for AsyncDatabaseManager users.
+
+        Args:
+            db_manager (AsyncDatabaseManager): Connected async database manager, only used on a cache miss.
+            table (str): Table name. Example: "Track_info"
+
+        Returns:
+            list: Rows shaped like SHOW COLUMNS output.
+
+        Raises:
+            InputError: If the table does not exist.
+        """
+        columns = self._lookup(table)
+        if columns is not None:
+            return columns
+
+        self._store(await db_manager.fetchall(COLUMNS_QUERY))
+        return self._checked_lookup(table)
+
+    def _checked_lookup(self, table: str) -> list:
+        columns = self._lookup(table)
+        if columns is None:
+            logger.error(f"Table {table} does not exist")
+            raise InputError(f"Table {table} does not exist")
+        return columns
+
+    def invalidate(self, table: str = None):
+        """
+        Drop cached columns so the next lookup reads information_schema again.
+
+        Args:
+            table (str): Table to drop. Drops every table if None.
+        """
+        with self._lock:
+            if table is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(table, None)
+        logger.info(f"Schema registry invalidated: {table or 'all tables'}")
+
+schema_registry = SchemaRegistry()
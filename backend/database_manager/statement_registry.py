@@ -0,0 +1,147 @@
+from pathlib import Path
+# Define paths
+base_path = Path(__file__).resolve().parent.parent.parent
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+from collections import OrderedDict
+import mysql.connector
+import logging
+import sys
+import threading
+
+# Setup a logger
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+from utils.errors import DatabaseConnectionError
+
+# Totals over every registry of the process, per connection numbers live on each registry
+_totals = {"hits": 0, "prepares": 0, "evictions": 0}
+_totals_lock = threading.Lock()
+
+def _count(counter: str):
+    with _totals_lock:
+        _totals[counter] += 1
+
+def statement_stats() -> dict:
+    """
+    Returns the prepare cache counters summed over every connection of the process.
+
+    Returns:
+        dict: hits, prepares, evictions and hit_rate.
+    """
+    with _totals_lock:
+        stats = dict(_totals)
+    lookups = stats["hits"] + stats["prepares"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+class StatementRegistry:
+    def __init__(self, conn, max_statements=128):
+        """
+        Server-side prepared statements of one connection.
+
+        Every distinct key, e.g. ("Songs", "insert", ("name", "album_id")), gets its own prepared cursor.
+        MySQL parses the statement the first time the key is executed and later executions only send the parameters.
+        The least recently used statements are closed once max_statements is reached.
+
+        Args:
+            conn (mysql.connector.connection_cext.CMySQLConnection): Connection the statements are prepared on.
+            max_statements (int): Maximum number of statements kept prepared on the server.
+        """
+        if max_statements < 1:
+            raise InputError("max_statements must be at least 1")
+
+        self.conn = conn
+        self.max_statements = max_statements
+        # key -> (prepared cursor, sql it was prepared with)
+        self._statements = OrderedDict()
+        self.stats = {"hits": 0, "prepares": 0, "evictions": 0}
+
+    def execute(self, key: tuple, query: str, values: tuple):
+        """
+        Execute a statement, preparing it if the key is seen for the first time on this connection.
+
+        The key has to identify the SQL text, on a hit the statement prepared for the key is reused and query is ignored.
+
+        Args:
+            key (tuple): Table, operation and columns identifying the statement.
+            query (str): SQL with %s placeholders.
+            values (tuple): Parameters of the statement.
+
+        Returns:
+            mysql.connector.cursor_cext.CMySQLCursorPrepared: The cursor the statement ran on, e.g. for lastrowid or rowcount.
+
+        Raises:
+            DatabaseConnectionError: If the statement can not be prepared.
+        """
+        entry = self._statements.get(key)
+        if entry is not None:
+            self._statements.move_to_end(key)
+            self.stats["hits"] += 1
+            _count("hits")
+        else:
+            try:
+                cursor = self.conn.cursor(prepared=True)
+            except mysql.connector.Error as err:
+                logger.error(f"Error preparing a statement: {err}")
+                raise DatabaseConnectionError(f"Error preparing a statement: {err}")
+            entry = (cursor, query)
+            self._statements[key] = entry
+            self.stats["prepares"] += 1
+            _count("prepares")
+            if len(self._statements) > self.max_statements:
+                self._evict()
+
+        cursor, prepared_query = entry
+        # Passing the same query object lets the cursor skip the prepare round trip
+        cursor.execute(prepared_query, values)
+        return cursor
+
+    def _evict(self):
+        """
+        Close the least recently used statement.
+        """
+        _, (cursor, _) = self._statements.popitem(last=False)
+        self.stats["evictions"] += 1
+        _count("evictions")
+        try:
+            cursor.close()
+        except mysql.connector.Error as err:
+            logger.warning(f"Error closing a prepared statement: {err}")
+
+    def get_stats(self) -> dict:
+        """
+        Returns the prepare cache counters of this connection.
+
+        Returns:
+            dict: hits, prepares, evictions, size and hit_rate.
+        """
+        stats = dict(self.stats)
+        stats["size"] = len(self._statements)
+        lookups = stats["hits"] + stats["prepares"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        """
+        Close every prepared statement of the connection.
+        """
+        while self._statements:
+            _, (cursor, _) = self._statements.popitem()
+            try:
+                cursor.close()
+            except mysql.connector.Error as err:
+                logger.warning(f"Error closing a prepared statement: {err}")
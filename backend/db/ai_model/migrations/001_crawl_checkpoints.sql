@@ -0,0 +1,24 @@
+-- Makes the crawlers resumable and their inserts idempotent.
+-- Run once against an existing ai_model database, fresh databases get the same from schema.sql.
+-- After running it call schema_registry.invalidate() (or restart the crawlers).
+
+-- Drop duplicate mbids, keeping the first row inserted for each
+DELETE t1 FROM Tracks AS t1
+JOIN Tracks AS t2 ON t1.mbid = t2.mbid AND t1.id > t2.id;
+
+DELETE t1 FROM Track_info AS t1
+JOIN Track_info AS t2 ON t1.mbid = t2.mbid AND t1.id > t2.id;
+
+ALTER TABLE Tracks
+ADD UNIQUE KEY tracks_mbid (mbid);
+
+ALTER TABLE Track_info
+ADD UNIQUE KEY track_info_mbid (mbid);
+
+CREATE TABLE IF NOT EXISTS `Crawl_checkpoints` (
+    source VARCHAR(50) NOT NULL,
+    scope VARCHAR(300) NOT NULL DEFAULT '',
+    item VARCHAR(300) NOT NULL,
+    completed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, scope, item)
+);
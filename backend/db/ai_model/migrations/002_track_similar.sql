@@ -0,0 +1,22 @@
+-- Precomputed similar tracks, see backend/ai/song_recommendation/similar_tracks.py.
+-- Run once against an existing ai_model database, fresh databases get the same from schema.sql.
+-- After running it call schema_registry.invalidate() (or restart the crawlers).
+
+-- Existing rows get the migration time, the first refresh then recomputes every track
+ALTER TABLE Track_info
+ADD COLUMN updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+ADD KEY track_info_updated_at (updated_at);
+
+CREATE TABLE IF NOT EXISTS `Track_similar` (
+    mbid VARCHAR(100) NOT NULL,
+    `rank` SMALLINT NOT NULL,
+    neighbour_mbid VARCHAR(100) NOT NULL,
+    score FLOAT NOT NULL,
+    PRIMARY KEY (mbid, `rank`),
+    KEY track_similar_neighbour (neighbour_mbid)
+);
+
+CREATE TABLE IF NOT EXISTS `Job_watermarks` (
+    job VARCHAR(100) NOT NULL PRIMARY KEY,
+    watermark DATETIME(6) NOT NULL
+);
@@ -3,12 +3,42 @@ CREATE TABLE `Tracks`(
     mbid VARCHAR(100) NOT NULL,
     name VARCHAR(300) NOT NULL,
     artist_name VARCHAR(300) NOT NULL,
-    genre VARCHAR(100) NOT NULL
+    genre VARCHAR(100) NOT NULL,
+    UNIQUE KEY tracks_mbid (mbid)
 );
 
 CREATE TABLE `Track_info` (
     id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
     mbid VARCHAR(100) NOT NULL,
     low_level JSON NOT NULL,
-    high_level JSON NOT NULL
-);
\ No newline at end of file
+    high_level JSON NOT NULL,
+    -- Set on insert and whenever the features change, drives the incremental Track_similar refresh
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    UNIQUE KEY track_info_mbid (mbid),
+    KEY track_info_updated_at (updated_at)
+);
+
+-- Finished work items of the crawlers, e.g. source lastfm, scope = tag, item = artist
+CREATE TABLE `Crawl_checkpoints` (
+    source VARCHAR(50) NOT NULL,
+    scope VARCHAR(300) NOT NULL DEFAULT '',
+    item VARCHAR(300) NOT NULL,
+    completed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, scope, item)
+);
+
+-- Precomputed top-N most similar tracks of every track, rank 1 is the closest
+CREATE TABLE `Track_similar` (
+    mbid VARCHAR(100) NOT NULL,
+    `rank` SMALLINT NOT NULL,
+    neighbour_mbid VARCHAR(100) NOT NULL,
+    score FLOAT NOT NULL,
+    PRIMARY KEY (mbid, `rank`),
+    KEY track_similar_neighbour (neighbour_mbid)
+);
+
+-- Point up to which a batch job has processed its input, e.g. Track_info.updated_at for similar_tracks
+CREATE TABLE `Job_watermarks` (
+    job VARCHAR(100) NOT NULL PRIMARY KEY,
+    watermark DATETIME(6) NOT NULL
+);
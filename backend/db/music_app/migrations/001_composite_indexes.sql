@@ -0,0 +1,21 @@
+-- Composite indexes for the non_deleted_* views.
+-- Every view filters on deleted = 0, so the lookup column is paired with the deleted flag
+-- and the optimizer can resolve both predicates from one index (ref access instead of a scan).
+-- Run once against an existing database, fresh databases get them from schema.sql.
+-- After running it call schema_registry.invalidate() (or restart the app) so cached column metadata is refreshed.
+-- It runs against whichever database it is piped into, normally the one DB_NAME points the app at:
+--   mysql "$DB_NAME" < 001_composite_indexes.sql
+
+-- Name lookups through the views
+CREATE INDEX songs_deleted_name ON Songs(deleted, name);
+CREATE INDEX albums_deleted_name ON Albums(deleted, name);
+CREATE INDEX artists_deleted_name ON Artists(deleted, name);
+CREATE INDEX playlists_deleted_name ON Playlists(deleted, name);
+CREATE INDEX users_deleted_username ON Users(deleted, username);
+CREATE INDEX subscriptions_deleted_plan_name ON Subscription_plan_info(deleted, plan_name);
+
+-- Foreign key joins through the views (album -> songs, artist -> songs/albums, user -> playlists)
+CREATE INDEX songs_album_deleted ON Songs(album_id, deleted);
+CREATE INDEX songs_artist_deleted ON Songs(artist_id, deleted);
+CREATE INDEX albums_artist_deleted ON Albums(artist_id, deleted);
+CREATE INDEX playlists_creator_deleted ON Playlists(creator_id, deleted);
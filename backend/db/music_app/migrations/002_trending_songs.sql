@@ -0,0 +1,42 @@
+-- Rollup and result tables behind Song_model.fetch_trending_songs.
+-- Run once against an existing database, fresh databases get the same from schema.sql.
+-- Then schedule `python backend/models/trending_model.py` (e.g. every 5 minutes) to keep them current.
+-- Usage: mysql "$DB_NAME" < 002_trending_songs.sql
+
+CREATE TABLE IF NOT EXISTS `Song_activity_hourly` (
+    bucket DATETIME NOT NULL,
+    song_id INT NOT NULL,
+    likes INT NOT NULL DEFAULT 0,
+    playlist_adds INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, song_id)
+);
+
+CREATE TABLE IF NOT EXISTS `Song_activity_daily` (
+    bucket DATE NOT NULL,
+    song_id INT NOT NULL,
+    likes INT NOT NULL DEFAULT 0,
+    playlist_adds INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, song_id)
+);
+
+CREATE TABLE IF NOT EXISTS `Trending_songs` (
+    window_name VARCHAR(20) NOT NULL,
+    genre VARCHAR(100) NOT NULL,
+    `rank` SMALLINT NOT NULL,
+    song_id INT NOT NULL,
+    score DOUBLE NOT NULL,
+    PRIMARY KEY (window_name, genre, `rank`)
+);
+
+CREATE TABLE IF NOT EXISTS `Job_watermarks` (
+    job VARCHAR(100) NOT NULL PRIMARY KEY,
+    watermark DATETIME NOT NULL
+);
+
+-- The first roll up takes every existing event
+INSERT IGNORE INTO Job_watermarks(job, watermark)
+VALUES('song_activity_rollup', '1970-01-01 00:00:01');
+
+-- The roll up reads the events added since the watermark
+CREATE INDEX likes_date ON Likes(date);
+CREATE INDEX playlist_tracks_date ON Playlist_tracks(date);
@@ -0,0 +1,15 @@
+-- Ordered, paginated playlist reads (Playlist_model.fetch_playlist_tracks_page).
+-- Run once against an existing database, fresh databases get the index from schema.sql.
+-- Usage: mysql "$DB_NAME" < 003_playlist_order.sql
+
+-- Rows added before add_to_playlist set the order have NULL, number every playlist 1..n
+-- keeping the existing order first and the insertion date after it
+UPDATE Playlist_tracks AS plt
+JOIN (
+    SELECT playlists_id, song_id,
+        ROW_NUMBER() OVER (PARTITION BY playlists_id ORDER BY `order` IS NULL, `order`, date, song_id) AS position
+    FROM Playlist_tracks
+) AS ranked ON ranked.playlists_id = plt.playlists_id AND ranked.song_id = plt.song_id
+SET plt.`order` = ranked.position;
+
+CREATE INDEX playlist_tracks_order ON Playlist_tracks(playlists_id, `order`);
@@ -0,0 +1,12 @@
+-- Spread existing playlist order keys 1024 (ORDER_GAP in playlist_model.py) apart,
+-- so Playlist_model.move_in_playlist can move a track by updating only its own row.
+-- Run once after 003_playlist_order.sql.
+-- Usage: mysql "$DB_NAME" < 004_playlist_order_gaps.sql
+
+UPDATE Playlist_tracks AS plt
+JOIN (
+    SELECT playlists_id, song_id,
+        ROW_NUMBER() OVER (PARTITION BY playlists_id ORDER BY `order`, song_id) AS position
+    FROM Playlist_tracks
+) AS ranked ON ranked.playlists_id = plt.playlists_id AND ranked.song_id = plt.song_id
+SET plt.`order` = ranked.position * 1024;
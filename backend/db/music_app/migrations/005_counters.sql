@@ -0,0 +1,40 @@
+-- Like, follower and playlist size counters (backend/models/counter_model.py).
+-- Run once against an existing database, fresh databases get the tables from schema.sql.
+-- The backfill below is a one off, afterwards `python backend/models/counter_model.py` corrects drift in chunks.
+-- Usage: mysql "$DB_NAME" < 005_counters.sql
+
+CREATE TABLE IF NOT EXISTS `Song_like_counts` (
+    song_id INT NOT NULL PRIMARY KEY,
+    like_count INT NOT NULL DEFAULT 0,
+    KEY song_like_counts_top (like_count)
+);
+
+CREATE TABLE IF NOT EXISTS `Artist_follower_counts` (
+    artist_id INT NOT NULL PRIMARY KEY,
+    follower_count INT NOT NULL DEFAULT 0,
+    KEY artist_follower_counts_top (follower_count)
+);
+
+CREATE TABLE IF NOT EXISTS `Playlist_track_counts` (
+    playlists_id INT NOT NULL PRIMARY KEY,
+    track_count INT NOT NULL DEFAULT 0,
+    KEY playlist_track_counts_top (track_count)
+);
+
+INSERT INTO Song_like_counts(song_id, like_count)
+SELECT song_id, COUNT(*) FROM Likes
+WHERE action = 0
+GROUP BY song_id
+ON DUPLICATE KEY UPDATE like_count = VALUES(like_count);
+
+INSERT INTO Artist_follower_counts(artist_id, follower_count)
+SELECT artist_id, COUNT(*) FROM Artists_followers
+WHERE action = 0
+GROUP BY artist_id
+ON DUPLICATE KEY UPDATE follower_count = VALUES(follower_count);
+
+INSERT INTO Playlist_track_counts(playlists_id, track_count)
+SELECT playlists_id, COUNT(*) FROM Playlist_tracks
+WHERE action = 0
+GROUP BY playlists_id
+ON DUPLICATE KEY UPDATE track_count = VALUES(track_count);
@@ -0,0 +1,71 @@
+-- Replace the cascading soft delete triggers, their cascade moved to backend/models/cascade_model.py.
+-- The old triggers updated their own table, which MySQL rejects, and before_playlist_delete referenced
+-- a table that doesnt exist. The new ones only stamp date_deletion. before_user_delete deleted likes
+-- and follows without updating Song_like_counts and Artist_follower_counts, the cascade does both now.
+-- Run once, then schedule `python backend/models/cascade_model.py` (e.g. every 5 minutes) and run
+-- `python backend/models/cascade_model.py --full` once to cascade rows deleted before.
+-- Usage: mysql "$DB_NAME" < 006_cascade_jobs.sql
+
+DROP TRIGGER IF EXISTS before_user_delete;
+DROP TRIGGER IF EXISTS before_artist_delete;
+DROP TRIGGER IF EXISTS before_album_delete;
+DROP TRIGGER IF EXISTS before_song_delete;
+DROP TRIGGER IF EXISTS before_playlist_delete;
+
+DELIMITER //
+CREATE TRIGGER before_user_delete
+BEFORE UPDATE ON `Users`
+FOR EACH ROW
+BEGIN
+    IF NEW.deleted = 1 AND OLD.deleted = 0 THEN
+        SET NEW.date_deletion = CURRENT_TIMESTAMP;
+    END IF;
+END;
+//
+
+CREATE TRIGGER before_artist_delete
+BEFORE UPDATE ON `Artists`
+FOR EACH ROW
+BEGIN
+    IF NEW.deleted = 1 AND OLD.deleted = 0 THEN
+        SET NEW.date_deletion = CURRENT_TIMESTAMP;
+    END IF;
+END;
+//
+
+CREATE TRIGGER before_album_delete
+BEFORE UPDATE ON `Albums`
+FOR EACH ROW
+BEGIN
+    IF NEW.deleted = 1 AND OLD.deleted = 0 THEN
+        SET NEW.date_deletion = CURRENT_TIMESTAMP;
+    END IF;
+END;
+//
+
+CREATE TRIGGER before_song_delete
+BEFORE UPDATE ON `Songs`
+FOR EACH ROW
+BEGIN
+    IF NEW.deleted = 1 AND OLD.deleted = 0 THEN
+        SET NEW.date_deletion = CURRENT_TIMESTAMP;
+    END IF;
+END;
+//
+
+CREATE TRIGGER before_playlist_delete
+BEFORE UPDATE ON `Playlists`
+FOR EACH ROW
+BEGIN
+    IF NEW.deleted = 1 AND OLD.deleted = 0 THEN
+        SET NEW.date_deletion = CURRENT_TIMESTAMP;
+    END IF;
+END;
+//
+DELIMITER ;
+
+CREATE INDEX artists_date_deletion ON Artists(date_deletion);
+CREATE INDEX albums_date_deletion ON Albums(date_deletion);
+CREATE INDEX songs_date_deletion ON Songs(date_deletion);
+CREATE INDEX playlists_date_deletion ON Playlists(date_deletion);
+CREATE INDEX users_date_deletion ON Users(date_deletion);
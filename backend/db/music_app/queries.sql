@@ -72,4 +72,69 @@ FROM non_deleted_users AS u
 JOIN Artists_followers AS af ON u.id = af.user_id
 JOIN non_deleted_artists AS a ON a.id = af.artist_id
 GROUP BY u.username
-HAVING COUNT(a.name) >= 2;
\ No newline at end of file
+HAVING COUNT(a.name) >= 2;
+-- Index benchmark for migrations/001_composite_indexes.sql
+-- backend/database_manager/index_benchmark.py runs the lookups below, records the EXPLAIN rows
+-- (type, key, rows, Extra) and the timings of each, and compares two recorded runs:
+--   python backend/database_manager/index_benchmark.py --out before.json
+--   mysql "$DB_NAME" < migrations/001_composite_indexes.sql
+--   python backend/database_manager/index_benchmark.py --out after.json
+--   python backend/database_manager/index_benchmark.py --compare before.json after.json
+
+-- Song by name through the view
+EXPLAIN
+SELECT * FROM non_deleted_songs
+WHERE name = 'Come Together';
+
+-- Songs of an album
+EXPLAIN
+SELECT al.name AS album_name, s.name AS song_name FROM non_deleted_albums AS al
+JOIN non_deleted_songs AS s ON al.id = s.album_id
+WHERE al.name = 'Abbey Road';
+
+-- Albums of an artist
+EXPLAIN
+SELECT ar.name AS artist_name, al.name AS album_name FROM non_deleted_artists AS ar
+JOIN non_deleted_albums AS al ON ar.id = al.artist_id
+WHERE ar.name = 'The Beatles';
+
+-- Playlists of a user
+EXPLAIN
+SELECT p.name AS Playlists FROM non_deleted_playlists AS p
+JOIN non_deleted_users AS u ON u.id = p.creator_id
+WHERE u.username = 'john_doe';
+
+-- Id keyed lookups used by the *_by_id model methods
+EXPLAIN
+SELECT * FROM non_deleted_songs
+WHERE id = 1;
+
+-- Playlists of a user by id, without the Users join
+EXPLAIN
+SELECT name AS Playlists FROM non_deleted_playlists
+WHERE creator_id = 1;
+
+-- Counter tables (migrations/005_counters.sql) instead of COUNT(*) over the event tables.
+-- Top 10 most liked songs:
+-- EXPLAIN
+SELECT s.name AS Song_name, c.like_count AS Likes
+FROM Song_like_counts AS c
+JOIN non_deleted_songs AS s ON s.id = c.song_id
+ORDER BY c.like_count DESC
+LIMIT 10;
+
+-- Most followed artists:
+-- EXPLAIN
+SELECT ar.name AS Artist, c.follower_count AS Followers
+FROM Artist_follower_counts AS c
+JOIN non_deleted_artists AS ar ON ar.id = c.artist_id
+ORDER BY c.follower_count DESC
+LIMIT 10;
+
+-- Playlists that contain more than 10 tracks, without grouping Playlist_tracks:
+-- EXPLAIN
+SELECT u.username AS Username, pl.name AS Playlist, c.track_count AS Song_count
+FROM Playlist_track_counts AS c
+JOIN non_deleted_playlists AS pl ON pl.id = c.playlists_id
+JOIN non_deleted_users AS u ON u.id = pl.creator_id
+WHERE c.track_count > 10;
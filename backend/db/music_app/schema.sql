@@ -1,3 +1,10 @@
+DROP TABLE IF EXISTS `Playlist_track_counts`;
+DROP TABLE IF EXISTS `Artist_follower_counts`;
+DROP TABLE IF EXISTS `Song_like_counts`;
+DROP TABLE IF EXISTS `Trending_songs`;
+DROP TABLE IF EXISTS `Song_activity_daily`;
+DROP TABLE IF EXISTS `Song_activity_hourly`;
+DROP TABLE IF EXISTS `Job_watermarks`;
 DROP TABLE IF EXISTS `Payments`;
 DROP TABLE IF EXISTS `User_subscriptions`;
 DROP TABLE IF EXISTS `Playlists_users`;
@@ -196,41 +203,84 @@ ADD date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
 ADD action TINYINT(1) NOT NULL DEFAULT 0;
 
 
+-- Trending songs, maintained by backend/models/trending_model.py
+-- Likes and Playlist_tracks additions counted per song and hour / day
+CREATE TABLE `Song_activity_hourly` (
+    bucket DATETIME NOT NULL,
+    song_id INT NOT NULL,
+    likes INT NOT NULL DEFAULT 0,
+    playlist_adds INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, song_id)
+);
+
+CREATE TABLE `Song_activity_daily` (
+    bucket DATE NOT NULL,
+    song_id INT NOT NULL,
+    likes INT NOT NULL DEFAULT 0,
+    playlist_adds INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, song_id)
+);
+
+-- Top songs per window and artist genre, genre '' ranks every genre together
+CREATE TABLE `Trending_songs` (
+    window_name VARCHAR(20) NOT NULL,
+    genre VARCHAR(100) NOT NULL,
+    `rank` SMALLINT NOT NULL,
+    song_id INT NOT NULL,
+    score DOUBLE NOT NULL,
+    PRIMARY KEY (window_name, genre, `rank`)
+);
+
+-- Point up to which a batch job has processed its input
+CREATE TABLE `Job_watermarks` (
+    job VARCHAR(100) NOT NULL PRIMARY KEY,
+    watermark DATETIME NOT NULL
+);
+
+INSERT INTO Job_watermarks(job, watermark)
+VALUES('song_activity_rollup', '1970-01-01 00:00:01');
+
+-- Counters maintained by the model write paths, see backend/models/counter_model.py
+CREATE TABLE `Song_like_counts` (
+    song_id INT NOT NULL PRIMARY KEY,
+    like_count INT NOT NULL DEFAULT 0,
+    KEY song_like_counts_top (like_count)
+);
+
+CREATE TABLE `Artist_follower_counts` (
+    artist_id INT NOT NULL PRIMARY KEY,
+    follower_count INT NOT NULL DEFAULT 0,
+    KEY artist_follower_counts_top (follower_count)
+);
+
+CREATE TABLE `Playlist_track_counts` (
+    playlists_id INT NOT NULL PRIMARY KEY,
+    track_count INT NOT NULL DEFAULT 0,
+    KEY playlist_track_counts_top (track_count)
+);
+
 -- Trigger creation
 
 DELIMITER //
--- This Trigger will delete all users from following tables if a user deletes their account
+-- Deleting an account only stamps the date, its likes and follows are removed with their counters by cascade_model.py
 CREATE TRIGGER before_user_delete
 BEFORE UPDATE ON `Users`
 FOR EACH ROW
 BEGIN
     IF NEW.deleted = 1 AND OLD.deleted = 0 THEN
-        DELETE FROM `Followers_users` 
-        WHERE user_id1 = OLD.id OR user_id2 = OLD.id;
-        DELETE FROM `Artists_followers`
-        WHERE user_id = OLD.id;
-        DELETE FROM `Likes`
-        WHERE user_id = OLD.id;
-        UPDATE `Users`
-        SET date_deletion = CURRENT_TIMESTAMP
-        WHERE id = OLD.id;
+        SET NEW.date_deletion = CURRENT_TIMESTAMP;
     END IF;
 END;
 //
 
+-- Soft deleting artists, albums, songs and playlists only stamps the date here. What depends on them
+-- (albums, songs, likes, follows, playlist entries) is removed in chunks by backend/models/cascade_model.py
 CREATE TRIGGER before_artist_delete
 BEFORE UPDATE ON `Artists`
 FOR EACH ROW
 BEGIN
     IF NEW.deleted = 1 AND OLD.deleted = 0 THEN
-        UPDATE`Albums`
-        SET deleted = 1
-        WHERE artist_id = OLD.id;
-        DELETE FROM `Artists_followers`
-        WHERE artist_id = OLD.id;
-        UPDATE `Artists`
-        SET date_deletion = CURRENT_TIMESTAMP
-        WHERE id = OLD.id;
+        SET NEW.date_deletion = CURRENT_TIMESTAMP;
     END IF;
 END;
 //
@@ -240,12 +290,7 @@ BEFORE UPDATE ON `Albums`
 FOR EACH ROW
 BEGIN
     IF NEW.deleted = 1 AND OLD.deleted = 0 THEN
-        UPDATE `Songs`
-        SET deleted = 1
-        WHERE album_id = OLD.id;
-        UPDATE `Albums`
-        SET date_deletion = CURRENT_TIMESTAMP
-        WHERE id = OLD.id;
+        SET NEW.date_deletion = CURRENT_TIMESTAMP;
     END IF;
 END;
 //
@@ -255,13 +300,7 @@ BEFORE UPDATE ON `Songs`
 FOR EACH ROW
 BEGIN 
     IF NEW.deleted = 1 AND OLD.deleted = 0 THEN
-        DELETE FROM `Likes`
-        WHERE song_id = OLD.id;
-        DELETE FROM `Playlist_tracks`
-        WHERE song_id = OLD.id;
-        UPDATE `Songs`
-        SET date_deletion = CURRENT_TIMESTAMP
-        WHERE id = OLD.id;
+        SET NEW.date_deletion = CURRENT_TIMESTAMP;
     END IF;
 END;
 //
@@ -271,11 +310,7 @@ BEFORE UPDATE ON `Playlists`
 FOR EACH ROW
 BEGIN
     IF NEW.deleted = 1 AND OLD.deleted = 0 THEN
-        DELETE FROM `Playlists_tracks`
-        WHERE playlists_id = OLD.id;
-        UPDATE `Playlists`
-        SET date_deletion = CURRENT_TIMESTAMP
-        WHERE id = OLD.id;
+        SET NEW.date_deletion = CURRENT_TIMESTAMP;
     END IF;
 END;
 //
@@ -304,6 +339,32 @@ CREATE INDEX playlist_name ON Playlists(name);
 CREATE INDEX user_username ON Users(username);
 CREATE INDEX artist_genre ON Artists(genre);
 
+-- Composite indexes matching the views deleted = 0 filter (see migrations/001_composite_indexes.sql)
+CREATE INDEX songs_deleted_name ON Songs(deleted, name);
+CREATE INDEX albums_deleted_name ON Albums(deleted, name);
+CREATE INDEX artists_deleted_name ON Artists(deleted, name);
+CREATE INDEX playlists_deleted_name ON Playlists(deleted, name);
+CREATE INDEX users_deleted_username ON Users(deleted, username);
+CREATE INDEX subscriptions_deleted_plan_name ON Subscription_plan_info(deleted, plan_name);
+CREATE INDEX songs_album_deleted ON Songs(album_id, deleted);
+CREATE INDEX songs_artist_deleted ON Songs(artist_id, deleted);
+CREATE INDEX albums_artist_deleted ON Albums(artist_id, deleted);
+CREATE INDEX playlists_creator_deleted ON Playlists(creator_id, deleted);
+
+-- Range scans of the song activity roll up (see migrations/002_trending_songs.sql)
+CREATE INDEX likes_date ON Likes(date);
+CREATE INDEX playlist_tracks_date ON Playlist_tracks(date);
+
+-- Ordered playlist reads (see migrations/003_playlist_order.sql)
+CREATE INDEX playlist_tracks_order ON Playlist_tracks(playlists_id, `order`);
+
+-- Soft delete sweeps by deletion date (see migrations/006_cascade_jobs.sql)
+CREATE INDEX artists_date_deletion ON Artists(date_deletion);
+CREATE INDEX albums_date_deletion ON Albums(date_deletion);
+CREATE INDEX songs_date_deletion ON Songs(date_deletion);
+CREATE INDEX playlists_date_deletion ON Playlists(date_deletion);
+CREATE INDEX users_date_deletion ON Users(date_deletion);
+
 -- Create views
 CREATE VIEW `non_deleted_users` AS
 SELECT * FROM `Users`
@@ -15,6 +15,12 @@ sys.path.append(str(base_path))
 from utils.errors import InputError
 from utils.errors import DatabaseConnectionError
 from backend.database_manager.database_manager import DatabaseManager
+from backend.database_manager.schema_registry import schema_registry
+from backend.database_manager.pagination import fetch_page, stream_rows
+from backend.database_manager.bulk_insert import rows_columns, insert_in_chunks
+from backend.cache.catalog_cache import get_catalog_cache
+from backend.database_manager.after_commit import after_commit
+from backend.cache.local_cache import MISSING
 
 
 # Setup a logger
@@ -36,20 +42,22 @@ load_dotenv(dotenv_path=env_path)
 
 class Albums_model:
 
-    def __init__(self, cursor):
+    def __init__(self, cursor, statements=None):
         """
         Initialize the Albums_model class with database configuration.
 
         Args:
             cursor (mysql.connector.cursor_cext.CMySQLCursorDict): The database cursor.
+            statements (StatementRegistry): Prepared statements of the cursors connection, see DatabaseManager.prepared_connection.
+                        If None statements are sent as plain text.
 
         Raises:
                 DatabaseConnectionError: If connection to the database fails
         """
         try:
             self.cursor = cursor
-            self.cursor.execute("SHOW COLUMNS FROM Albums;")
-            self.table_columns = self.cursor.fetchall()
+            self.statements = statements
+            self.table_columns = schema_registry.get_columns(self.cursor, "Albums")
             logger.info("Database connection established successfully.")
         except mysql.connector.Error as err:
             logger.error(f"Error connecting to the database: {err}")
@@ -84,6 +92,26 @@ class Albums_model:
         
         return string_stripped
 
+    def id_checker(self, value) -> int:
+        """
+        Function to check if a input is a valid row id
+
+        Args:
+            value (int): Any id to be checked.
+                        Example: 1
+
+        Raises:
+            ValueError: If input is not a positive integer.
+        Returns:
+            value (int): The checked id
+                        Example: 1
+        """
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            logger.error("Input is not a valid id!")
+            raise ValueError("Id must be a positive integer.")
+
+        return value
+
     def check_if_input_cols_match(self, table_columns: list, input_columns: list, exclude_columns = None, exact_match=True):
         """
         Checks if columns that want to be inputed match the table columns raises a InputError if not.
@@ -108,7 +136,49 @@ class Albums_model:
         
         if not exact_match and not set([input_columns]).issubset(set(table_columns_filtered)):
             logger.error("Inputed columns that are not in the table schema!")
-            raise InputError("Inputed columns that are not in the table schema!") 
+            raise InputError("Inputed columns that are not in the table schema!")
+
+    def execute_statement(self, key: tuple, query: str, values: tuple):
+        """
+        Runs a write statement, as a server-side prepared statement when the model has a statement registry.
+
+        Args:
+            key (tuple): Table, operation and columns identifying the statement text.
+            query (str): SQL with %s placeholders.
+            values (tuple): Parameters of the statement.
+        """
+        if self.statements is None:
+            self.cursor.execute(query, values)
+        else:
+            self.statements.execute(key, query, values)
+
+    def invalidate_album_cache(self, album_name: str = None, cascade=False):
+        """
+        Drop cached catalog reads an album write can change, now and again once the write commits.
+
+        Args:
+            album_name (str): Album that changed. Drops every cached album if None.
+            cascade (bool): If the write also changed the albums songs (soft delete).
+        """
+        self._drop_album_cache(album_name, cascade)
+        after_commit(self.cursor, lambda: self._drop_album_cache(album_name, cascade))
+
+    def _drop_album_cache(self, album_name: str = None, cascade=False):
+        """
+        Delete the album keys, see invalidate_album_cache.
+        """
+        cache = get_catalog_cache()
+        if album_name is None:
+            cache.delete_prefix("album_songs:")
+        else:
+            cache.delete(f"album_songs:{album_name}")
+        # Album lists of artists include the album
+        cache.delete_prefix("artist_albums:")
+        # Playlist snapshots carry album names
+        cache.delete_prefix("playlist_tracks:")
+        if cascade:
+            cache.delete_prefix("song:")
+            cache.delete_prefix("artist_songs:")
 
     def add_new_album(self, album_info: dict):
         """
@@ -136,12 +206,45 @@ class Albums_model:
                         VALUES({placeholders});
                     """
             album_info_tuple = tuple(album_info.values())
-            self.cursor.execute(query, album_info_tuple)
+            self.execute_statement(("Albums", "insert", tuple(album_info.keys())), query, album_info_tuple)
+            self.invalidate_album_cache(album_info["name"])
             logger.info(f"New album added {album_info["name"]}")
         except mysql.connector.Error as err:
             logger.error(f"Error when createing a new album {err}")
             raise DatabaseConnectionError(f"Database connection failed {err}.")
 
+    def add_many_albums(self, albums_info: list, chunk_size=500, db_manager=None) -> list:
+        """
+        Inserts many albums into the Albums database with multi-row inserts.
+
+        Args:
+            albums_info (list): List of dictionaries containing details about the albums. All need the same columns.
+            chunk_size (int): Number of albums sent per INSERT statement.
+            db_manager (DatabaseManager): If given every chunk is committed, otherwise the caller commits.
+
+        Returns:
+            album_ids (list): Ids of the inserted albums in input order.
+
+        Raises:
+            InputError: If the set of columns does not equal the columns from the table.
+            DatabaseConnectionError: If the database connection fails.
+        """
+        try:
+            columns_table = [row["Field"] for row in self.table_columns]
+            columns_dict = rows_columns(albums_info)
+            excluded_cols = ["id", "deleted"]
+
+            # Columns are checked once for the whole batch
+            self.check_if_input_cols_match(table_columns=columns_table, input_columns=columns_dict, exclude_columns=excluded_cols)
+
+            album_ids = insert_in_chunks(self.cursor, table="Albums", columns=columns_dict, rows=albums_info, chunk_size=chunk_size, db_manager=db_manager)
+            self.invalidate_album_cache()
+            logger.info(f"{len(album_ids)} new albums added")
+            return album_ids
+        except mysql.connector.Error as err:
+            logger.error(f"Error when createing new albums {err}")
+            raise DatabaseConnectionError(f"Database connection failed {err}.")
+
     def fetch_songs_from_album(self, album_name: str) -> dict:
         """
         Fetch songs from a specific album.
@@ -159,20 +262,63 @@ class Albums_model:
         try:
             album_name = self.string_checker(album_name)
             
+            cache = get_catalog_cache()
+            albums_songs_fetched = cache.get(f"album_songs:{album_name}")
+
+            if albums_songs_fetched is MISSING:
+                query = """
+                        SELECT a.name AS album_name, s.name AS song_name FROM non_deleted_albums AS a
+                        JOIN non_deleted_songs AS s ON a.id = s.album_id
+                        WHERE a.name = %s
+                        """
+                self.cursor.execute(query, (album_name, ))
+                albums_songs_fetched = self.cursor.fetchall()
+                cache.set(f"album_songs:{album_name}", albums_songs_fetched)
+            
+            if not albums_songs_fetched:
+                logger.warning("No album feteched")
+                return {}
+            
+            album_songs = {album_name: [i["song_name"] for i in albums_songs_fetched]}
+            logger.info(f"Songs from {album_name} fetched")
+            return album_songs
+        except mysql.connector.Error as err:
+            logger.error(f"Error fetching songs {err}")
+            raise DatabaseConnectionError(f"Error fetching songs {err}")
+
+    def fetch_songs_from_album_by_id(self, album_id: int) -> dict:
+        """
+        Fetch songs from a specific album by its id.
+
+        Args:
+            album_id (int): Album id.
+
+        Returns:
+            albums_songs (dict): dict containing the name of the album and all their songs (list).
+        
+        Raises: 
+            ValueError: If album_id is not a positive integer.
+            DatabaseConnectionError: If connection to the database fails
+        """
+
+        try:
+            album_id = self.id_checker(album_id)
+            
             query = """
                     SELECT a.name AS album_name, s.name AS song_name FROM non_deleted_albums AS a
-                    JOIN Songs AS s ON a.id = s.album_id
-                    WHERE a.name = %s
+                    JOIN non_deleted_songs AS s ON a.id = s.album_id
+                    WHERE a.id = %s
                     """
-            self.cursor.execute(query, (album_name, ))
+            self.cursor.execute(query, (album_id, ))
             albums_songs_fetched = self.cursor.fetchall()
             
             if not albums_songs_fetched:
                 logger.warning("No album feteched")
                 return {}
             
+            album_name = albums_songs_fetched[0]["album_name"]
             album_songs = {album_name: [i["song_name"] for i in albums_songs_fetched]}
-            logger.info(f"Songs from {album_name} fetched")
+            logger.info(f"Songs from album {album_id} fetched")
             return album_songs
         except mysql.connector.Error as err:
             logger.error(f"Error fetching songs {err}")
@@ -210,15 +356,58 @@ class Albums_model:
                     SET {column_dict} = %s
                     WHERE name = %s
                     """
-            self.cursor.execute(query, (value, album_name))
+            self.execute_statement(("Albums", "update", column_dict, "name"), query, (value, album_name))
+            self.invalidate_album_cache(album_name, cascade=column_dict == "deleted")
+            if column_dict == "name":
+                self.invalidate_album_cache(value)
             logger.info(f"{album_name} info updated on {column_dict} to {value}")
         except mysql.connector.Error as err:
             logger.error(f"Error updating a album info {err}")
             raise DatabaseConnectionError(f"Error updating {album_name}. Info: {err}")
 
+    def update_album_information_by_id(self, album_update_info: dict, album_id: int):
+        """
+        Function to update albums info by album id.
+
+        Args:
+            album_update_info (dict): dict containing the column and the value that will be changed for a album.
+            album_id (int): Album id.
+        
+        Raises:
+                InputError: If len of album_update_info info not 1.
+                            if column is not in the albums table
+                ValueError: If album_id is not a positive integer.
+                DatabaseConnectionError: If connection to the database fails
+        """
+        try:
+            column_table = [row["Field"] for row in self.table_columns]
+
+            column_dict, value = next(iter(album_update_info.items()))
+            album_id = self.id_checker(album_id)
+            
+            if  len(album_update_info) != 1:
+                logger.error("Dictionary doesnt have just one key-value pair")
+                raise InputError("Dictionary doesnt have just one key-value pair")
+
+            self.check_if_input_cols_match(table_columns=column_table, input_columns=column_dict, exact_match=False)
+            
+            query = f"""
+                    UPDATE Albums
+                    SET {column_dict} = %s
+                    WHERE id = %s
+                    """
+            self.execute_statement(("Albums", "update", column_dict, "id"), query, (value, album_id))
+            self.invalidate_album_cache(cascade=column_dict == "deleted")
+            logger.info(f"Album {album_id} info updated on {column_dict} to {value}")
+        except mysql.connector.Error as err:
+            logger.error(f"Error updating a album info {err}")
+            raise DatabaseConnectionError(f"Error updating album {album_id}. Info: {err}")
+
     def soft_delete_album(self, album_name: str):
         """
         This function takes a album name as input and marks him as deleted in our database.
+        Songs, likes and playlist entries are cascaded by Cascade_model.sweep(),
+        use Cascade_model.delete_album to cascade right away.
 
         Args:
             album_name (string): Name of a album.
@@ -236,11 +425,40 @@ class Albums_model:
                     WHERE name = %s
                     """
             self.cursor.execute(query, (album_name, ))
+            self.invalidate_album_cache(album_name, cascade=True)
             logger.info(f"{album_name} deleted")
         except mysql.connector.Error as err:
             logger.error(f"Error deleting a album {err}")
             raise DatabaseConnectionError(f"Error deleting a album {err}")
 
+    def soft_delete_album_by_id(self, album_id: int):
+        """
+        This function takes a album id as input and marks the album as deleted in our database.
+        Songs, likes and playlist entries are cascaded by Cascade_model.sweep(),
+        use Cascade_model.delete_album to cascade right away.
+
+        Args:
+            album_id (int): Album id.
+                Example: 1
+
+        Raises:
+            ValueError: If album_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs during the database creation.
+        """
+        try:
+            album_id = self.id_checker(album_id)
+            query = """
+                    UPDATE Albums
+                    SET deleted = 1
+                    WHERE id = %s
+                    """
+            self.cursor.execute(query, (album_id, ))
+            self.invalidate_album_cache(cascade=True)
+            logger.info(f"Album {album_id} deleted")
+        except mysql.connector.Error as err:
+            logger.error(f"Error deleting a album {err}")
+            raise DatabaseConnectionError(f"Error deleting a album {err}")
+
     def fetch_all_albums(self) -> list:
         """
         Fetches all Albums from the database.
@@ -271,6 +489,46 @@ class Albums_model:
             logger.error(f"Databse connection failed {err}")
             raise DatabaseConnectionError(f"Databse connection failed {err}")
 
+    def fetch_albums_page(self, after_id=0, limit=100) -> list:
+        """
+        Fetches one page of albums ordered by id (keyset pagination).
+
+        Args:
+            after_id (int): Id of the last album of the previous page, 0 for the first page.
+            limit (int): Page size, at most 1000.
+        Returns:
+            albums_page (list): Dictionaries with the id and name of the albums. Empty when there are no more albums.
+                Pass the last id as after_id to get the next page.
+        Raises:
+            InputError: If after_id or limit are invalid.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            albums_page = fetch_page(self.cursor, view="non_deleted_albums", columns="id, name", after_id=after_id, limit=limit)
+            logger.info(f"Fetched {len(albums_page)} albums after id {after_id}")
+            return albums_page
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
+    def stream_all_albums(self, db_manager, batch_size=1000):
+        """
+        Streams all albums with constant memory.
+
+        Args:
+            db_manager (DatabaseManager): Database manager, the stream runs on a connection leased from its pool.
+            batch_size (int): Rows fetched from the server per round trip.
+        Yields:
+            dict: The id and name of one album at a time, ordered by id.
+        Raises:
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            yield from stream_rows(db_manager, view="non_deleted_albums", columns="id, name", batch_size=batch_size)
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
     def close_connection(self):
         self.cursor.close()
         self.conn.close()
@@ -15,6 +15,12 @@ sys.path.append(str(base_path))
 from utils.errors import InputError
 from utils.errors import DatabaseConnectionError
 from backend.database_manager.database_manager import DatabaseManager
+from backend.database_manager.schema_registry import schema_registry
+from backend.database_manager.pagination import fetch_page, stream_rows, check_page_args
+from backend.database_manager.bulk_insert import rows_columns, insert_in_chunks
+from backend.cache.catalog_cache import get_catalog_cache
+from backend.database_manager.after_commit import after_commit
+from backend.cache.local_cache import MISSING
 
 # Setup a logger
 
@@ -35,20 +41,22 @@ load_dotenv(dotenv_path=env_path)
 
 class Artists_model:
 
-    def __init__(self, cursor):
+    def __init__(self, cursor, statements=None):
         """
         Initialize the UserModel class with database configuration.
 
         Args:
             cursor (mysql.connector.cursor_cext.CMySQLCursorDict): The database cursor.
+            statements (StatementRegistry): Prepared statements of the cursors connection, see DatabaseManager.prepared_connection.
+                        If None statements are sent as plain text.
 
         Raises:
                 DatabaseConnectionError: If connection to the database fails
         """
         try:
             self.cursor = cursor
-            self.cursor.execute("SHOW COLUMNS FROM Artists;")
-            self.table_columns = self.cursor.fetchall()
+            self.statements = statements
+            self.table_columns = schema_registry.get_columns(self.cursor, "Artists")
             logger.info("Database connection established successfully.")
         except mysql.connector.Error as err:
             logger.error(f"Error connecting to the database: {err}")
@@ -83,6 +91,26 @@ class Artists_model:
 
         return string_stripped
 
+    def id_checker(self, value) -> int:
+        """
+        Function to check if a input is a valid row id
+
+        Args:
+            value (int): Any id to be checked.
+                        Example: 1
+
+        Raises:
+            ValueError: If input is not a positive integer.
+        Returns:
+            value (int): The checked id
+                        Example: 1
+        """
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            logger.error("Input is not a valid id!")
+            raise ValueError("Id must be a positive integer.")
+
+        return value
+
     def check_if_input_cols_match(self, table_columns: list, input_columns: list, exclude_columns = None, exact_match=True):
         """
         Checks if columns that want to be inputed match the table columns raises a InputError if not.
@@ -107,8 +135,51 @@ class Artists_model:
         
         if not exact_match and not set([input_columns]).issubset(set(table_columns_filtered)):
             logger.error("Inputed columns that are not in the table schema!")
-            raise InputError("Inputed columns that are not in the table schema!") 
-    
+            raise InputError("Inputed columns that are not in the table schema!")
+
+    def execute_statement(self, key: tuple, query: str, values: tuple):
+        """
+        Runs a write statement, as a server-side prepared statement when the model has a statement registry.
+
+        Args:
+            key (tuple): Table, operation and columns identifying the statement text.
+            query (str): SQL with %s placeholders.
+            values (tuple): Parameters of the statement.
+        """
+        if self.statements is None:
+            self.cursor.execute(query, values)
+        else:
+            self.statements.execute(key, query, values)
+
+    def invalidate_artist_cache(self, artist_name: str = None, cascade=False):
+        """
+        Drop cached catalog reads an artist write can change, now and again once the write commits.
+
+        Args:
+            artist_name (str): Artist that changed. Drops every cached artist if None.
+            cascade (bool): If the write also changed the artists albums and songs (soft delete).
+        """
+        self._drop_artist_cache(artist_name, cascade)
+        after_commit(self.cursor, lambda: self._drop_artist_cache(artist_name, cascade))
+
+    def _drop_artist_cache(self, artist_name: str = None, cascade=False):
+        """
+        Delete the artist keys, see invalidate_artist_cache.
+        """
+        cache = get_catalog_cache()
+        if cascade:
+            # Soft deleting an artist cascades to albums and songs, drop the whole catalog
+            cache.clear()
+        elif artist_name is None:
+            cache.delete_prefix("artist_songs:")
+            cache.delete_prefix("artist_albums:")
+        else:
+            cache.delete(f"artist_songs:{artist_name}")
+            cache.delete(f"artist_albums:{artist_name}")
+        if not cascade:
+            # Playlist snapshots carry artist names
+            cache.delete_prefix("playlist_tracks:")
+
     def add_new_artist(self, artist_info: dict):
         """
         Inserts a artist into the Artists database.
@@ -135,12 +206,45 @@ class Artists_model:
                         VALUES({placeholders});
                     """
             artist_info_tuple = tuple(artist_info.values())
-            self.cursor.execute(query, artist_info_tuple)
+            self.execute_statement(("Artists", "insert", tuple(artist_info.keys())), query, artist_info_tuple)
+            self.invalidate_artist_cache(artist_info["name"])
             logger.info(f"New artist added {artist_info["name"]}")
         except mysql.connector.Error as err:
             logger.error(f"Error when createing a new artist {err}")
             raise DatabaseConnectionError(f"Database connection failed {err}.")
 
+    def add_many_artists(self, artists_info: list, chunk_size=500, db_manager=None) -> list:
+        """
+        Inserts many artists into the Artists database with multi-row inserts.
+
+        Args:
+            artists_info (list): List of dictionaries containing details about the artists. All need the same columns.
+            chunk_size (int): Number of artists sent per INSERT statement.
+            db_manager (DatabaseManager): If given every chunk is committed, otherwise the caller commits.
+
+        Returns:
+            artist_ids (list): Ids of the inserted artists in input order.
+
+        Raises:
+            InputError: If the set of columns does not equal the columns from the table.
+            DatabaseConnectionError: If the database connection fails.
+        """
+        try:
+            columns_table = [row["Field"] for row in self.table_columns]
+            columns_dict = rows_columns(artists_info)
+            excluded_cols = ["id", "deleted"]
+
+            # Columns are checked once for the whole batch
+            self.check_if_input_cols_match(table_columns=columns_table, input_columns=columns_dict, exclude_columns=excluded_cols)
+
+            artist_ids = insert_in_chunks(self.cursor, table="Artists", columns=columns_dict, rows=artists_info, chunk_size=chunk_size, db_manager=db_manager)
+            self.invalidate_artist_cache()
+            logger.info(f"{len(artist_ids)} new artists added")
+            return artist_ids
+        except mysql.connector.Error as err:
+            logger.error(f"Error when createing new artists {err}")
+            raise DatabaseConnectionError(f"Database connection failed {err}.")
+
     def fetch_songs_from_artist(self, artist_name: str) -> dict:
         """
         Fetch songs from a specific artist.
@@ -158,20 +262,63 @@ class Artists_model:
         try:
             artist_name = self.string_checker(artist_name)
             
+            cache = get_catalog_cache()
+            artists_songs_fetched = cache.get(f"artist_songs:{artist_name}")
+
+            if artists_songs_fetched is MISSING:
+                query = """
+                        SELECT a.name AS artist_name, s.name AS song_name FROM non_deleted_artists AS a
+                        JOIN non_deleted_songs AS s ON a.id = s.artist_id
+                        WHERE a.name = %s
+                        """
+                self.cursor.execute(query, (artist_name, ))
+                artists_songs_fetched = self.cursor.fetchall()
+                cache.set(f"artist_songs:{artist_name}", artists_songs_fetched)
+            
+            if not artists_songs_fetched:
+                logger.warning("No artists feteched")
+                return {}
+            
+            artists_songs = {artist_name: [i["song_name"] for i in artists_songs_fetched]}
+            logger.info(f"Songs from {artist_name} fetched")
+            return artists_songs
+        except mysql.connector.Error as err:
+            logger.error(f"Error fetching songs {err}")
+            raise DatabaseConnectionError(f"Error fetching songs {err}")
+
+    def fetch_songs_from_artist_by_id(self, artist_id: int) -> dict:
+        """
+        Fetch songs from a specific artist by its id.
+
+        Args:
+            artist_id (int): Artist id.
+
+        Returns:
+            artists_songs (dict): dict containing the name of the artists and all their songs (list).
+        
+        Raises: 
+            ValueError: If artist_id is not a positive integer.
+            DatabaseConnectionError: If connection to the database fails
+        """
+
+        try:
+            artist_id = self.id_checker(artist_id)
+            
             query = """
                     SELECT a.name AS artist_name, s.name AS song_name FROM non_deleted_artists AS a
-                    JOIN Songs AS s ON a.id = s.artist_id
-                    WHERE a.name = %s
+                    JOIN non_deleted_songs AS s ON a.id = s.artist_id
+                    WHERE a.id = %s
                     """
-            self.cursor.execute(query, (artist_name, ))
+            self.cursor.execute(query, (artist_id, ))
             artists_songs_fetched = self.cursor.fetchall()
             
             if not artists_songs_fetched:
                 logger.warning("No artists feteched")
                 return {}
             
+            artist_name = artists_songs_fetched[0]["artist_name"]
             artists_songs = {artist_name: [i["song_name"] for i in artists_songs_fetched]}
-            logger.info(f"Songs from {artist_name} fetched")
+            logger.info(f"Songs from artist {artist_id} fetched")
             return artists_songs
         except mysql.connector.Error as err:
             logger.error(f"Error fetching songs {err}")
@@ -194,20 +341,63 @@ class Artists_model:
 
         try:
             artist_name = self.string_checker(artist_name)
+            cache = get_catalog_cache()
+            artists_albums_fetched = cache.get(f"artist_albums:{artist_name}")
+
+            if artists_albums_fetched is MISSING:
+                query = """
+                        SELECT ar.name AS artist_name, al.name AS album_name FROM non_deleted_artists AS ar
+                        JOIN non_deleted_albums AS al ON ar.id = al.artist_id
+                        WHERE ar.name = %s
+                        """
+                self.cursor.execute(query, (artist_name, ))
+                artists_albums_fetched = self.cursor.fetchall()
+                cache.set(f"artist_albums:{artist_name}", artists_albums_fetched)
+            
+            if not artists_albums_fetched:
+                logger.info("No albums feteched")
+                return {}
+            
+            artists_albums = {artist_name: [i["album_name"] for i in artists_albums_fetched]}
+            logger.info(f"Albums from {artist_name} fetched")
+            return artists_albums
+        except mysql.connector.Error as err:
+            logger.error(f"Error fetching the albums {err}")
+            raise DatabaseConnectionError(f"Error fetching the albums {err}")
+
+    def fetch_albums_from_artist_by_id(self, artist_id: int) -> dict:
+        """
+        Fetches albums from a artist by its id.
+
+        Args:
+            artist_id (int): Artist id.
+
+        Returns:
+            artists_albums (dict): dict containing the name of the artists and all their albums (list).
+        
+        Raises: 
+            ValueError: If artist_id is not a positive integer.
+            DatabaseConnectionError: If connection to the database fails.
+
+        """
+
+        try:
+            artist_id = self.id_checker(artist_id)
             query = """
                     SELECT ar.name AS artist_name, al.name AS album_name FROM non_deleted_artists AS ar
-                    JOIN Albums AS al ON ar.id = al.artist_id
-                    WHERE ar.name = %s
+                    JOIN non_deleted_albums AS al ON ar.id = al.artist_id
+                    WHERE ar.id = %s
                     """
-            self.cursor.execute(query, (artist_name, ))
+            self.cursor.execute(query, (artist_id, ))
             artists_albums_fetched = self.cursor.fetchall()
             
             if not artists_albums_fetched:
                 logger.info("No albums feteched")
                 return {}
             
+            artist_name = artists_albums_fetched[0]["artist_name"]
             artists_albums = {artist_name: [i["album_name"] for i in artists_albums_fetched]}
-            logger.info(f"Albums from {artist_name} fetched")
+            logger.info(f"Albums from artist {artist_id} fetched")
             return artists_albums
         except mysql.connector.Error as err:
             logger.error(f"Error fetching the albums {err}")
@@ -245,15 +435,58 @@ class Artists_model:
                     SET {column_dict} = %s
                     WHERE name = %s
                     """
-            self.cursor.execute(query, (value, artist_name))
+            self.execute_statement(("Artists", "update", column_dict, "name"), query, (value, artist_name))
+            self.invalidate_artist_cache(artist_name, cascade=column_dict == "deleted")
+            if column_dict == "name":
+                self.invalidate_artist_cache(value)
             logger.info(f"{artist_name} info updated on {column_dict} to {value}")
         except mysql.connector.Error as err:
             logger.error(f"Error updating a artist info {err}")
             raise DatabaseConnectionError(f"Error updating a artist info {err}")
 
+    def update_artist_information_by_id(self, artist_update_info: dict, artist_id: int):
+        """
+        Function to update artists info by artist id.
+
+        Args:
+            artist_update_info (dict): dict containing the column and the value that will be changed for a artist.
+            artist_id (int): Artist id.
+        
+        Raises:
+                InputError: If len of artist_update info not 1.
+                            if column is not in the artists table
+                ValueError: If artist_id is not a positive integer.
+                DatabaseConnectionError: If connection to the database fails
+        """
+        try:
+            column_table = [row["Field"] for row in self.table_columns]
+
+            column_dict, value = next(iter(artist_update_info.items()))
+            artist_id = self.id_checker(artist_id)
+            
+            if  len(artist_update_info) != 1:
+                logger.error("Dictionary doesnt have just one key-value pair")
+                raise InputError("Dictionary doesnt have just one key-value pair")
+
+            self.check_if_input_cols_match(table_columns=column_table, input_columns=column_dict, exact_match=False)
+            
+            query = f"""
+                    UPDATE Artists
+                    SET {column_dict} = %s
+                    WHERE id = %s
+                    """
+            self.execute_statement(("Artists", "update", column_dict, "id"), query, (value, artist_id))
+            self.invalidate_artist_cache(cascade=column_dict == "deleted")
+            logger.info(f"Artist {artist_id} info updated on {column_dict} to {value}")
+        except mysql.connector.Error as err:
+            logger.error(f"Error updating a artist info {err}")
+            raise DatabaseConnectionError(f"Error updating a artist info {err}")
+
     def soft_delete_artist(self, artist_name: str):
         """
         This function takes a artist name as input and marks him as deleted in our database.
+        Albums, songs, followers, likes and playlist entries are cascaded by Cascade_model.sweep(),
+        use Cascade_model.delete_artist to cascade right away.
 
         Args:
             artist_name (string): Name of a artists.
@@ -271,11 +504,40 @@ class Artists_model:
                     WHERE name = %s
                     """
             self.cursor.execute(query, (artist_name, ))
+            self.invalidate_artist_cache(artist_name, cascade=True)
             logger.info(f"{artist_name} deleted")
         except mysql.connector.Error as err:
             logger.error(f"Error deleting a artist {err}")
             raise DatabaseConnectionError(f"Error deleting a artist {err}")
 
+    def soft_delete_artist_by_id(self, artist_id: int):
+        """
+        This function takes a artist id as input and marks the artist as deleted in our database.
+        Albums, songs, followers, likes and playlist entries are cascaded by Cascade_model.sweep(),
+        use Cascade_model.delete_artist to cascade right away.
+
+        Args:
+            artist_id (int): Artist id.
+                Example: 1
+
+        Raises:
+            ValueError: If artist_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs during the database creation.
+        """
+        try:
+            artist_id = self.id_checker(artist_id)
+            query = """
+                    UPDATE Artists
+                    SET deleted = 1
+                    WHERE id = %s
+                    """
+            self.cursor.execute(query, (artist_id, ))
+            self.invalidate_artist_cache(cascade=True)
+            logger.info(f"Artist {artist_id} deleted")
+        except mysql.connector.Error as err:
+            logger.error(f"Error deleting a artist {err}")
+            raise DatabaseConnectionError(f"Error deleting a artist {err}")
+
     def fetch_all_artists(self):
         """
         Fetches all artists from the database.
@@ -306,6 +568,76 @@ class Artists_model:
             logger.error(f"Databse connection failed {err}")
             raise DatabaseConnectionError(f"Databse connection failed {err}")
 
+    def fetch_artists_page(self, after_id=0, limit=100) -> list:
+        """
+        Fetches one page of artists ordered by id (keyset pagination).
+
+        Args:
+            after_id (int): Id of the last artist of the previous page, 0 for the first page.
+            limit (int): Page size, at most 1000.
+        Returns:
+            artists_page (list): Dictionaries with the id and name of the artists. Empty when there are no more artists.
+                Pass the last id as after_id to get the next page.
+        Raises:
+            InputError: If after_id or limit are invalid.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            artists_page = fetch_page(self.cursor, view="non_deleted_artists", columns="id, name", after_id=after_id, limit=limit)
+            logger.info(f"Fetched {len(artists_page)} artists after id {after_id}")
+            return artists_page
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
+    def stream_all_artists(self, db_manager, batch_size=1000):
+        """
+        Streams all artists with constant memory.
+
+        Args:
+            db_manager (DatabaseManager): Database manager, the stream runs on a connection leased from its pool.
+            batch_size (int): Rows fetched from the server per round trip.
+        Yields:
+            dict: The id and name of one artist at a time, ordered by id.
+        Raises:
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            yield from stream_rows(db_manager, view="non_deleted_artists", columns="id, name", batch_size=batch_size)
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
+    def fetch_most_followed_artists(self, limit=10) -> list:
+        """
+        Fetches the artists with the most followers from the maintained follower counters.
+
+        Args:
+            limit (int): Number of artists, at most 1000.
+        Returns:
+            most_followed (list): Dictionaries with id, name, genre and follower_count, most followed first.
+                Example = [{'id': 1, 'name': 'The Beatles', 'genre': 'Rock', 'follower_count': 40}]
+        Raises:
+            InputError: If limit is invalid.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        check_page_args(0, limit)
+        try:
+            query = """
+                    SELECT ar.id, ar.name, ar.genre, c.follower_count FROM Artist_follower_counts AS c
+                    JOIN non_deleted_artists AS ar ON ar.id = c.artist_id
+                    WHERE c.follower_count > 0
+                    ORDER BY c.follower_count DESC, c.artist_id DESC
+                    LIMIT %s;
+                    """
+            self.cursor.execute(query, (limit, ))
+            most_followed = self.cursor.fetchall()
+            logger.info(f"Fetched the {len(most_followed)} most followed artists")
+            return most_followed
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
     def close_connection(self):
         self.cursor.close()
         self.conn.close()
@@ -0,0 +1,378 @@
+import os
+import logging
+from dotenv import load_dotenv
+from pathlib import Path
+import sys
+
+base_path = Path(__file__).resolve().parent.parent.parent
+env_path = base_path / 'env_files' / 'special_detail.env'
+log_dir = base_path / 'logger'
+log_file =  log_dir / 'app.log'
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+from utils.errors import DatabaseConnectionError
+from backend.database_manager.async_database_manager import AsyncDatabaseManager
+from backend.database_manager.schema_registry import schema_registry
+from backend.cache.catalog_cache import get_catalog_cache
+
+
+# Setup a logger
+
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Connect to the env file and get system variables
+logger.debug(f"Loading .env file from: {env_path}")
+load_dotenv(dotenv_path=env_path)
+
+class Async_table_model:
+    """
+    Async CRUD for a single table, running on an AsyncDatabaseManager pool.
+
+    Mirrors the insert / fetch / update / soft delete methods of the sync models so asyncio
+    code (the AcousticBrainz fetcher, an async API) never blocks the event loop on MySQL.
+    """
+
+    table = None
+    view = None
+    excluded_cols = ["id"]
+    # Catalog cache prefixes the sync models read this table through, dropped once a write committed.
+    # Inserts keep playlist snapshots, a new row is in no playlist yet. Soft deletes also drop delete_cache_prefixes
+    cache_prefixes = ()
+    delete_cache_prefixes = ()
+
+    def __init__(self, db_manager: AsyncDatabaseManager):
+        """
+        Initialize the model. Table columns are loaded on first use.
+
+        Args:
+            db_manager (AsyncDatabaseManager): Connected async database manager.
+        """
+        self.db_manager = db_manager
+        self.table_columns = None
+
+    async def load_columns(self) -> list:
+        """
+        Loads the table columns from the process-wide schema registry.
+
+        Returns:
+            list: Column names of the table.
+        """
+        if self.table_columns is None:
+            rows = await schema_registry.get_columns_async(self.db_manager, self.table)
+            self.table_columns = [row["Field"] for row in rows]
+        return self.table_columns
+
+    def string_checker(self, string: str):
+        """
+        Function to check if a input is a string
+
+        Args:
+            string (str): Any string to be checked.
+                        Example: "a"
+
+        Raises:
+            ValueError: If input is not a string.
+                        If string is with whitespaces.
+        Returns:
+            string_stripped (str): Returns a string striped
+                        Example: "a"
+        """
+        if not isinstance(string, str):
+            logger.error("Input is not a string!")
+            raise ValueError("Input must be a non-empty string.")
+
+        if not string.strip():
+            logger.info("Input must be a non empty string")
+            raise ValueError("Input must be a non empty string")
+
+        return string.strip()
+
+    async def check_columns(self, input_columns: list, exact_match=True):
+        """
+        Checks if columns that want to be inputed match the table columns raises a InputError if not.
+
+        Args:
+            input_columns (list): List of columns that want to be inputed.
+            exact_match (bool): If the input has to contain every non excluded column.
+
+        Raises:
+            InputError: If the columns dont match and we need a exact match.
+                        If the column does not match any other columns from the table.
+        """
+        table_columns = await self.load_columns()
+        table_columns_filtered = [col for col in table_columns if col not in self.excluded_cols]
+
+        if exact_match and set(input_columns) != set(table_columns_filtered):
+            logger.error("Inputed columns dont match the table columns")
+            raise InputError("Inputed columns dont match the table columns")
+
+        if not exact_match and not set(input_columns).issubset(set(table_columns)):
+            logger.error("Inputed columns that are not in the table schema!")
+            raise InputError("Inputed columns that are not in the table schema!")
+
+    def invalidate_cache(self, write: str):
+        """
+        Drop what the sync models cached from this table. Called after the write committed, every
+        AsyncDatabaseManager statement commits on its own.
+
+        Args:
+            write (str): "insert", "update" or "delete".
+        """
+        prefixes = self.cache_prefixes + (self.delete_cache_prefixes if write == "delete" else ())
+        cache = get_catalog_cache()
+        for prefix in dict.fromkeys(prefixes):
+            if write == "insert" and prefix == "playlist_tracks:":
+                continue
+            cache.delete_prefix(prefix)
+
+    async def insert(self, row: dict) -> int:
+        """
+        Inserts a row into the table.
+
+        Args:
+            row (dict): Column-value pairs of the new row.
+
+        Returns:
+            int: Id of the new row.
+
+        Raises:
+            InputError: If the set of columns does not equal the columns from the table.
+            DatabaseConnectionError: If the database connection fails.
+        """
+        await self.check_columns(list(row.keys()))
+
+        input_columns_string = ", ".join(row.keys())
+        placeholders = ", ".join(["%s"] * len(row))
+        query = f"""
+                INSERT INTO `{self.table}`({input_columns_string})
+                VALUES({placeholders});
+                """
+        row_id = await self.db_manager.execute(query, tuple(row.values()))
+        self.invalidate_cache("insert")
+        logger.info(f"New row added to {self.table}")
+        return row_id
+
+    async def insert_many(self, rows: list) -> int:
+        """
+        Inserts many rows with one executemany call. Every row needs the same columns.
+
+        Args:
+            rows (list): List of dictionaries with column-value pairs.
+
+        Returns:
+            int: Number of inserted rows.
+
+        Raises:
+            InputError: If the rows dont share the same columns or they dont match the table.
+            DatabaseConnectionError: If the database connection fails.
+        """
+        if not rows:
+            return 0
+
+        columns = list(rows[0].keys())
+        if any(list(row.keys()) != columns for row in rows):
+            logger.error("All rows must have the same columns")
+            raise InputError("All rows must have the same columns")
+        await self.check_columns(columns)
+
+        input_columns_string = ", ".join(columns)
+        placeholders = ", ".join(["%s"] * len(columns))
+        query = f"""
+                INSERT INTO `{self.table}`({input_columns_string})
+                VALUES({placeholders});
+                """
+        inserted = await self.db_manager.executemany(query, [tuple(row.values()) for row in rows])
+        self.invalidate_cache("insert")
+        logger.info(f"Inserted batch of {inserted} rows into {self.table}")
+        return inserted
+
+    async def upsert_many(self, rows: list, key_columns: list) -> int:
+        """
+        Inserts many rows, rows whose unique key already exists are updated instead of duplicated.
+
+        Args:
+            rows (list): List of dictionaries with column-value pairs. Every row needs the same columns.
+            key_columns (list): Columns of the unique key, they are left untouched on update.
+                        Example: ["mbid"]
+
+        Returns:
+            int: Number of affected rows as reported by MySQL (1 per insert, 2 per changed row).
+
+        Raises:
+            InputError: If the rows dont share the same columns or they dont match the table.
+            DatabaseConnectionError: If the database connection fails.
+        """
+        if not rows:
+            return 0
+
+        columns = list(rows[0].keys())
+        if any(list(row.keys()) != columns for row in rows):
+            logger.error("All rows must have the same columns")
+            raise InputError("All rows must have the same columns")
+        await self.check_columns(columns)
+
+        input_columns_string = ", ".join(columns)
+        placeholders = ", ".join(["%s"] * len(columns))
+        update_columns = [col for col in columns if col not in key_columns] or columns[:1]
+        updates = ", ".join(f"{col} = VALUES({col})" for col in update_columns)
+        query = f"""
+                INSERT INTO `{self.table}`({input_columns_string})
+                VALUES({placeholders})
+                ON DUPLICATE KEY UPDATE {updates}
+                """
+        affected = await self.db_manager.executemany(query, [tuple(row.values()) for row in rows])
+        # Existing rows may have been updated
+        self.invalidate_cache("update")
+        logger.info(f"Upserted batch of {len(rows)} rows into {self.table}")
+        return affected
+
+    async def fetch_by(self, column: str, value) -> list:
+        """
+        Fetches non deleted rows where a column equals a value.
+
+        Args:
+            column (str): Column in the table.
+            value: Value to be looked up.
+
+        Returns:
+            list: List of row dictionaries, empty if nothing was found.
+
+        Raises:
+            InputError: If the column is not in the table.
+            DatabaseConnectionError: If the database connection fails.
+        """
+        await self.check_columns([column], exact_match=False)
+        query = f"""
+                SELECT * FROM `{self.view or self.table}`
+                WHERE {column} = %s;
+                """
+        rows = await self.db_manager.fetchall(query, (value, ))
+        if not rows:
+            logger.warning(f"Nothing found in {self.table} for {column}")
+        return rows
+
+    async def update(self, update_info: dict, key_column: str, key_value):
+        """
+        Update a single column for rows matching a key.
+
+        Args:
+            update_info (dict): Dictionary with one column-value pair.
+            key_column (str): Column used to find the rows. Example: "name"
+            key_value: Value of the key column.
+
+        Raises:
+            InputError: If update_info has more than one key-value pair.
+                        If a column is not in the table.
+            DatabaseConnectionError: If the database connection fails.
+        """
+        if len(update_info) != 1:
+            logger.error("Dictionary doesnt have just one key-value pair")
+            raise InputError("Dictionary doesnt have just one key-value pair")
+
+        column, value = next(iter(update_info.items()))
+        await self.check_columns([column, key_column], exact_match=False)
+
+        query = f"""
+                UPDATE `{self.table}`
+                SET {column} = %s
+                WHERE {key_column} = %s;
+                """
+        await self.db_manager.execute(query, (value, key_value))
+        self.invalidate_cache("update")
+        logger.info(f"{self.table} {key_value} updated on {column}")
+
+    async def soft_delete(self, key_column: str, key_value):
+        """
+        Marks rows matching a key as deleted.
+
+        Args:
+            key_column (str): Column used to find the rows. Example: "name"
+            key_value: Value of the key column.
+
+        Raises:
+            DatabaseConnectionError: If the database connection fails.
+        """
+        await self.check_columns(["deleted", key_column], exact_match=False)
+        query = f"""
+                UPDATE `{self.table}`
+                SET deleted = 1
+                WHERE {key_column} = %s;
+                """
+        await self.db_manager.execute(query, (key_value, ))
+        self.invalidate_cache("delete")
+        logger.info(f"{self.table} {key_value} deleted")
+
+class Async_song_model(Async_table_model):
+    table = "Songs"
+    view = "non_deleted_songs"
+    excluded_cols = ["id", "deleted"]
+    cache_prefixes = ("song:", "album_songs:", "artist_songs:", "playlist_tracks:")
+
+class Async_album_model(Async_table_model):
+    table = "Albums"
+    view = "non_deleted_albums"
+    excluded_cols = ["id", "deleted"]
+    cache_prefixes = ("album_songs:", "artist_albums:", "playlist_tracks:")
+    delete_cache_prefixes = ("song:", "artist_songs:")
+
+class Async_artist_model(Async_table_model):
+    table = "Artists"
+    view = "non_deleted_artists"
+    excluded_cols = ["id", "deleted"]
+    cache_prefixes = ("artist_songs:", "artist_albums:", "playlist_tracks:")
+    delete_cache_prefixes = ("song:", "album_songs:", "trending:")
+
+class Async_playlist_model(Async_table_model):
+    table = "Playlists"
+    view = "non_deleted_playlists"
+    excluded_cols = ["id", "deleted"]
+    cache_prefixes = ("playlist_tracks:", )
+
+class Async_track_model(Async_table_model):
+    table = "Tracks"
+
+class Async_track_info_model(Async_table_model):
+    table = "Track_info"
+    excluded_cols = ["id", "updated_at"]
+
+class Async_track_similar_model(Async_table_model):
+    table = "Track_similar"
+    excluded_cols = []
+
+    async def fetch_similar(self, mbid: str, limit=10) -> list:
+        """
+        Fetches the precomputed most similar tracks of a track with one primary key range read.
+
+        Args:
+            mbid (str): mbid of the seed track.
+            limit (int): Number of tracks, at most the neighbours the similar_tracks job keeps.
+
+        Returns:
+            list: Dictionaries with neighbour_mbid and score, best first. Empty if the track was not computed yet.
+
+        Raises:
+            InputError: If limit is not a positive integer.
+            DatabaseConnectionError: If the database connection fails.
+        """
+        if not isinstance(limit, int) or limit < 1:
+            logger.error("limit must be a positive integer")
+            raise InputError("limit must be a positive integer")
+
+        query = """
+                SELECT neighbour_mbid, score FROM Track_similar
+                WHERE mbid = %s
+                ORDER BY `rank`
+                LIMIT %s;
+                """
+        return await self.db_manager.fetchall(query, (mbid, limit))
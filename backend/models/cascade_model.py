@@ -0,0 +1,467 @@
+import os
+import argparse
+import logging
+import mysql.connector
+from dotenv import load_dotenv
+from pathlib import Path
+import sys
+
+base_path = Path(__file__).resolve().parent.parent.parent
+env_path = base_path / 'env_files' / 'special_detail.env'
+log_dir = base_path / 'logger'
+log_file =  log_dir / 'app.log'
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+from utils.errors import DatabaseConnectionError
+from backend.database_manager.database_manager import DatabaseManager
+from backend.cache.catalog_cache import get_catalog_cache
+from backend.models.counter_model import Counter_model, COUNTERS
+
+# Setup a logger
+
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Connect to the env file and get system variables
+logger.info(f"Loading .env file from: {env_path}")
+load_dotenv(dotenv_path=env_path)
+
+SWEEP_JOB = "soft_delete_cascade"
+# Deletions younger than this are swept again next run, so transactions still in flight are not skipped
+SETTLE_SECONDS = 60
+
+# Cached reads that can contain rows of a table, dropped when rows of it are marked deleted
+CACHE_PREFIXES = {
+    "Albums": ("album_songs:", "artist_albums:", "playlist_tracks:"),
+    "Songs": ("song:", "album_songs:", "artist_songs:", "playlist_tracks:", "trending:"),
+    "Playlist_tracks": ("playlist_tracks:", ),
+}
+
+class Cascade_model:
+
+    def __init__(self, db_manager, chunk_size=500, progress=None):
+        """
+        Soft deletes users, artists, albums, songs and playlists together with what depends on them.
+
+        Replaces the row by row delete triggers. The parent row is marked first, in its own short
+        transaction, so it disappears from the non_deleted views right away. Its albums, songs, likes,
+        follows and playlist entries are then marked or deleted chunk_size ids at a time, every chunk
+        in its own transaction on a pooled connection, so no lock is held for the whole cascade.
+        Counters (counter_model.py) and cached reads are updated chunk by chunk.
+
+        Every step only picks rows that are still live, so an interrupted cascade is finished by
+        running it again or by sweep(). Rows soft deleted through the other models (soft_delete_*)
+        are only marked, run sweep() from cron to cascade them.
+
+        Args:
+            db_manager (DatabaseManager): Database manager whose pool the chunks use.
+            chunk_size (int): Ids marked or rows deleted per transaction.
+            progress (callable): Called as progress(stage, stats) after every chunk. Optional.
+
+        Raises:
+            InputError: If chunk_size is not a positive integer.
+        """
+        if isinstance(chunk_size, bool) or not isinstance(chunk_size, int) or chunk_size < 1:
+            logger.error("chunk_size must be a positive integer")
+            raise InputError("chunk_size must be a positive integer")
+
+        self.db_manager = db_manager
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.stats = self._new_stats()
+
+    @staticmethod
+    def _new_stats() -> dict:
+        return {"users": 0, "artists": 0, "albums": 0, "songs": 0, "playlists": 0, "likes": 0,
+                "followers": 0, "playlist_tracks": 0, "transactions": 0}
+
+    def id_checker(self, value) -> int:
+        """
+        Function to check if a input is a valid row id
+
+        Args:
+            value (int): Any id to be checked.
+                        Example: 1
+
+        Raises:
+            ValueError: If input is not a positive integer.
+        Returns:
+            value (int): The checked id
+                        Example: 1
+        """
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            logger.error("Input is not a valid id!")
+            raise ValueError("Id must be a positive integer.")
+
+        return value
+
+    def delete_user(self, user_id: int) -> dict:
+        """
+        Soft delete a user account and drop its likes and follows, lowering the like and follower counters.
+
+        Args:
+            user_id (int): User id. Example: 1
+
+        Returns:
+            dict: Rows marked or deleted per table and the number of transactions used.
+
+        Raises:
+            ValueError: If user_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs. Committed chunks stay, run it again to finish.
+        """
+        user_id = self.id_checker(user_id)
+        return self._run(f"user {user_id}", lambda: self._delete("Users", user_id, self._cascade_users))
+
+    def delete_artist(self, artist_id: int) -> dict:
+        """
+        Soft delete an artist, their albums and songs, and drop their followers, likes and playlist entries.
+
+        Args:
+            artist_id (int): Artist id. Example: 1
+
+        Returns:
+            dict: Rows marked or deleted per table and the number of transactions used.
+
+        Raises:
+            ValueError: If artist_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs. Committed chunks stay, run it again to finish.
+        """
+        artist_id = self.id_checker(artist_id)
+        return self._run(f"artist {artist_id}", lambda: self._delete("Artists", artist_id, self._cascade_artists))
+
+    def delete_album(self, album_id: int) -> dict:
+        """
+        Soft delete an album and its songs, and drop the songs likes and playlist entries.
+
+        Args:
+            album_id (int): Album id. Example: 1
+
+        Returns:
+            dict: Rows marked or deleted per table and the number of transactions used.
+
+        Raises:
+            ValueError: If album_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs. Committed chunks stay, run it again to finish.
+        """
+        album_id = self.id_checker(album_id)
+        return self._run(f"album {album_id}", lambda: self._delete("Albums", album_id, self._cascade_albums))
+
+    def delete_song(self, song_id: int) -> dict:
+        """
+        Soft delete a song and drop its likes and playlist entries.
+
+        Args:
+            song_id (int): Song id. Example: 2
+
+        Returns:
+            dict: Rows marked or deleted per table and the number of transactions used.
+
+        Raises:
+            ValueError: If song_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs. Committed chunks stay, run it again to finish.
+        """
+        song_id = self.id_checker(song_id)
+        return self._run(f"song {song_id}", lambda: self._delete("Songs", song_id, self._cascade_songs))
+
+    def delete_playlist(self, playlist_id: int) -> dict:
+        """
+        Soft delete a playlist and drop its tracks.
+
+        Args:
+            playlist_id (int): Playlist id. Example: 1
+
+        Returns:
+            dict: Rows marked or deleted per table and the number of transactions used.
+
+        Raises:
+            ValueError: If playlist_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs. Committed chunks stay, run it again to finish.
+        """
+        playlist_id = self.id_checker(playlist_id)
+        return self._run(f"playlist {playlist_id}", lambda: self._delete("Playlists", playlist_id, self._cascade_playlists))
+
+    def sweep(self, full=False) -> dict:
+        """
+        Finish the cascade of every user, artist, album, song and playlist deleted since the last sweep.
+
+        Picks rows by date_deletion, which the delete triggers stamp, and moves a watermark in
+        Job_watermarks afterwards. The first run, or full=True, goes over every deleted row.
+
+        Args:
+            full (bool): Ignore the watermark.
+
+        Returns:
+            dict: Rows marked or deleted per table and the number of transactions used.
+
+        Raises:
+            DatabaseConnectionError: If database error occurs. The watermark only moves after a complete sweep.
+        """
+        def sweep():
+            row = self._fetch_one("SELECT watermark FROM Job_watermarks WHERE job = %s;", (SWEEP_JOB, ))
+            since = None if full or row is None else row["watermark"]
+            upper = self._fetch_one("SELECT NOW() - INTERVAL %s SECOND AS upper_bound;", (SETTLE_SECONDS, ))["upper_bound"]
+
+            for table, cascade in (("Users", self._cascade_users), ("Artists", self._cascade_artists),
+                                   ("Albums", self._cascade_albums), ("Songs", self._cascade_songs),
+                                   ("Playlists", self._cascade_playlists)):
+                for ids in self._deleted_ids(table, since):
+                    cascade(ids)
+
+            self._write("""
+                    INSERT INTO Job_watermarks(job, watermark)
+                    VALUES(%s, %s)
+                    ON DUPLICATE KEY UPDATE watermark = VALUES(watermark);
+                    """, (SWEEP_JOB, upper))
+        return self._run("sweep", sweep)
+
+    def _run(self, name: str, steps) -> dict:
+        """
+        Run the steps of one cascade with fresh stats, turning driver errors into DatabaseConnectionError.
+        """
+        self.stats = self._new_stats()
+        try:
+            steps()
+        except mysql.connector.Error as err:
+            logger.error(f"Error cascading the delete of {name} after {self.stats} {err}")
+            raise DatabaseConnectionError(f"Error cascading the delete of {name} {err}")
+        logger.info(f"Delete of {name} cascaded: {self.stats}")
+        return dict(self.stats)
+
+    def _delete(self, table: str, id: int, cascade):
+        """
+        Mark one parent row, then cascade to what depends on it.
+        """
+        self._mark(table, [id])
+        cascade([id])
+
+    def _cascade_users(self, user_ids: list):
+        """
+        Drop the likes and follows of deleted users. Counters go down in the transaction of every chunk.
+        """
+        self._purge_counted("Likes", "user_id", "song_id", user_ids, "likes", "song_like_count")
+        self._purge_counted("Artists_followers", "user_id", "artist_id", user_ids, "followers", "artist_follower_count")
+        self._purge("Followers_users", "user_id1", user_ids, "followers")
+        self._purge("Followers_users", "user_id2", user_ids, "followers")
+
+    def _cascade_artists(self, artist_ids: list):
+        """
+        Drop the followers of deleted artists and cascade to their live albums.
+        """
+        self._purge("Artists_followers", "artist_id", artist_ids, "followers")
+        self._drop_counters("artist_follower_count", artist_ids)
+        placeholders = ", ".join(["%s"] * len(artist_ids))
+        for album_ids in self._live_ids("Albums", f"artist_id IN ({placeholders})", artist_ids):
+            self._mark("Albums", album_ids)
+            self._cascade_albums(album_ids)
+
+    def _cascade_albums(self, album_ids: list):
+        """
+        Mark the live songs of deleted albums chunk by chunk and cascade to them.
+        """
+        placeholders = ", ".join(["%s"] * len(album_ids))
+        for song_ids in self._live_ids("Songs", f"album_id IN ({placeholders})", album_ids):
+            self._mark("Songs", song_ids)
+            self._cascade_songs(song_ids)
+
+    def _cascade_songs(self, song_ids: list):
+        """
+        Drop the likes and playlist entries of deleted songs.
+        """
+        self._purge("Likes", "song_id", song_ids, "likes")
+        self._drop_counters("song_like_count", song_ids)
+
+        # Playlists keep existing, their track counters go down by the live entries removed
+        self._purge_counted("Playlist_tracks", "song_id", "playlists_id", song_ids, "playlist_tracks",
+                            "playlist_track_count")
+
+    def _cascade_playlists(self, playlist_ids: list):
+        """
+        Drop the tracks of deleted playlists.
+        """
+        self._purge("Playlist_tracks", "playlists_id", playlist_ids, "playlist_tracks")
+        self._drop_counters("playlist_track_count", playlist_ids)
+
+    def _mark(self, table: str, ids: list):
+        """
+        Mark live rows as deleted in one transaction. The delete trigger stamps date_deletion.
+        """
+        placeholders = ", ".join(["%s"] * len(ids))
+        marked = self._write(f"""
+                UPDATE {table}
+                SET deleted = 1
+                WHERE id IN ({placeholders}) AND deleted = 0;
+                """, tuple(ids))
+        self._chunk_done(table.lower(), marked, table)
+
+    def _purge(self, table: str, column: str, ids: list, stat: str):
+        """
+        Delete the rows referencing ids, at most chunk_size per transaction.
+        """
+        placeholders = ", ".join(["%s"] * len(ids))
+        query = f"""
+                DELETE FROM {table}
+                WHERE {column} IN ({placeholders})
+                LIMIT %s;
+                """
+        while True:
+            deleted = self._write(query, (*ids, self.chunk_size))
+            if deleted:
+                self._chunk_done(stat, deleted, table)
+            if deleted < self.chunk_size:
+                return
+
+    def _purge_counted(self, table: str, column: str, counted_column: str, ids: list, stat: str, counter: str):
+        """
+        Delete the rows referencing ids like _purge, and lower counter for the counted_column of every
+        live (action = 0) row removed, in the same transaction as the chunk.
+        """
+        placeholders = ", ".join(["%s"] * len(ids))
+        while True:
+            with self.db_manager.connection() as cursor:
+                cursor.execute(f"""
+                        SELECT {column}, {counted_column}, action FROM {table}
+                        WHERE {column} IN ({placeholders})
+                        LIMIT %s
+                        FOR UPDATE;
+                        """, (*ids, self.chunk_size))
+                rows = cursor.fetchall()
+                if rows:
+                    keys = ", ".join(["(%s, %s)"] * len(rows))
+                    cursor.execute(f"""
+                            DELETE FROM {table}
+                            WHERE ({column}, {counted_column}) IN ({keys});
+                            """, tuple(value for row in rows for value in (row[column], row[counted_column])))
+                    deltas = {}
+                    for row in rows:
+                        if row["action"] == 0:
+                            deltas[row[counted_column]] = deltas.get(row[counted_column], 0) - 1
+                    Counter_model(cursor).apply_deltas(counter, deltas)
+            self.stats["transactions"] += 1
+            if not rows:
+                return
+            self._chunk_done(stat, len(rows), table)
+            if len(rows) < self.chunk_size:
+                return
+
+    def _drop_counters(self, name: str, ids: list):
+        """
+        Delete the counter rows of deleted parents, reconcile() would count them as 0.
+        """
+        counter = COUNTERS[name]
+        placeholders = ", ".join(["%s"] * len(ids))
+        self._write(f"DELETE FROM {counter['table']} WHERE {counter['key']} IN ({placeholders});", tuple(ids))
+
+    def _live_ids(self, table: str, condition: str, params: list):
+        """
+        Yield ids of live rows matching condition, chunk_size at a time.
+        The caller marks every chunk before the next one is read, so the same query moves on.
+        """
+        query = f"""
+                SELECT id FROM {table}
+                WHERE {condition} AND deleted = 0
+                ORDER BY id
+                LIMIT %s;
+                """
+        while True:
+            ids = [row["id"] for row in self._fetch_all(query, (*params, self.chunk_size))]
+            if not ids:
+                return
+            yield ids
+
+    def _deleted_ids(self, table: str, since=None):
+        """
+        Yield ids of rows deleted since a date (every deleted row if None), chunk_size at a time by id.
+        """
+        condition = "deleted = 1" if since is None else "deleted = 1 AND date_deletion >= %s"
+        query = f"""
+                SELECT id FROM {table}
+                WHERE {condition} AND id > %s
+                ORDER BY id
+                LIMIT %s;
+                """
+        after = 0
+        while True:
+            params = (after, self.chunk_size) if since is None else (since, after, self.chunk_size)
+            ids = [row["id"] for row in self._fetch_all(query, params)]
+            if not ids:
+                return
+            yield ids
+            after = ids[-1]
+
+    def _chunk_done(self, stat: str, rows: int, table: str):
+        """
+        Count a committed chunk, drop the cached reads it changed and report progress.
+        """
+        self.stats[stat] += rows
+        if rows:
+            cache = get_catalog_cache()
+            for prefix in CACHE_PREFIXES.get(table, ()):
+                cache.delete_prefix(prefix)
+        if self.progress is not None:
+            self.progress(stat, dict(self.stats))
+        if self.stats["transactions"] % 100 == 0:
+            logger.info(f"Cascade progress: {self.stats}")
+
+    def _write(self, query: str, params: tuple) -> int:
+        with self.db_manager.connection() as cursor:
+            cursor.execute(query, params)
+            rowcount = cursor.rowcount
+        self.stats["transactions"] += 1
+        return rowcount
+
+    def _fetch_one(self, query: str, params=None):
+        rows = self._fetch_all(query, params)
+        return rows[0] if rows else None
+
+    def _fetch_all(self, query: str, params=None) -> list:
+        with self.db_manager.connection(buffered=True) as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+if __name__ == "__main__":
+    # Run from cron to cascade rows soft deleted through the other models
+    parser = argparse.ArgumentParser(description="Cascade soft deletes to albums, songs, likes, follows and playlist entries")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--user", type=int, help="Delete this user id")
+    target.add_argument("--artist", type=int, help="Delete this artist id")
+    target.add_argument("--album", type=int, help="Delete this album id")
+    target.add_argument("--song", type=int, help="Delete this song id")
+    target.add_argument("--playlist", type=int, help="Delete this playlist id")
+    parser.add_argument("--full", action="store_true", help="Sweep every deleted row, not only the ones since the last sweep")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Rows per transaction")
+    args = parser.parse_args()
+
+    db_config = {
+    'host': os.getenv('DB_HOST'),
+    'user': os.getenv('DB_USER'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_NAME')
+    }
+
+    db_manager = DatabaseManager(db_config=db_config)
+    try:
+        cascade_model = Cascade_model(db_manager, chunk_size=args.chunk_size)
+        if args.user:
+            cascade_model.delete_user(args.user)
+        elif args.artist:
+            cascade_model.delete_artist(args.artist)
+        elif args.album:
+            cascade_model.delete_album(args.album)
+        elif args.song:
+            cascade_model.delete_song(args.song)
+        elif args.playlist:
+            cascade_model.delete_playlist(args.playlist)
+        else:
+            cascade_model.sweep(full=args.full)
+    finally:
+        db_manager.close()
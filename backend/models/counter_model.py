@@ -0,0 +1,185 @@
+import os
+import argparse
+import logging
+import mysql.connector
+from dotenv import load_dotenv
+from pathlib import Path
+import sys
+
+base_path = Path(__file__).resolve().parent.parent.parent
+env_path = base_path / 'env_files' / 'special_detail.env'
+log_dir = base_path / 'logger'
+log_file =  log_dir / 'app.log'
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+from utils.errors import DatabaseConnectionError
+from backend.database_manager.database_manager import DatabaseManager
+
+# Setup a logger
+
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Connect to the env file and get system variables
+logger.info(f"Loading .env file from: {env_path}")
+load_dotenv(dotenv_path=env_path)
+
+# Counter -> side table, its key and count columns, the event table it counts and the table whose ids it covers.
+# Only rows with action = 0 (added) are counted.
+COUNTERS = {
+    "song_like_count": {
+        "table": "Song_like_counts", "key": "song_id", "count": "like_count",
+        "source": "Likes", "source_key": "song_id", "parent": "Songs",
+    },
+    "artist_follower_count": {
+        "table": "Artist_follower_counts", "key": "artist_id", "count": "follower_count",
+        "source": "Artists_followers", "source_key": "artist_id", "parent": "Artists",
+    },
+    "playlist_track_count": {
+        "table": "Playlist_track_counts", "key": "playlists_id", "count": "track_count",
+        "source": "Playlist_tracks", "source_key": "playlists_id", "parent": "Playlists",
+    },
+}
+
+class Counter_model:
+
+    def __init__(self, cursor):
+        """
+        Maintains the like, follower and playlist size counters.
+
+        Write paths call apply_deltas() on their own cursor, so a counter changes in the same
+        transaction as the rows it counts. Writes that bypass the models (triggers, manual SQL)
+        are corrected by reconcile().
+
+        Args:
+            cursor (mysql.connector.cursor_cext.CMySQLCursorDict): The database cursor.
+        """
+        self.cursor = cursor
+
+    def counter(self, name: str) -> dict:
+        """
+        Returns the configuration of a counter.
+
+        Raises:
+            InputError: If the counter is unknown.
+        """
+        if name not in COUNTERS:
+            logger.error(f"Unknown counter {name}")
+            raise InputError(f"Unknown counter {name}")
+        return COUNTERS[name]
+
+    def apply_deltas(self, name: str, deltas: dict):
+        """
+        Add deltas to a counter with one multi-row upsert. Not committed, like the write it belongs to.
+        Counts are clamped at 0, also when a negative delta hits an id that has no row yet.
+
+        Args:
+            name (str): Counter, key of COUNTERS. Example: "song_like_count"
+            deltas (dict): Id -> change of the count. Zero deltas are skipped.
+
+        Raises:
+            InputError: If the counter is unknown.
+            DatabaseConnectionError: If database error occurs.
+        """
+        counter = self.counter(name)
+        deltas = [(key, delta) for key, delta in sorted(deltas.items()) if delta]
+        if not deltas:
+            return
+
+        # The deltas come from a derived table so a new row gets the delta clamped at 0 while an
+        # existing row still adds the raw delta, a VALUES() row can only carry one of the two
+        rows = " UNION ALL ".join(["SELECT %s AS counter_key, %s AS delta"] + ["SELECT %s, %s"] * (len(deltas) - 1))
+        query = f"""
+                INSERT INTO {counter["table"]}({counter["key"]}, {counter["count"]})
+                SELECT d.counter_key, GREATEST(d.delta, 0) FROM ({rows}) AS d
+                ORDER BY d.counter_key
+                ON DUPLICATE KEY UPDATE {counter["count"]} = GREATEST({counter["count"]} + d.delta, 0)
+                """
+        try:
+            # Sorted keys so concurrent writers lock the counter rows in the same order
+            self.cursor.execute(query, tuple(value for row in deltas for value in row))
+        except mysql.connector.Error as err:
+            logger.error(f"Error updating {name} {err}")
+            raise DatabaseConnectionError(f"Error updating {name} {err}")
+
+    def reconcile(self, db_manager, name: str, chunk_size=1000) -> dict:
+        """
+        Recompute a counter from its event table, chunk by chunk of ids.
+
+        Every chunk is one short transaction on a pooled connection. INSERT ... SELECT share-locks the
+        counted rows, so writes to the chunk wait for it instead of being lost.
+
+        Args:
+            db_manager (DatabaseManager): Database manager to lease the connection from.
+            name (str): Counter, key of COUNTERS.
+            chunk_size (int): Ids recomputed per transaction.
+
+        Returns:
+            dict: Number of chunks and the affected rows reported by MySQL
+                (1 per missing counter row, 2 per corrected one, 0 when a count was right).
+
+        Raises:
+            InputError: If the counter is unknown or chunk_size is not a positive integer.
+            DatabaseConnectionError: If database error occurs.
+        """
+        counter = self.counter(name)
+        if not isinstance(chunk_size, int) or chunk_size < 1:
+            logger.error("chunk_size must be a positive integer")
+            raise InputError("chunk_size must be a positive integer")
+
+        query = f"""
+                INSERT INTO {counter["table"]}({counter["key"]}, {counter["count"]})
+                SELECT p.id, COUNT(e.{counter["source_key"]}) FROM {counter["parent"]} AS p
+                LEFT JOIN {counter["source"]} AS e ON e.{counter["source_key"]} = p.id AND e.action = 0
+                WHERE p.id > %s AND p.id <= %s
+                GROUP BY p.id
+                ON DUPLICATE KEY UPDATE {counter["count"]} = VALUES({counter["count"]})
+                """
+        try:
+            self.cursor.execute(f"SELECT COALESCE(MAX(id), 0) AS max_id FROM {counter['parent']}")
+            max_id = self.cursor.fetchone()["max_id"]
+
+            stats = {"chunks": 0, "affected_rows": 0}
+            for lower in range(0, max_id, chunk_size):
+                with db_manager.connection() as cursor:
+                    cursor.execute(query, (lower, lower + chunk_size))
+                    stats["affected_rows"] += cursor.rowcount
+                stats["chunks"] += 1
+                if stats["chunks"] % 100 == 0:
+                    logger.info(f"Reconciling {name}: {lower + chunk_size}/{max_id} ids")
+            logger.info(f"{name} reconciled in {stats['chunks']} chunks, {stats['affected_rows']} affected rows")
+            return stats
+        except mysql.connector.Error as err:
+            logger.error(f"Error reconciling {name} {err}")
+            raise DatabaseConnectionError(f"Error reconciling {name} {err}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute counters that drifted from their event tables")
+    parser.add_argument("--counters", nargs="+", default=list(COUNTERS), help="Counters to reconcile")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Ids per transaction")
+    args = parser.parse_args()
+
+    db_config = {
+    'host': os.getenv('DB_HOST'),
+    'user': os.getenv('DB_USER'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_NAME')
+    }
+
+    db_manager = DatabaseManager(db_config=db_config)
+    try:
+        counter_model = Counter_model(db_manager.get_cursor())
+        for name in args.counters:
+            counter_model.reconcile(db_manager, name, chunk_size=args.chunk_size)
+    finally:
+        db_manager.close()
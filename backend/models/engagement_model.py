@@ -0,0 +1,391 @@
+import os
+import logging
+import threading
+import time
+import mysql.connector
+from collections import deque
+from dotenv import load_dotenv
+from pathlib import Path
+import sys
+
+base_path = Path(__file__).resolve().parent.parent.parent
+env_path = base_path / 'env_files' / 'special_detail.env'
+log_dir = base_path / 'logger'
+log_file =  log_dir / 'app.log'
+
+sys.path.append(str(base_path))
+
+from utils.errors import DatabaseConnectionError
+from backend.database_manager.database_manager import DatabaseManager
+from backend.models.counter_model import Counter_model
+
+# Setup a logger
+
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Connect to the env file and get system variables
+logger.info(f"Loading .env file from: {env_path}")
+load_dotenv(dotenv_path=env_path)
+
+# Values of the action column, see schema.sql
+ADDED = 0
+DELETED = 1
+
+# Event kind -> (table, key columns)
+ENGAGEMENT_TABLES = {
+    "like": ("Likes", ("user_id", "song_id")),
+    "artist_follow": ("Artists_followers", ("user_id", "artist_id")),
+    "user_follow": ("Followers_users", ("user_id1", "user_id2")),
+}
+# Counter of the target (second key column) kept in step by every flush, see counter_model.py
+ENGAGEMENT_COUNTERS = {
+    "like": "song_like_count",
+    "artist_follow": "artist_follower_count",
+}
+# Errors no retry can fix (unknown user or song, out of range values), the events causing them are dropped.
+# Everything else (lost connection, lock wait timeout, deadlock) is retried on the next flush.
+PERMANENT_ERRORS = (mysql.connector.IntegrityError, mysql.connector.DataError)
+# Rows per multi-row INSERT of a flush
+WRITE_CHUNK_SIZE = 500
+
+class Engagement_model:
+
+    def __init__(self, db_manager, flush_size=500, flush_interval=1.0, max_pending=10000, put_timeout=5.0,
+                 max_retries=5, max_dead_letters=1000):
+        """
+        Like and follow events written through an in-process buffer.
+
+        Events are keyed by (kind, user, target), so toggling the same like several times before a flush
+        only writes the last state. A background thread flushes the buffer with one batched upsert per table
+        when flush_size keys are pending or flush_interval seconds passed. Rows are never deleted, the action
+        column records the last state and the date column when it last changed, stamped by the database.
+        Like and follower counters are updated in the same transaction, see counter_model.py.
+
+        A batch failing with an IntegrityError or DataError is split until the events causing it are found,
+        those are dropped into dead_letters and the rest is written. Other failures put the batch back,
+        an event that failed max_retries flushes is dropped the same way.
+
+        Unlike the other models writes dont go through the callers cursor, every flush commits on its own
+        pooled connection. Call flush() when a write has to be visible right away and close() on shutdown.
+
+        Args:
+            db_manager (DatabaseManager): Database manager whose pool the flushes use.
+            flush_size (int): Pending keys that trigger a flush.
+            flush_interval (float): Maximum seconds an event waits in the buffer.
+            max_pending (int): Bound of the buffer, recording a new key blocks while it is full.
+            put_timeout (float): Seconds a recording call waits for room before giving up.
+            max_retries (int): Failed flushes an event is put back for before it is dropped.
+            max_dead_letters (int): Dropped events kept in dead_letters, oldest are forgotten first.
+        """
+        self.db_manager = db_manager
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+
+        # (kind, first_id, second_id) -> (action, failed flushes)
+        self._pending = {}
+        # (key, action, error) of dropped events
+        self.dead_letters = deque(maxlen=max_dead_letters)
+        self._condition = threading.Condition()
+        # Serializes writes so an older batch never lands after a newer one
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self.stats = {"recorded": 0, "coalesced": 0, "flushes": 0, "flushed_rows": 0, "failed_flushes": 0, "waits": 0,
+                      "dead_letters": 0}
+
+        self._flusher = threading.Thread(target=self._run, name="engagement-flusher", daemon=True)
+        self._flusher.start()
+
+    def id_checker(self, value) -> int:
+        """
+        Function to check if a input is a valid row id
+
+        Args:
+            value (int): Any id to be checked.
+                        Example: 1
+
+        Raises:
+            ValueError: If input is not a positive integer.
+        Returns:
+            value (int): The checked id
+                        Example: 1
+        """
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            logger.error("Input is not a valid id!")
+            raise ValueError("Id must be a positive integer.")
+
+        return value
+
+    def like(self, user_id: int, song_id: int):
+        """
+        Records that a user liked a song.
+
+        Raises:
+            ValueError: If an id is not a positive integer.
+            DatabaseConnectionError: If the buffer stays full for put_timeout seconds.
+        """
+        self._record("like", user_id, song_id, ADDED)
+
+    def unlike(self, user_id: int, song_id: int):
+        """
+        Records that a user removed a like.
+        """
+        self._record("like", user_id, song_id, DELETED)
+
+    def follow_artist(self, user_id: int, artist_id: int):
+        """
+        Records that a user follows an artist.
+        """
+        self._record("artist_follow", user_id, artist_id, ADDED)
+
+    def unfollow_artist(self, user_id: int, artist_id: int):
+        """
+        Records that a user stopped following an artist.
+        """
+        self._record("artist_follow", user_id, artist_id, DELETED)
+
+    def follow_user(self, user_id: int, followed_user_id: int):
+        """
+        Records that a user follows another user.
+        """
+        self._record("user_follow", user_id, followed_user_id, ADDED)
+
+    def unfollow_user(self, user_id: int, followed_user_id: int):
+        """
+        Records that a user stopped following another user.
+        """
+        self._record("user_follow", user_id, followed_user_id, DELETED)
+
+    def _record(self, kind: str, first_id: int, second_id: int, action: int):
+        """
+        Put one event into the buffer, overwriting a pending event of the same key.
+
+        Raises:
+            ValueError: If an id is not a positive integer.
+            DatabaseConnectionError: If the buffer is closed or stays full for put_timeout seconds.
+        """
+        key = (kind, self.id_checker(first_id), self.id_checker(second_id))
+        deadline = time.monotonic() + self.put_timeout
+
+        with self._condition:
+            if self._closed:
+                raise DatabaseConnectionError("Engagement buffer is closed")
+
+            # Coalescing into a pending key never needs room, only new keys wait
+            if key not in self._pending and len(self._pending) >= self.max_pending:
+                self.stats["waits"] += 1
+                self._condition.notify_all()
+                while key not in self._pending and len(self._pending) >= self.max_pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._closed:
+                        logger.error(f"Engagement buffer full after waiting {self.put_timeout}s")
+                        raise DatabaseConnectionError(f"Engagement buffer full after waiting {self.put_timeout}s")
+                    self._condition.wait(remaining)
+
+            if key in self._pending:
+                self.stats["coalesced"] += 1
+            self._pending[key] = (action, 0)
+            self.stats["recorded"] += 1
+            if len(self._pending) >= self.flush_size:
+                self._condition.notify_all()
+
+    def _run(self):
+        """
+        Background loop flushing on size or time.
+        """
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._closed and len(self._pending) < self.flush_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except DatabaseConnectionError:
+                # Already logged and requeued, retried on the next interval
+                time.sleep(self.flush_interval)
+            except Exception as err:
+                # Requeued too, the thread has to survive or every _record blocks once the buffer is full
+                logger.exception(f"Unexpected error in the engagement flusher {err}")
+                time.sleep(self.flush_interval)
+
+    def flush(self) -> int:
+        """
+        Write every pending event now, one batched upsert per table in one transaction.
+
+        Returns:
+            int: Number of rows written.
+
+        Raises:
+            DatabaseConnectionError: If the write fails for a reason a retry can fix. The events go back
+                        into the buffer unless newer events for the same keys arrived meanwhile.
+        """
+        with self._flush_lock:
+            with self._condition:
+                batch, self._pending = self._pending, {}
+                # Room freed, wake callers waiting on back-pressure
+                self._condition.notify_all()
+            if not batch:
+                return 0
+
+            try:
+                written = self._write_split(list(batch.items()))
+            except (mysql.connector.Error, DatabaseConnectionError) as err:
+                # Parts already written are written again on the retry, the upsert and counters are idempotent
+                self._requeue(batch, err)
+                logger.error(f"Error flushing {len(batch)} engagement events {err}")
+                raise DatabaseConnectionError(f"Error flushing engagement events {err}")
+            except Exception as err:
+                # Not a database error, e.g. a bug in write_batch, the retry cap still ends up dropping the events
+                self._requeue(batch, err)
+                raise
+
+            with self._condition:
+                self.stats["flushes"] += 1
+                self.stats["flushed_rows"] += written
+            logger.info(f"Flushed {written} engagement events")
+            return written
+
+    def _write_split(self, items: list) -> int:
+        """
+        Write items in one transaction, halving them on a permanent error until the bad events are isolated.
+
+        Returns:
+            int: Number of rows written.
+        """
+        try:
+            with self.db_manager.connection() as cursor:
+                self.write_batch(cursor, {key: action for key, (action, _) in items})
+            return len(items)
+        except PERMANENT_ERRORS as err:
+            if len(items) == 1:
+                key, (action, _) = items[0]
+                self._dead_letter(key, action, err)
+                return 0
+            middle = len(items) // 2
+            return self._write_split(items[:middle]) + self._write_split(items[middle:])
+
+    def _requeue(self, batch: dict, err):
+        """
+        Put a failed batch back, keeping newer events of the same keys and dropping events out of retries.
+        """
+        with self._condition:
+            for key, (action, attempts) in batch.items():
+                if key in self._pending:
+                    continue
+                if attempts + 1 >= self.max_retries:
+                    self._dead_letter(key, action, err)
+                else:
+                    self._pending[key] = (action, attempts + 1)
+            self.stats["failed_flushes"] += 1
+
+    def _dead_letter(self, key: tuple, action: int, err):
+        logger.error(f"Dropping engagement event {key} action {action}: {err}")
+        # _condition is reentrant, _requeue already holds it while _write_split does not
+        with self._condition:
+            self.dead_letters.append((key, action, str(err)))
+            self.stats["dead_letters"] += 1
+
+    def write_batch(self, cursor, batch: dict):
+        """
+        Upsert a batch of coalesced events.
+
+        date is set by the database when a row is inserted or its action changes, so repeating
+        the current state neither moves it nor makes Trending_model.roll_up count it again.
+
+        Args:
+            cursor (mysql.connector.cursor_cext.CMySQLCursorDict): Cursor of the flush transaction.
+            batch (dict): (kind, first_id, second_id) -> action.
+        """
+        rows_by_kind = {}
+        for (kind, first_id, second_id), action in batch.items():
+            rows_by_kind.setdefault(kind, []).append((first_id, second_id, action))
+
+        for kind, rows in rows_by_kind.items():
+            table, (first_column, second_column) = ENGAGEMENT_TABLES[kind]
+            counter = ENGAGEMENT_COUNTERS.get(kind)
+            if counter is not None:
+                deltas = self._count_deltas(cursor, table, first_column, second_column, rows)
+            for start in range(0, len(rows), WRITE_CHUNK_SIZE):
+                chunk = rows[start:start + WRITE_CHUNK_SIZE]
+                placeholders = ", ".join(["(%s, %s, NOW(), %s)"] * len(chunk))
+                # date is assigned before action, so the IF still sees the stored action
+                query = f"""
+                        INSERT INTO {table}({first_column}, {second_column}, date, action)
+                        VALUES {placeholders}
+                        ON DUPLICATE KEY UPDATE date = IF(action <> VALUES(action), NOW(), date), action = VALUES(action)
+                        """
+                cursor.execute(query, tuple(value for row in chunk for value in row))
+            if counter is not None:
+                Counter_model(cursor).apply_deltas(counter, deltas)
+
+    def _count_deltas(self, cursor, table: str, first_column: str, second_column: str, rows: list, chunk_size=500) -> dict:
+        """
+        Change of the target counters the rows cause, from the stored state of every key.
+
+        The stored rows are locked until the flush commits, so a concurrent writer cant count the same change.
+
+        Returns:
+            dict: Target id -> +1 / -1 per row switching between added and deleted.
+        """
+        stored = {}
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            placeholders = ", ".join(["(%s, %s)"] * len(chunk))
+            cursor.execute(f"""
+                    SELECT {first_column} AS first_id, {second_column} AS second_id, action FROM {table}
+                    WHERE ({first_column}, {second_column}) IN ({placeholders})
+                    FOR UPDATE
+                    """, tuple(value for row in chunk for value in row[:2]))
+            stored.update({(row["first_id"], row["second_id"]): row["action"] for row in cursor.fetchall()})
+
+        deltas = {}
+        for first_id, second_id, action in rows:
+            was_added = stored.get((first_id, second_id)) == ADDED
+            is_added = action == ADDED
+            if was_added != is_added:
+                deltas[second_id] = deltas.get(second_id, 0) + (1 if is_added else -1)
+        return deltas
+
+    def get_stats(self) -> dict:
+        """
+        Get the buffer metrics.
+
+        Returns:
+            dict: recorded, coalesced, flushes, flushed_rows, failed_flushes, waits, dead_letters and pending.
+        """
+        with self._condition:
+            return {**self.stats, "pending": len(self._pending)}
+
+    def close(self):
+        """
+        Stop the background thread and write what is still pending.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._flusher.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
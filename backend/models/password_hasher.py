@@ -0,0 +1,205 @@
+from pathlib import Path
+# Define paths
+base_path = Path(__file__).resolve().parent.parent.parent
+log_dir = base_path / 'logger'
+log_file = log_dir / 'app.log'
+
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import bcrypt
+
+# Setup a logger
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+
+DEFAULT_ROUNDS = 12
+
+def _hash_password(password: str, rounds: int) -> bytes:
+    """
+    Hash one password. Module level so the process pool can pickle it.
+    """
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds))
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Check one password against its hash.
+    """
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password)
+
+class PasswordHasher:
+    def __init__(self, rounds=DEFAULT_ROUNDS, max_workers=None):
+        """
+        Bcrypt hashing service backed by a process pool.
+
+        bcrypt is CPU bound, so bulk registration and password rotation spread the work
+        over one process per core. Login checks run on a thread pool instead: bcrypt releases
+        the GIL while it works and a thread avoids pickling on every login. Pools are started on first use.
+
+        Args:
+            rounds (int): bcrypt cost factor (log2 of the number of rounds), between 4 and 31.
+            max_workers (int): Number of worker processes. Defaults to the number of cores.
+
+        Raises:
+            InputError: If rounds is outside of the range bcrypt supports.
+        """
+        if not 4 <= rounds <= 31:
+            logger.error("bcrypt rounds must be between 4 and 31")
+            raise InputError("bcrypt rounds must be between 4 and 31")
+
+        self.rounds = rounds
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = None
+        self._verify_executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                logger.info(f"Password hashing pool started with {self.max_workers} workers")
+        return self._executor
+
+    def hash_password(self, password: str) -> bytes:
+        """
+        Hash a single password in the calling process.
+
+        Args:
+            password (str): Unhashed password.
+
+        Returns:
+            bytes: Hashed password.
+        """
+        return _hash_password(password, self.rounds)
+
+    def hash_many(self, passwords: list) -> list:
+        """
+        Hash a batch of passwords on the process pool.
+
+        Args:
+            passwords (list): Unhashed passwords.
+
+        Returns:
+            list: Hashed passwords in input order.
+        """
+        if not passwords:
+            return []
+
+        # Hand every worker a few passwords per task to keep the IPC overhead low
+        chunksize = max(1, len(passwords) // (self.max_workers * 4))
+        return list(self._get_executor().map(_hash_password, passwords, repeat(self.rounds), chunksize=chunksize))
+
+    def verify_future(self, plain_password: str, hashed_password: str) -> Future:
+        """
+        Check a password against a hash on the verification thread pool.
+
+        Args:
+            plain_password (str): User's plain text password.
+            hashed_password (str): Stored hashed password.
+
+        Returns:
+            concurrent.futures.Future: Resolves to True if the password matches.
+        """
+        if self._verify_executor is None:
+            with self._lock:
+                if self._verify_executor is None:
+                    self._verify_executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt-verify")
+        return self._verify_executor.submit(_verify_password, plain_password, hashed_password)
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Awaitable variant of verify_future for asyncio callers.
+
+        Args:
+            plain_password (str): User's plain text password.
+            hashed_password (str): Stored hashed password.
+
+        Returns:
+            bool: True if the password matches, False otherwise.
+        """
+        return await asyncio.wrap_future(self.verify_future(plain_password, hashed_password))
+
+    def close(self):
+        """
+        Shut the hashing and verification pools down.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._verify_executor is not None:
+            self._verify_executor.shutdown()
+            self._verify_executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def benchmark(count=200, rounds=DEFAULT_ROUNDS, max_workers=None) -> dict:
+    """
+    Measures hashing throughput on one core and on the whole pool.
+
+    Args:
+        count (int): Number of passwords hashed per run.
+        rounds (int): bcrypt cost factor.
+        max_workers (int): Pool size. Defaults to the number of cores.
+
+    Returns:
+        dict: Hashes per second for a single core and for the pool, and the pool rate per core.
+    """
+    passwords = [f"password-{i}" for i in range(count)]
+
+    with PasswordHasher(rounds=rounds, max_workers=max_workers) as hasher:
+        single_count = max(1, count // hasher.max_workers)
+        start = time.perf_counter()
+        for password in passwords[:single_count]:
+            hasher.hash_password(password)
+        single_rate = single_count / (time.perf_counter() - start)
+
+        # Warm the pool up so process start-up is not measured
+        hasher.hash_many(passwords[:hasher.max_workers])
+        start = time.perf_counter()
+        hasher.hash_many(passwords)
+        pool_rate = count / (time.perf_counter() - start)
+
+        return {
+            "rounds": rounds,
+            "workers": hasher.max_workers,
+            "single_core_hashes_per_sec": round(single_rate, 2),
+            "pool_hashes_per_sec": round(pool_rate, 2),
+            "pool_hashes_per_sec_per_core": round(pool_rate / hasher.max_workers, 2),
+        }
+
+# Shared hasher for login checks so every User_model uses the same verification pool
+default_hasher = PasswordHasher()
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="bcrypt hashing throughput benchmark")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    print(benchmark(count=args.count, rounds=args.rounds, max_workers=args.workers))
@@ -20,6 +20,7 @@ sys.path.append(str(base_path))
 from utils.errors import InputError
 from utils.errors import DatabaseConnectionError
 from backend.database_manager.database_manager import DatabaseManager
+from backend.database_manager.schema_registry import schema_registry
 
 
 # Setup a logger
@@ -53,8 +54,8 @@ class Payment_model:
         try:
             self.cursor = cursor
             self.db_man = db_man
-            self.cursor.execute("SHOW COLUMNS FROM User_subscriptions;")
-            self.table_columns = self.cursor.fetchall()
+            self.user_model = None
+            self.table_columns = schema_registry.get_columns(self.cursor, "User_subscriptions")
             self.table_columns_list = [col["Field"] for col in self.table_columns]
             logger.info("Connection to the database succesful")
         except mysql.connector.Error as err:
@@ -89,6 +90,26 @@ class Payment_model:
 
         return string_stripped
 
+    def id_checker(self, value) -> int:
+        """
+        Function to check if a input is a valid row id
+
+        Args:
+            value (int): Any id to be checked.
+                        Example: 1
+
+        Raises:
+            ValueError: If input is not a positive integer.
+        Returns:
+            value (int): The checked id
+                        Example: 1
+        """
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            logger.error("Input is not a valid id!")
+            raise ValueError("Id must be a positive integer.")
+
+        return value
+
     def check_if_input_cols_match(self, table_columns: list, input_columns: list, exclude_columns = None, exact_match=True):
         """
         Checks if columns that want to be inputed match the table columns raises a InputError if not.
@@ -127,8 +148,7 @@ class Payment_model:
             InputError: If the input data is incorrect.
         """
         try:
-            self.cursor.execute("SHOW COLUMNS FROM Payments;")
-            table_columns = self.cursor.fetchall()
+            table_columns = schema_registry.get_columns(self.cursor, "Payments")
             table_columns_list = [col["Field"] for col in table_columns]
             exclude_cols = ["id", "date"]
             self.check_if_input_cols_match(table_columns=table_columns_list, input_columns=payment_info.keys(), exclude_columns=exclude_cols, exact_match=True)
@@ -222,8 +242,10 @@ class Payment_model:
         Args:
             username (str): Users username
         """
-        user_model = User_model(self.cursor)
-        user_model.update_user_details(updated_info={"user_type": "premium"}, username=username)
+        # Reuse one User_model per Payment_model instead of building one per purchase
+        if self.user_model is None:
+            self.user_model = User_model(self.cursor)
+        self.user_model.update_user_details(updated_info={"user_type": "premium"}, username=username)
 
     def subscription_plan_purchase(self, subscription_info: dict):
         """
@@ -292,6 +314,33 @@ class Payment_model:
             logger.error(f"Error connecting to the database: {err}")
             raise DatabaseConnectionError(f"Error connecting to the database: {err}")
 
+    def fetch_users_subscription_plan_by_id(self, user_id: int) -> list:
+        """
+        Fetches users subsription plan and when it expires by the user id
+
+        Args:
+            user_id(int): Users id
+
+        Raises:
+            ValueError: If user_id is not a positive integer
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            user_id = self.id_checker(user_id)
+            query = """
+                    SELECT u.username AS Username, s.plan_name AS Subscription_plan, us.expiration_date AS Expritaion_date
+                    FROM Users AS u
+                    JOIN User_subscriptions AS us ON u.id = us.user_id
+                    JOIN Subscription_plan_info AS s ON s.id = us.subscription_plan_id
+                    WHERE us.user_id = %s
+                    """
+            self.cursor.execute(query, (user_id, ))
+            user_subscription_info = self.cursor.fetchall()
+            return user_subscription_info
+        except mysql.connector.Error as err:
+            logger.error(f"Error connecting to the database: {err}")
+            raise DatabaseConnectionError(f"Error connecting to the database: {err}")
+
     def fetch_payment_details(self, username: str) -> list:
         """
         Fetches users payment details.
@@ -318,6 +367,32 @@ class Payment_model:
             logger.error(f"Error connecting to the database: {err}")
             raise DatabaseConnectionError(f"Error connecting to the database: {err}")
 
+    def fetch_payment_details_by_id(self, user_id: int) -> list:
+        """
+        Fetches users payment details by the user id.
+
+        Args:
+            user_id(int): Users id
+
+        Raises:
+            ValueError: If user_id is not a positive integer
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            user_id = self.id_checker(user_id)
+            query = """
+                    SELECT u.username AS Username, p.date AS Payment_date, p.money_value AS Total
+                    FROM Users AS u
+                    JOIN Payments AS p ON u.id = p.user_id
+                    WHERE p.user_id = %s
+                    """
+            self.cursor.execute(query, (user_id, ))
+            user_payment_info = self.cursor.fetchall()
+            return user_payment_info
+        except mysql.connector.Error as err:
+            logger.error(f"Error connecting to the database: {err}")
+            raise DatabaseConnectionError(f"Error connecting to the database: {err}")
+
 
 if __name__ == "__main__":
 
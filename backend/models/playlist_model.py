@@ -1,4 +1,5 @@
 import os
+import bisect
 import logging
 import mysql.connector
 from dotenv import load_dotenv
@@ -15,6 +16,12 @@ sys.path.append(str(base_path))
 from utils.errors import InputError
 from utils.errors import DatabaseConnectionError
 from backend.database_manager.database_manager import DatabaseManager
+from backend.database_manager.schema_registry import schema_registry
+from backend.database_manager.pagination import check_page_args
+from backend.cache.catalog_cache import get_catalog_cache
+from backend.database_manager.after_commit import after_commit
+from backend.cache.local_cache import MISSING
+from backend.models.counter_model import Counter_model
 
 # Setup a logger
 
@@ -33,22 +40,45 @@ logger = logging.getLogger(__name__)
 logger.info(f"Loading .env file from: {env_path}")
 load_dotenv(dotenv_path=env_path)
 
+# Distance between the order keys of neighbouring tracks. A move takes the midpoint of its new
+# neighbours, so a playlist absorbs about log2(ORDER_GAP) moves into the same spot before rebalance_playlist.
+ORDER_GAP = 1024
+# Rows per multi-row INSERT / DELETE of the bulk playlist methods
+PLAYLIST_CHUNK_SIZE = 500
+
+# Song, album and artist fields of a playlist in playlist order, after a (order, song_id) position.
+# Served by the (playlists_id, order) index, the song_id tie breaker is part of that index through the primary key.
+PLAYLIST_TRACKS_QUERY = """
+                SELECT plt.`order`, plt.song_id, s.name AS song_name, s.album_id, al.name AS album_name,
+                    s.artist_id, ar.name AS artist_name
+                FROM Playlist_tracks AS plt
+                JOIN non_deleted_playlists AS pl ON pl.id = plt.playlists_id
+                JOIN non_deleted_songs AS s ON s.id = plt.song_id
+                JOIN Albums AS al ON al.id = s.album_id
+                JOIN Artists AS ar ON ar.id = s.artist_id
+                WHERE plt.playlists_id = %s AND (plt.`order` > %s OR (plt.`order` = %s AND plt.song_id > %s))
+                ORDER BY plt.`order`, plt.song_id
+                LIMIT %s;
+                """
+
 class Playlist_model:
 
-    def __init__(self, cursor):
+    def __init__(self, cursor, statements=None):
         """
         Initialize the Playlist_model class with database configuration.
 
         Args:
             cursor (mysql.connector.cursor_cext.CMySQLCursorDict): The database cursor.
+            statements (StatementRegistry): Prepared statements of the cursors connection, see DatabaseManager.prepared_connection.
+                        If None statements are sent as plain text.
 
         Raises:
                 DatabaseConnectionError: If connection to the database fails.
         """
         try:
             self.cursor = cursor
-            self.cursor.execute("SHOW COLUMNS FROM Playlists;")
-            self.table_columns = self.cursor.fetchall()
+            self.statements = statements
+            self.table_columns = schema_registry.get_columns(self.cursor, "Playlists")
             logger.info("Database connection established successfully.")
         except mysql.connector.Error as err:
             logger.error(f"Error connecting to the database: {err}")
@@ -83,6 +113,26 @@ class Playlist_model:
 
         return string_stripped
 
+    def id_checker(self, value) -> int:
+        """
+        Function to check if a input is a valid row id
+
+        Args:
+            value (int): Any id to be checked.
+                        Example: 1
+
+        Raises:
+            ValueError: If input is not a positive integer.
+        Returns:
+            value (int): The checked id
+                        Example: 1
+        """
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            logger.error("Input is not a valid id!")
+            raise ValueError("Id must be a positive integer.")
+
+        return value
+
     def check_if_input_cols_match(self, table_columns: list, input_columns: list, exclude_columns = None, exact_match=True):
         """
         Checks if columns that want to be inputed match the table columns raises a InputError if not.
@@ -107,8 +157,42 @@ class Playlist_model:
         
         if not exact_match and not set([input_columns]).issubset(set(table_columns_filtered)):
             logger.error("Inputed columns that are not in the table schema!")
-            raise InputError("Inputed columns that are not in the table schema!") 
-        
+            raise InputError("Inputed columns that are not in the table schema!")
+
+    def execute_statement(self, key: tuple, query: str, values: tuple):
+        """
+        Runs a write statement, as a server-side prepared statement when the model has a statement registry.
+
+        Args:
+            key (tuple): Table, operation and columns identifying the statement text.
+            query (str): SQL with %s placeholders.
+            values (tuple): Parameters of the statement.
+        """
+        if self.statements is None:
+            self.cursor.execute(query, values)
+        else:
+            self.statements.execute(key, query, values)
+
+    def invalidate_playlist_cache(self, playlist_id=None):
+        """
+        Drop cached playlist snapshots a write can change, now and again once the write commits.
+
+        Args:
+            playlist_id (int): Playlist whose tracks changed. Drops every snapshot if None.
+        """
+        self._drop_playlist_cache(playlist_id)
+        after_commit(self.cursor, lambda: self._drop_playlist_cache(playlist_id))
+
+    def _drop_playlist_cache(self, playlist_id=None):
+        """
+        Delete the playlist snapshot keys, see invalidate_playlist_cache.
+        """
+        cache = get_catalog_cache()
+        if playlist_id is None:
+            cache.delete_prefix("playlist_tracks:")
+        else:
+            cache.delete(f"playlist_tracks:{playlist_id}")
+
     def add_new_playlist(self, playlist_info: dict):
         """
         Inserts a playlist into the Playlists database.
@@ -135,7 +219,7 @@ class Playlist_model:
                         VALUES({placeholders});
                     """
             playlists_tuple = tuple(playlist_info.values())
-            self.cursor.execute(query, playlists_tuple)
+            self.execute_statement(("Playlists", "insert", tuple(playlist_info.keys())), query, playlists_tuple)
             logger.info(f"New song added {playlist_info["name"]}")
         except mysql.connector.Error as err:
             logger.error(f"Error when createing a new song {err}")
@@ -158,11 +242,23 @@ class Playlist_model:
             if type != "song":
                 table = "Playlists_users"
             type = self.string_checker(type)
-            query = f"""
-                    INSERT INTO {table}(playlists_id, {type}_id)
-                    VALUES(%s, %s)
-                    """
-            self.cursor.execute(query, (playlist_id, id))
+            if table == "Playlist_tracks":
+                self._lock_playlist(playlist_id)
+                # New songs go to the end, MAX is read from the (playlists_id, order) index
+                query = """
+                        INSERT INTO Playlist_tracks(playlists_id, song_id, `order`)
+                        SELECT %s, %s, COALESCE(MAX(`order`), 0) + %s FROM Playlist_tracks
+                        WHERE playlists_id = %s
+                        """
+                self.cursor.execute(query, (playlist_id, id, ORDER_GAP, playlist_id))
+                Counter_model(self.cursor).apply_deltas("playlist_track_count", {playlist_id: self.cursor.rowcount})
+                self.invalidate_playlist_cache(playlist_id)
+            else:
+                query = f"""
+                        INSERT INTO {table}(playlists_id, {type}_id)
+                        VALUES(%s, %s)
+                        """
+                self.cursor.execute(query, (playlist_id, id))
             logger.info(f"New song added to the playlist {playlist_id}")
         except mysql.connector.Error as err:
             logger.error(f"Databse connection failed {err}")
@@ -190,11 +286,272 @@ class Playlist_model:
                     WHERE playlists_id = %s AND {type}_id = %s
                     """
             self.cursor.execute(query, (playlist_id, id))
+            if table == "Playlist_tracks":
+                Counter_model(self.cursor).apply_deltas("playlist_track_count", {playlist_id: -self.cursor.rowcount})
+                self.invalidate_playlist_cache(playlist_id)
             logger.info(f"Song removed from the playlist {playlist_id}")
         except mysql.connector.Error as err:
             logger.error(f"Databse connection failed {err}")
             raise DatabaseConnectionError(f"Databse connection failed {err}")
 
+    def _lock_playlist(self, playlist_id):
+        """
+        Lock the Playlists row until commit. Every write that picks order keys takes this lock first,
+        so writers of one playlist queue up instead of deadlocking on gap locks of Playlist_tracks
+        or picking the same key.
+        """
+        self.cursor.execute("SELECT id FROM Playlists WHERE id = %s FOR UPDATE", (playlist_id, ))
+        self.cursor.fetchall()
+
+    def _playlist_link(self, type: str) -> tuple:
+        """
+        Returns the table and id column behind a playlist member type.
+
+        Raises:
+            InputError: If type is not song or user.
+        """
+        type = self.string_checker(type)
+        if type == "song":
+            return "Playlist_tracks", "song_id"
+        if type == "user":
+            return "Playlists_users", "user_id"
+        logger.error("type must be song or user")
+        raise InputError("type must be song or user")
+
+    def add_many_to_playlist(self, ids: list, playlist_id: int, type: str, chunk_size=PLAYLIST_CHUNK_SIZE) -> int:
+        """
+        Adds many songs or users to a playlist with multi-row INSERT statements.
+
+        Songs are appended in the given order, ORDER_GAP apart. Ids already in the playlist are skipped,
+        unknown ids fail the whole call. Nothing is committed, run it inside db_manager.connection() or commit once afterwards
+        so the whole import is one transaction.
+
+        Args:
+            ids (list): Song or user ids.
+            playlist_id (int): Playlist id.
+            type (string): Either song or user.
+            chunk_size (int): Rows per INSERT statement.
+        Returns:
+            added (int): Number of rows inserted.
+        Raises:
+            ValueError: If an id is not a positive integer.
+            InputError: If type is not song or user.
+            DatabaseConnectionError: If database error occurs during the database creation,
+                        e.g. an id that is not a song or user.
+        """
+        playlist_id = self.id_checker(playlist_id)
+        table, column = self._playlist_link(type)
+        # Duplicates would collide on the primary key, keep the first position of each id
+        ids = list(dict.fromkeys(self.id_checker(value) for value in ids))
+        if not ids:
+            return 0
+
+        try:
+            if table == "Playlist_tracks":
+                self._lock_playlist(playlist_id)
+            # Plain INSERTs so foreign key errors still raise, ids already in the playlist are left out first.
+            # FOR UPDATE keeps them there until commit
+            present = set()
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                self.cursor.execute(f"""
+                        SELECT {column} AS id FROM {table}
+                        WHERE playlists_id = %s AND {column} IN ({placeholders})
+                        FOR UPDATE
+                        """, (playlist_id, *chunk))
+                present.update(row["id"] for row in self.cursor.fetchall())
+            ids = [value for value in ids if value not in present]
+            if not ids:
+                return 0
+
+            added = 0
+            if table == "Playlist_tracks":
+                # A locking read sees the latest tail even if the transaction already holds an older snapshot
+                self.cursor.execute("""
+                        SELECT COALESCE(MAX(`order`), 0) AS last_order FROM Playlist_tracks
+                        WHERE playlists_id = %s
+                        FOR UPDATE
+                        """, (playlist_id, ))
+                last_order = self.cursor.fetchone()["last_order"]
+                for start in range(0, len(ids), chunk_size):
+                    chunk = ids[start:start + chunk_size]
+                    placeholders = ", ".join(["(%s, %s, %s)"] * len(chunk))
+                    values = []
+                    for position, song_id in enumerate(chunk, start=start + 1):
+                        values.extend((playlist_id, song_id, last_order + position * ORDER_GAP))
+                    self.cursor.execute(f"""
+                            INSERT INTO Playlist_tracks(playlists_id, song_id, `order`)
+                            VALUES {placeholders}
+                            """, tuple(values))
+                    added += self.cursor.rowcount
+                Counter_model(self.cursor).apply_deltas("playlist_track_count", {playlist_id: added})
+                self.invalidate_playlist_cache(playlist_id)
+            else:
+                for start in range(0, len(ids), chunk_size):
+                    chunk = ids[start:start + chunk_size]
+                    placeholders = ", ".join(["(%s, %s)"] * len(chunk))
+                    values = [value for user_id in chunk for value in (playlist_id, user_id)]
+                    self.cursor.execute(f"""
+                            INSERT INTO Playlists_users(playlists_id, user_id)
+                            VALUES {placeholders}
+                            """, tuple(values))
+                    added += self.cursor.rowcount
+            logger.info(f"{added} {type}s added to the playlist {playlist_id}")
+            return added
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
+    def remove_many_from_playlist(self, ids: list, playlist_id: int, type: str, chunk_size=PLAYLIST_CHUNK_SIZE) -> int:
+        """
+        Removes many songs or users from a playlist with DELETE ... IN statements.
+
+        Nothing is committed, see add_many_to_playlist.
+
+        Args:
+            ids (list): Song or user ids.
+            playlist_id (int): Playlist id.
+            type (string): Either song or user.
+            chunk_size (int): Ids per DELETE statement.
+        Returns:
+            removed (int): Number of rows deleted.
+        Raises:
+            ValueError: If an id is not a positive integer.
+            InputError: If type is not song or user.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        playlist_id = self.id_checker(playlist_id)
+        table, column = self._playlist_link(type)
+        ids = list(dict.fromkeys(self.id_checker(value) for value in ids))
+
+        try:
+            removed = 0
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                self.cursor.execute(f"""
+                        DELETE FROM {table}
+                        WHERE playlists_id = %s AND {column} IN ({placeholders})
+                        """, (playlist_id, *chunk))
+                removed += self.cursor.rowcount
+            if table == "Playlist_tracks" and removed:
+                Counter_model(self.cursor).apply_deltas("playlist_track_count", {playlist_id: -removed})
+                self.invalidate_playlist_cache(playlist_id)
+            logger.info(f"{removed} {type}s removed from the playlist {playlist_id}")
+            return removed
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
+    def move_in_playlist(self, song_id: int, playlist_id: int, after_song_id=None) -> int:
+        """
+        Moves a song of a playlist right after another song, or to the front.
+
+        Only the moved row is updated, it gets the midpoint of the order keys of its new neighbours.
+        When two neighbours have no free key left between them the playlist is rebalanced first.
+        Nothing is committed.
+
+        Args:
+            song_id (int): Song to move.
+            playlist_id (int): Playlist id.
+            after_song_id (int): Song the moved song is placed after, None to move it to the front.
+        Returns:
+            order (int): New order key of the song.
+        Raises:
+            ValueError: If an id is not a positive integer.
+            InputError: If a song is not in the playlist or is moved after itself.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        song_id = self.id_checker(song_id)
+        playlist_id = self.id_checker(playlist_id)
+        if after_song_id is not None:
+            after_song_id = self.id_checker(after_song_id)
+            if after_song_id == song_id:
+                logger.error("A song can not be moved after itself")
+                raise InputError("A song can not be moved after itself")
+
+        try:
+            # Two moves into the same gap would pick the same key
+            self._lock_playlist(playlist_id)
+            for song in (song_id, after_song_id):
+                if song is not None and self._order_of(playlist_id, song) is None:
+                    logger.error(f"Song {song} is not in the playlist {playlist_id}")
+                    raise InputError(f"Song {song} is not in the playlist {playlist_id}")
+
+            new_order = self._free_order(playlist_id, song_id, after_song_id)
+            if new_order is None:
+                self.rebalance_playlist(playlist_id)
+                new_order = self._free_order(playlist_id, song_id, after_song_id)
+
+            self.cursor.execute("""
+                    UPDATE Playlist_tracks
+                    SET `order` = %s
+                    WHERE playlists_id = %s AND song_id = %s
+                    """, (new_order, playlist_id, song_id))
+            self.invalidate_playlist_cache(playlist_id)
+            logger.info(f"Song {song_id} moved to {new_order} in the playlist {playlist_id}")
+            return new_order
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
+    def _order_of(self, playlist_id: int, song_id: int):
+        self.cursor.execute("""
+                SELECT `order` FROM Playlist_tracks
+                WHERE playlists_id = %s AND song_id = %s
+                """, (playlist_id, song_id))
+        row = self.cursor.fetchone()
+        return None if row is None else row["order"]
+
+    def _free_order(self, playlist_id: int, song_id: int, after_song_id):
+        """
+        Order key between the song after_song_id and the one following it, ignoring the moved song.
+        None if there is no free key.
+        """
+        lower = 0 if after_song_id is None else self._order_of(playlist_id, after_song_id)
+        self.cursor.execute("""
+                SELECT `order` FROM Playlist_tracks
+                WHERE playlists_id = %s AND `order` >= %s AND song_id NOT IN (%s, %s)
+                ORDER BY `order`, song_id
+                LIMIT 1
+                """, (playlist_id, lower, song_id, after_song_id or 0))
+        row = self.cursor.fetchone()
+        if row is None:
+            return lower + ORDER_GAP
+        upper = row["order"]
+        if upper - lower < 2:
+            return None
+        return (lower + upper) // 2
+
+    def rebalance_playlist(self, playlist_id: int):
+        """
+        Spreads the order keys of a playlist ORDER_GAP apart again, keeping the current order.
+
+        Args:
+            playlist_id (int): Playlist id.
+        Raises:
+            ValueError: If playlist_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        playlist_id = self.id_checker(playlist_id)
+        try:
+            self.cursor.execute("""
+                    UPDATE Playlist_tracks AS plt
+                    JOIN (
+                        SELECT song_id, ROW_NUMBER() OVER (ORDER BY `order`, song_id) AS position
+                        FROM Playlist_tracks
+                        WHERE playlists_id = %s
+                    ) AS ranked ON ranked.song_id = plt.song_id
+                    SET plt.`order` = ranked.position * %s
+                    WHERE plt.playlists_id = %s
+                    """, (playlist_id, ORDER_GAP, playlist_id))
+            self.invalidate_playlist_cache(playlist_id)
+            logger.info(f"Playlist {playlist_id} rebalanced")
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
     def fetch_all_playlist_by_user(self, user_name: str) -> list:
         """
         Fetches all playlists for a user.
@@ -230,6 +587,40 @@ class Playlist_model:
             logger.error(f"Databse connection failed {err}")
             raise DatabaseConnectionError(f"Databse connection failed {err}")
 
+    def fetch_all_playlist_by_user_id(self, user_id: int) -> list:
+        """
+        Fetches all playlists for a user by the user id.
+
+        Args:
+            user_id (int): User id
+        Returns:
+            all_playlists (list): Return all the non deleted playlists for a user.
+        Raises:
+            ValueError: If user_id is not a positive integer
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            user_id = self.id_checker(user_id)
+
+            query = """
+                    SELECT name AS Playlists FROM non_deleted_playlists
+                    WHERE creator_id = %s
+                    """
+            self.cursor.execute(query, (user_id, ))
+            all_playlists_fetched = self.cursor.fetchall()
+
+            if not all_playlists_fetched:
+                logger.warning("No playlists found for user")
+                return []
+
+            all_playlists = [row['Playlists'] for row in all_playlists_fetched]
+            logger.info("All playlists fetched")
+            return all_playlists
+        
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
     def fetch_all_songs_from_playlist(self, playlist_name: str) -> list:
         """
         Fetches all songs from a playlist.
@@ -250,6 +641,7 @@ class Playlist_model:
                     JOIN Playlist_tracks AS plt ON s.id = plt.song_id
                     JOIN non_deleted_playlists AS pl ON pl.id = plt.playlists_id
                     WHERE pl.name = %s
+                    ORDER BY plt.`order`, plt.song_id
                     """
             self.cursor.execute(query, (playlist_name, ))
             all_songs_fetched = self.cursor.fetchall()
@@ -266,6 +658,153 @@ class Playlist_model:
             logger.error(f"Databse connection failed {err}")
             raise DatabaseConnectionError(f"Databse connection failed {err}")
 
+    def fetch_all_songs_from_playlist_by_id(self, playlist_id: int) -> list:
+        """
+        Fetches all songs from a playlist by the playlist id.
+
+        Args:
+            playlist_id (int): Playlist id
+        Returns:
+            all_songs (list): Return all the non deleted songs from the playlist.
+        Raises:
+            ValueError: If playlist_id is not a positive integer
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            playlist_id = self.id_checker(playlist_id)
+
+            query = """
+                    SELECT s.name AS Songs FROM non_deleted_songs AS s
+                    JOIN Playlist_tracks AS plt ON s.id = plt.song_id
+                    JOIN non_deleted_playlists AS pl ON pl.id = plt.playlists_id
+                    WHERE pl.id = %s
+                    ORDER BY plt.`order`, plt.song_id
+                    """
+            self.cursor.execute(query, (playlist_id, ))
+            all_songs_fetched = self.cursor.fetchall()
+
+            if not all_songs_fetched:
+                logger.warning("No Songs found in a playlist")
+                return []
+
+            all_songs = [row['Songs'] for row in all_songs_fetched]
+            logger.info("All songs fetched")
+            return all_songs
+        
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
+    def fetch_playlist_tracks_page(self, playlist_id: int, after=None, limit=100, cached=False) -> list:
+        """
+        Fetches one page of a playlist in playlist order (keyset pagination).
+
+        Every page is one range read of the (playlists_id, order) index joined to the song, album and
+        artist rows, no matter how deep into the playlist it is.
+
+        Args:
+            playlist_id (int): Playlist id.
+            after (tuple): (order, song_id) of the last track of the previous page, None for the first page.
+            limit (int): Page size, at most 1000.
+            cached (bool): Serve the page from the cached snapshot of the whole playlist, see fetch_playlist_snapshot.
+        Returns:
+            tracks_page (list): Dictionaries with order, song_id, song_name, album_id, album_name, artist_id and artist_name.
+                Empty when there are no more tracks. Pass (order, song_id) of the last row as after to get the next page.
+                Example = [{'order': 1, 'song_id': 1, 'song_name': 'Come Together', 'album_id': 1, 'album_name': 'Abbey Road', 'artist_id': 1, 'artist_name': 'The Beatles'}]
+        Raises:
+            ValueError: If playlist_id is not a positive integer.
+            InputError: If after or limit are invalid.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        playlist_id = self.id_checker(playlist_id)
+        check_page_args(0, limit)
+        if after is None:
+            after = (0, 0)
+        elif len(after) != 2 or not all(isinstance(value, int) for value in after):
+            logger.error("after must be a (order, song_id) tuple of integers")
+            raise InputError("after must be a (order, song_id) tuple of integers")
+        after_order, after_song_id = after
+
+        if cached:
+            snapshot = self.fetch_playlist_snapshot(playlist_id)
+            start = bisect.bisect_right(snapshot, (after_order, after_song_id), key=lambda row: (row["order"], row["song_id"]))
+            return snapshot[start:start + limit]
+
+        try:
+            self.cursor.execute(PLAYLIST_TRACKS_QUERY, (playlist_id, after_order, after_order, after_song_id, limit))
+            tracks_page = self.cursor.fetchall()
+            logger.info(f"Fetched {len(tracks_page)} tracks of playlist {playlist_id} after {after}")
+            return tracks_page
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
+    def fetch_largest_playlists(self, limit=10, min_tracks=0) -> list:
+        """
+        Fetches the playlists with the most tracks from the maintained track counters.
+
+        Args:
+            limit (int): Number of playlists, at most 1000.
+            min_tracks (int): Only playlists with more tracks than this.
+        Returns:
+            largest_playlists (list): Dictionaries with id, name, creator_id and track_count, largest first.
+        Raises:
+            InputError: If limit or min_tracks are invalid.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        check_page_args(0, limit)
+        if isinstance(min_tracks, bool) or not isinstance(min_tracks, int) or min_tracks < 0:
+            logger.error("min_tracks must be a non negative integer")
+            raise InputError("min_tracks must be a non negative integer")
+        try:
+            query = """
+                    SELECT pl.id, pl.name, pl.creator_id, c.track_count FROM Playlist_track_counts AS c
+                    JOIN non_deleted_playlists AS pl ON pl.id = c.playlists_id
+                    WHERE c.track_count > %s
+                    ORDER BY c.track_count DESC, c.playlists_id DESC
+                    LIMIT %s;
+                    """
+            self.cursor.execute(query, (min_tracks, limit))
+            largest_playlists = self.cursor.fetchall()
+            logger.info(f"Fetched the {len(largest_playlists)} largest playlists")
+            return largest_playlists
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
+    def fetch_playlist_snapshot(self, playlist_id: int, page_size=1000) -> list:
+        """
+        Fetches the whole playlist in playlist order through the catalog cache.
+
+        The snapshot is read page by page on a miss and dropped by every write to the playlist.
+
+        Args:
+            playlist_id (int): Playlist id.
+            page_size (int): Rows read per query on a cache miss.
+        Returns:
+            snapshot (list): Same dictionaries as fetch_playlist_tracks_page, every track of the playlist.
+        Raises:
+            ValueError: If playlist_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        playlist_id = self.id_checker(playlist_id)
+        cache = get_catalog_cache()
+        snapshot = cache.get(f"playlist_tracks:{playlist_id}")
+        if snapshot is not MISSING:
+            return snapshot
+
+        snapshot = []
+        after = None
+        while True:
+            page = self.fetch_playlist_tracks_page(playlist_id, after=after, limit=page_size)
+            snapshot.extend(page)
+            if len(page) < page_size:
+                break
+            after = (page[-1]["order"], page[-1]["song_id"])
+        cache.set(f"playlist_tracks:{playlist_id}", snapshot)
+        logger.info(f"Snapshot of playlist {playlist_id} cached with {len(snapshot)} tracks")
+        return snapshot
+
     def update_playlist_details(self, playlist_update_info: dict, playlist_name: str):
         """
         Function to update playlist info.
@@ -297,15 +836,54 @@ class Playlist_model:
                     SET {column_dict} = %s
                     WHERE name = %s
                     """
-            self.cursor.execute(query, (value, playlist_name))
+            self.execute_statement(("Playlists", "update", column_dict, "name"), query, (value, playlist_name))
             logger.info(f"{playlist_name} info updated on {column_dict} to {value}")
         except mysql.connector.Error as err:
             logger.error(f"Error updating a song info {err}")
             raise DatabaseConnectionError(f"Error updating a song info {err}")
 
+    def update_playlist_details_by_id(self, playlist_update_info: dict, playlist_id: int):
+        """
+        Function to update playlist info by playlist id.
+
+        Args:
+            playlist_update_info (dict): dict containing the column and the value that will be changed for a playlist.
+            playlist_id (int): Playlist id.
+        
+        Raises:
+                InputError: If len of playlist_update info not 1.
+                            if column is not in the playlists table
+                ValueError: If playlist_id is not a positive integer.
+                DatabaseConnectionError: If connection to the database fails
+        """
+        try:
+            column_table = [row["Field"] for row in self.table_columns]
+
+            column_dict, value = next(iter(playlist_update_info.items()))
+            playlist_id = self.id_checker(playlist_id)
+            
+            if  len(playlist_update_info) != 1:
+                logger.error("Dictionary doesnt have just one key-value pair")
+                raise InputError("Dictionary doesnt have just one key-value pair")
+
+            self.check_if_input_cols_match(table_columns=column_table, input_columns=column_dict, exact_match=False)
+            
+            query = f"""
+                    UPDATE Playlists
+                    SET {column_dict} = %s
+                    WHERE id = %s
+                    """
+            self.execute_statement(("Playlists", "update", column_dict, "id"), query, (value, playlist_id))
+            logger.info(f"Playlist {playlist_id} info updated on {column_dict} to {value}")
+        except mysql.connector.Error as err:
+            logger.error(f"Error updating a playlist info {err}")
+            raise DatabaseConnectionError(f"Error updating a playlist info {err}")
+
     def soft_delete_playlist(self, playlist_name: str):
         """
         This function takes a playlist name as input and marks him as deleted in our database.
+        Playlist entries are cascaded by Cascade_model.sweep(),
+        use Cascade_model.delete_playlist to cascade right away.
 
         Args:
             playlist_name (string): Name of a playlist.
@@ -323,11 +901,40 @@ class Playlist_model:
                     WHERE name = %s
                     """
             self.cursor.execute(query, (playlist_name, ))
+            self.invalidate_playlist_cache()
             logger.info(f"{playlist_name} deleted")
         except mysql.connector.Error as err:
             logger.error(f"Error deleting a song {err}")
             raise DatabaseConnectionError(f"Error deleting a song {err}")
-    
+
+    def soft_delete_playlist_by_id(self, playlist_id: int):
+        """
+        This function takes a playlist id as input and marks the playlist as deleted in our database.
+        Playlist entries are cascaded by Cascade_model.sweep(),
+        use Cascade_model.delete_playlist to cascade right away.
+
+        Args:
+            playlist_id (int): Playlist id.
+                Example: 1
+
+        Raises:
+            ValueError: If playlist_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs during the database creation.
+        """
+        try:
+            playlist_id = self.id_checker(playlist_id)
+            query = """
+                    UPDATE Playlists
+                    SET deleted = 1
+                    WHERE id = %s
+                    """
+            self.cursor.execute(query, (playlist_id, ))
+            self.invalidate_playlist_cache(playlist_id)
+            logger.info(f"Playlist {playlist_id} deleted")
+        except mysql.connector.Error as err:
+            logger.error(f"Error deleting a playlist {err}")
+            raise DatabaseConnectionError(f"Error deleting a playlist {err}")
+
     def close_connection(self):
         self.cursor.close()
         self.conn.close()
@@ -15,6 +15,13 @@ sys.path.append(str(base_path))
 from utils.errors import InputError
 from utils.errors import DatabaseConnectionError
 from backend.database_manager.database_manager import DatabaseManager
+from backend.database_manager.schema_registry import schema_registry
+from backend.database_manager.pagination import fetch_page, stream_rows, check_page_args
+from backend.database_manager.bulk_insert import rows_columns, insert_in_chunks
+from backend.cache.catalog_cache import get_catalog_cache
+from backend.database_manager.after_commit import after_commit
+from backend.cache.local_cache import MISSING
+from backend.models.trending_model import TRENDING_WINDOWS, TOP_K
 
 
 # Setup a logger
@@ -34,22 +41,27 @@ logger = logging.getLogger(__name__)
 logger.info(f"Loading .env file from: {env_path}")
 load_dotenv(dotenv_path=env_path)
 
+# Ids per IN list when looking up the album, artist and playlist keys a song write changes
+CACHE_KEY_CHUNK = 1000
+
 class Song_model:
 
-    def __init__(self, cursor):
+    def __init__(self, cursor, statements=None):
         """
         Initialize the Song_model class with database configuration.
 
         Args:
             cursor (mysql.connector.cursor_cext.CMySQLCursorDict): The database cursor.
+            statements (StatementRegistry): Prepared statements of the cursors connection, see DatabaseManager.prepared_connection.
+                        If None statements are sent as plain text.
 
         Raises:
                 DatabaseConnectionError: If connection to the database fails.
         """
         try:
             self.cursor = cursor
-            self.cursor.execute("SHOW COLUMNS FROM Songs;")
-            self.table_columns = self.cursor.fetchall()
+            self.statements = statements
+            self.table_columns = schema_registry.get_columns(self.cursor, "Songs")
             logger.info("Database connection established successfully.")
         except mysql.connector.Error as err:
             logger.error(f"Error connecting to the database: {err}")
@@ -84,6 +96,26 @@ class Song_model:
 
         return string_stripped
 
+    def id_checker(self, value) -> int:
+        """
+        Function to check if a input is a valid row id
+
+        Args:
+            value (int): Any id to be checked.
+                        Example: 1
+
+        Raises:
+            ValueError: If input is not a positive integer.
+        Returns:
+            value (int): The checked id
+                        Example: 1
+        """
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            logger.error("Input is not a valid id!")
+            raise ValueError("Id must be a positive integer.")
+
+        return value
+
     def check_if_input_cols_match(self, table_columns: list, input_columns: list, exclude_columns = None, exact_match=True):
         """
         Checks if columns that want to be inputed match the table columns raises a InputError if not.
@@ -108,8 +140,75 @@ class Song_model:
         
         if not exact_match and not set([input_columns]).issubset(set(table_columns_filtered)):
             logger.error("Inputed columns that are not in the table schema!")
-            raise InputError("Inputed columns that are not in the table schema!") 
-    
+            raise InputError("Inputed columns that are not in the table schema!")
+
+    def execute_statement(self, key: tuple, query: str, values: tuple):
+        """
+        Runs a write statement, as a server-side prepared statement when the model has a statement registry.
+
+        Args:
+            key (tuple): Table, operation and columns identifying the statement text.
+            query (str): SQL with %s placeholders.
+            values (tuple): Parameters of the statement.
+        """
+        if self.statements is None:
+            self.cursor.execute(query, values)
+        else:
+            self.statements.execute(key, query, values)
+
+    def invalidate_song_cache(self, songs: list, playlists=True):
+        """
+        Drop the cached catalog reads a song write changes, now and again once the write commits.
+
+        Dropping them only before the commit would let a concurrent reader cache the old rows again
+        for the whole TTL. Only the keys of the given songs are deleted, no prefix scans.
+
+        Args:
+            songs (list): Dicts with name, album_id and artist_id (and id if playlists) of the songs
+                written, as they were before and after the write.
+            playlists (bool): If snapshots of playlists holding the songs can change, False for inserts.
+        """
+        keys = self.song_cache_keys(songs, playlists=playlists)
+        self._drop_song_cache(keys)
+        after_commit(self.cursor, lambda: self._drop_song_cache(keys))
+
+    def song_cache_keys(self, songs: list, playlists=True) -> set:
+        """
+        Cache keys holding the given songs: their details, the song lists of their albums and artists
+        and, if playlists, the snapshots of the playlists they are in.
+        """
+        keys = {f"song:{song['name']}" for song in songs if song.get("name") is not None}
+        lookups = [
+            ("album_songs", "SELECT name FROM Albums WHERE id IN ({})", {song.get("album_id") for song in songs}),
+            ("artist_songs", "SELECT name FROM Artists WHERE id IN ({})", {song.get("artist_id") for song in songs}),
+        ]
+        if playlists:
+            lookups.append(("playlist_tracks", "SELECT DISTINCT playlists_id AS name FROM Playlist_tracks WHERE song_id IN ({})",
+                            {song.get("id") for song in songs}))
+
+        for prefix, query, ids in lookups:
+            ids = sorted(value for value in ids if value is not None)
+            for start in range(0, len(ids), CACHE_KEY_CHUNK):
+                chunk = ids[start:start + CACHE_KEY_CHUNK]
+                self.cursor.execute(query.format(", ".join(["%s"] * len(chunk))), tuple(chunk))
+                keys.update(f"{prefix}:{row['name']}" for row in self.cursor.fetchall())
+        return keys
+
+    def _songs_where(self, column: str, value) -> list:
+        """
+        Rows of the songs a write by name or id is about to change, for invalidate_song_cache.
+        """
+        self.cursor.execute(f"SELECT id, name, album_id, artist_id FROM Songs WHERE {column} = %s;", (value, ))
+        return self.cursor.fetchall()
+
+    def _drop_song_cache(self, keys: set):
+        """
+        Delete the keys from song_cache_keys.
+        """
+        cache = get_catalog_cache()
+        for key in keys:
+            cache.delete(key)
+
     def add_new_song(self, song_info: dict):
         """
         Inserts a song into the Songs database.
@@ -137,12 +236,45 @@ class Song_model:
                         VALUES({placeholders});
                     """
             song_info_tuple = tuple(song_info.values())
-            self.cursor.execute(query, song_info_tuple)
+            self.execute_statement(("Songs", "insert", tuple(song_info.keys())), query, song_info_tuple)
+            self.invalidate_song_cache([song_info], playlists=False)
             logger.info(f"New song added {song_info["name"]}")
         except mysql.connector.Error as err:
             logger.error(f"Error when createing a new song {err}")
             raise DatabaseConnectionError(f"Database connection failed {err}.")
 
+    def add_many_songs(self, songs_info: list, chunk_size=500, db_manager=None) -> list:
+        """
+        Inserts many songs into the Songs database with multi-row inserts.
+
+        Args:
+            songs_info (list): List of dictionaries containing details about the songs. All need the same columns.
+            chunk_size (int): Number of songs sent per INSERT statement.
+            db_manager (DatabaseManager): If given every chunk is committed, otherwise the caller commits.
+
+        Returns:
+            song_ids (list): Ids of the inserted songs in input order.
+
+        Raises:
+            InputError: If the set of columns does not equal the columns from the table.
+            DatabaseConnectionError: If the database connection fails.
+        """
+        try:
+            columns_table = [row["Field"] for row in self.table_columns]
+            columns_dict = rows_columns(songs_info)
+            excluded_cols = ["id", "deleted"]
+
+            # Columns are checked once for the whole batch
+            self.check_if_input_cols_match(table_columns=columns_table, input_columns=columns_dict, exclude_columns=excluded_cols)
+
+            song_ids = insert_in_chunks(self.cursor, table="Songs", columns=columns_dict, rows=songs_info, chunk_size=chunk_size, db_manager=db_manager)
+            self.invalidate_song_cache(songs_info, playlists=False)
+            logger.info(f"{len(song_ids)} new songs added")
+            return song_ids
+        except mysql.connector.Error as err:
+            logger.error(f"Error when createing new songs {err}")
+            raise DatabaseConnectionError(f"Database connection failed {err}.")
+
     def fetch_song_details(self, song_name:str) -> list:
         """
         Fetches details about a specific song.
@@ -156,13 +288,47 @@ class Song_model:
             DatabaseConnectionError: If database error occurs during the database creation
         """
         try:
-            query = f"""
+            cache = get_catalog_cache()
+            song_details_fetched = cache.get(f"song:{song_name}")
+
+            if song_details_fetched is MISSING:
+                query = """
+                        SELECT * FROM non_deleted_songs
+                        WHERE name = %s;
+                        """
+                self.cursor.execute(query, (song_name, ))
+                song_details_fetched = self.cursor.fetchall()
+                cache.set(f"song:{song_name}", song_details_fetched)
+
+            if not song_details_fetched:
+                logger.warning("Song not found")
+                return []
+
+            logger.info("Song details fetched")
+            return song_details_fetched
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
+    def fetch_song_details_by_id(self, song_id: int) -> list:
+        """
+        Fetches details about a specific song by its id (primary key lookup).
+
+        Args:
+            song_id (int): Song id
+        Returns:
+            song_details (list): Return details about a specific song.
+        Raises:
+            ValueError: If song_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            song_id = self.id_checker(song_id)
+            query = """
                     SELECT * FROM non_deleted_songs
-                    WHERE name = '{song_name}';
+                    WHERE id = %s;
                     """
-            
-            print(query)
-            self.cursor.execute(query)
+            self.cursor.execute(query, (song_id, ))
             song_details_fetched = self.cursor.fetchall()
             if not song_details_fetched:
                 logger.warning("Song not found")
@@ -184,16 +350,19 @@ class Song_model:
         Returns:
             song_details (list): Return details about a specific song.
         Raises:
+            InputError: If column is not in the songs table
             DatabaseConnectionError: If database error occurs during the database creation
         """
         try:
+            column_table = [row["Field"] for row in self.table_columns]
+            # Only a column of the Songs schema can reach the query, the value is sent as a parameter
+            self.check_if_input_cols_match(table_columns=column_table, input_columns=column, exact_match=False)
             query = f"""
                     SELECT name FROM non_deleted_songs
-                    WHERE {column} = '{value}';
+                    WHERE `{column}` = %s;
                     """
-            
-            print(query)
-            self.cursor.execute(query)
+
+            self.cursor.execute(query, (value, ))
             songs_fetched = self.cursor.fetchall()
             if not songs_fetched:
                 logger.warning("Song not found")
@@ -235,6 +404,46 @@ class Song_model:
             logger.error(f"Databse connection failed {err}")
             raise DatabaseConnectionError(f"Databse connection failed {err}")
 
+    def fetch_songs_page(self, after_id=0, limit=100) -> list:
+        """
+        Fetches one page of songs ordered by id (keyset pagination).
+
+        Args:
+            after_id (int): Id of the last song of the previous page, 0 for the first page.
+            limit (int): Page size, at most 1000.
+        Returns:
+            songs_page (list): Dictionaries with the id and name of the songs. Empty when there are no more songs.
+                Pass the last id as after_id to get the next page.
+        Raises:
+            InputError: If after_id or limit are invalid.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            songs_page = fetch_page(self.cursor, view="non_deleted_songs", columns="id, name", after_id=after_id, limit=limit)
+            logger.info(f"Fetched {len(songs_page)} songs after id {after_id}")
+            return songs_page
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
+    def stream_all_songs(self, db_manager, batch_size=1000):
+        """
+        Streams all songs with constant memory.
+
+        Args:
+            db_manager (DatabaseManager): Database manager, the stream runs on a connection leased from its pool.
+            batch_size (int): Rows fetched from the server per round trip.
+        Yields:
+            dict: The id and name of one song at a time, ordered by id.
+        Raises:
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            yield from stream_rows(db_manager, view="non_deleted_songs", columns="id, name", batch_size=batch_size)
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
     def update_song_details(self, song_update_info: dict, song_name: str):
         """
         Function to update songs info.
@@ -260,21 +469,65 @@ class Song_model:
                 raise InputError("Dictionary doesnt have just one key-value pair")
 
             self.check_if_input_cols_match(table_columns=column_table, input_columns=column_dict, exact_match=False)
+            songs = self._songs_where("name", song_name)
             
             query = f"""
                     UPDATE Songs
                     SET {column_dict} = %s
                     WHERE name = %s
                     """
-            self.cursor.execute(query, (value, song_name))
+            self.execute_statement(("Songs", "update", column_dict, "name"), query, (value, song_name))
+            # The songs are cached under their old and new name, album and artist
+            self.invalidate_song_cache(songs + [{**song, column_dict: value} for song in songs])
             logger.info(f"{song_name} info updated on {column_dict} to {value}")
         except mysql.connector.Error as err:
             logger.error(f"Error updating a song info {err}")
             raise DatabaseConnectionError(f"Error updating a song info {err}")
 
+    def update_song_details_by_id(self, song_update_info: dict, song_id: int):
+        """
+        Function to update songs info by song id.
+
+        Args:
+            song_update_info (dict): dict containing the column and the value that will be changed for a song.
+            song_id (int): Song id.
+        
+        Raises:
+                InputError: If len of song_update_info info not 1.
+                            if column is not in the songs table
+                ValueError: If song_id is not a positive integer.
+                DatabaseConnectionError: If connection to the database fails
+        """
+        try:
+            column_table = [row["Field"] for row in self.table_columns]
+
+            column_dict, value = next(iter(song_update_info.items()))
+            song_id = self.id_checker(song_id)
+            
+            if  len(song_update_info) != 1:
+                logger.error("Dictionary doesnt have just one key-value pair")
+                raise InputError("Dictionary doesnt have just one key-value pair")
+
+            self.check_if_input_cols_match(table_columns=column_table, input_columns=column_dict, exact_match=False)
+            songs = self._songs_where("id", song_id)
+            
+            query = f"""
+                    UPDATE Songs
+                    SET {column_dict} = %s
+                    WHERE id = %s
+                    """
+            self.execute_statement(("Songs", "update", column_dict, "id"), query, (value, song_id))
+            self.invalidate_song_cache(songs + [{**song, column_dict: value} for song in songs])
+            logger.info(f"Song {song_id} info updated on {column_dict} to {value}")
+        except mysql.connector.Error as err:
+            logger.error(f"Error updating a song info {err}")
+            raise DatabaseConnectionError(f"Error updating a song info {err}")
+
     def soft_delete_songs(self, song_name: str):
         """
         This function takes a song name as input and marks him as deleted in our database.
+        Likes and playlist entries are cascaded by Cascade_model.sweep(),
+        use Cascade_model.delete_song to cascade right away.
 
         Args:
             song_name (string): Name of a songs.
@@ -286,22 +539,137 @@ class Song_model:
         """
         try:
             song_name = self.string_checker(song_name)
+            songs = self._songs_where("name", song_name)
             query = """
                     UPDATE Songs
                     SET deleted = 1
                     WHERE name = %s
                     """
             self.cursor.execute(query, (song_name, ))
+            self.invalidate_song_cache(songs)
             logger.info(f"{song_name} deleted")
         except mysql.connector.Error as err:
             logger.error(f"Error deleting a song {err}")
             raise DatabaseConnectionError(f"Error deleting a song {err}")
-        
+
+    def soft_delete_song_by_id(self, song_id: int):
+        """
+        This function takes a song id as input and marks the song as deleted in our database.
+        Likes and playlist entries are cascaded by Cascade_model.sweep(),
+        use Cascade_model.delete_song to cascade right away.
+
+        Args:
+            song_id (int): Song id.
+                Example: 2
+
+        Raises:
+            ValueError: If song_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs during the database creation.
+        """
+        try:
+            song_id = self.id_checker(song_id)
+            songs = self._songs_where("id", song_id)
+            query = """
+                    UPDATE Songs
+                    SET deleted = 1
+                    WHERE id = %s
+                    """
+            self.cursor.execute(query, (song_id, ))
+            self.invalidate_song_cache(songs)
+            logger.info(f"Song {song_id} deleted")
+        except mysql.connector.Error as err:
+            logger.error(f"Error deleting a song {err}")
+            raise DatabaseConnectionError(f"Error deleting a song {err}")
+
+    def fetch_most_liked_songs(self, limit=10) -> list:
+        """
+        Fetches the songs with the most likes from the maintained like counters.
+
+        Reads the top of the like_count index instead of counting Likes.
+
+        Args:
+            limit (int): Number of songs, at most 1000.
+        Returns:
+            most_liked (list): Dictionaries with id, name and like_count, most liked first.
+                Example = [{'id': 2, 'name': 'Something', 'like_count': 12}]
+        Raises:
+            InputError: If limit is invalid.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        check_page_args(0, limit)
+        try:
+            query = """
+                    SELECT s.id, s.name, c.like_count FROM Song_like_counts AS c
+                    JOIN non_deleted_songs AS s ON s.id = c.song_id
+                    WHERE c.like_count > 0
+                    ORDER BY c.like_count DESC, c.song_id DESC
+                    LIMIT %s;
+                    """
+            self.cursor.execute(query, (limit, ))
+            most_liked = self.cursor.fetchall()
+            logger.info(f"Fetched the {len(most_liked)} most liked songs")
+            return most_liked
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
     def close_connection(self):
         self.cursor.close()
         self.conn.close()
         logger.info("Database connection closed.")
 
-    def fetch_trending_songs(self):
-        pass
+    def fetch_trending_songs(self, window: str = "day", genre: str = None, limit: int = 10) -> list:
+        """
+        Fetches the trending songs precomputed by Trending_model.refresh_trending.
+
+        Reads at most limit rows by primary key from Trending_songs, cached per window and genre.
+
+        Args:
+            window (str): Trending window, one of TRENDING_WINDOWS. Example: "day"
+            genre (str): Artist genre to rank within. Every genre if None.
+            limit (int): Number of songs, at most TOP_K.
+
+        Returns:
+            trending_songs (list): Songs best first with their rank and score.
+                Example = [{'rank': 1, 'score': 12.5, 'id': 2, 'name': 'Something', 'artist_id': 1, 'album_id': 1}]
+
+        Raises:
+            InputError: If the window is unknown or limit is not between 1 and TOP_K.
+            ValueError: If genre is not a string.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        if window not in TRENDING_WINDOWS:
+            logger.error(f"Unknown trending window {window}")
+            raise InputError(f"Unknown trending window {window}")
+        if isinstance(limit, bool) or not isinstance(limit, int) or not 1 <= limit <= TOP_K:
+            logger.error(f"limit must be between 1 and {TOP_K}")
+            raise InputError(f"limit must be between 1 and {TOP_K}")
+        genre = "" if genre is None else self.string_checker(genre)
+
+        try:
+            cache = get_catalog_cache()
+            cache_key = f"trending:{window}:{genre}:{limit}"
+            trending_songs = cache.get(cache_key)
+
+            if trending_songs is MISSING:
+                query = """
+                        SELECT t.`rank`, t.score, s.id, s.name, s.artist_id, s.album_id FROM Trending_songs AS t
+                        JOIN non_deleted_songs AS s ON s.id = t.song_id
+                        WHERE t.window_name = %s AND t.genre = %s
+                        ORDER BY t.`rank`
+                        LIMIT %s;
+                        """
+                self.cursor.execute(query, (window, genre, limit))
+                trending_songs = self.cursor.fetchall()
+                cache.set(cache_key, trending_songs)
+
+            if not trending_songs:
+                logger.warning(f"No trending songs for the {window} window")
+                return []
+
+            logger.info("Trending songs fetched")
+            return trending_songs
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
 
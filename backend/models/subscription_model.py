@@ -16,6 +16,8 @@ sys.path.append(str(base_path))
 from utils.errors import InputError
 from utils.errors import DatabaseConnectionError
 from backend.database_manager.database_manager import DatabaseManager
+from backend.database_manager.schema_registry import schema_registry
+from backend.database_manager.pagination import fetch_page, stream_rows
 
 
 # Setup a logger
@@ -48,8 +50,7 @@ class Subscription_model:
         """
         try:
             self.cursor = cursor
-            self.cursor.execute("SHOW COLUMNS FROM Subscription_plan_info;")
-            self.table_columns = self.cursor.fetchall()
+            self.table_columns = schema_registry.get_columns(self.cursor, "Subscription_plan_info")
             self.table_columns_list = [col["Field"] for col in self.table_columns]
             logger.info("Connection to the database succesful")
         except mysql.connector.Error as err:
@@ -84,6 +85,26 @@ class Subscription_model:
 
         return string_stripped
 
+    def id_checker(self, value) -> int:
+        """
+        Function to check if a input is a valid row id
+
+        Args:
+            value (int): Any id to be checked.
+                        Example: 1
+
+        Raises:
+            ValueError: If input is not a positive integer.
+        Returns:
+            value (int): The checked id
+                        Example: 1
+        """
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            logger.error("Input is not a valid id!")
+            raise ValueError("Id must be a positive integer.")
+
+        return value
+
     def check_if_input_cols_match(self, table_columns: list, input_columns: list, exclude_columns = None, exact_match=True):
         """
         Checks if columns that want to be inputed match the table columns raises a InputError if not.
@@ -185,7 +206,48 @@ class Subscription_model:
         except mysql.connector.DataError as err:
             logger.error(f"Wrong data format: {err}")
             raise InputError(f"Wrong data format: {err}")
+
+    def update_subscription_info_by_id(self, updated_info: dict, subscription_id: int):
+        """
+        Update a single detail in Subscription_plan_info table by the plan id
         
+        Args:
+            updated_info (dict): Dictionary containing the column to be updated and the desired value
+                Example: {"price": 9.99}
+            subscription_id (int): Id of the subscription being updated.
+                Example: 1
+        Raises:
+            InputError: If dict has more than one key-value pair.
+                        If a column passed in the dict is not in the table.
+                        If a value doesnt match the table value
+            ValueError: If subscription_id is not a positive integer.
+            DatabaseConnectionError: If database connection error occurs.
+        """
+        try:
+            subscription_id = self.id_checker(subscription_id)
+            
+            column, value = next(iter(updated_info.items()))
+
+            if  len(updated_info) != 1:
+                logger.error("Dictionary doesnt have just one key-value pair")
+                raise InputError("Dictionary doesnt have just one key-value pair")
+
+            self.check_if_input_cols_match(table_columns=self.table_columns_list, input_columns=column, exact_match=False)
+
+            query = f"""
+                    UPDATE `Subscription_plan_info`
+                    SET {column} = %s
+                    WHERE id = %s;
+                    """
+            self.cursor.execute(query, (value, subscription_id))
+            logger.info(f"Subscription plan: {subscription_id} updated")
+        except mysql.connector.DataError as err:
+            logger.error(f"Wrong data format: {err}")
+            raise InputError(f"Wrong data format: {err}")
+        except mysql.connector.Error as err:
+            logger.error(f"Error connecting to the database: {err}")
+            raise DatabaseConnectionError(f"Error connecting to the database: {err}")
+
     def fetch_specific_subscription(self, subscription: str) -> list:
         """
         Fetches specific subscriptions from the database.
@@ -215,7 +277,39 @@ class Subscription_model:
         except mysql.connector.Error as err:
             logger.error(f"Databse connection failed {err}")
             raise DatabaseConnectionError(f"Databse connection failed {err}")
-    
+
+    def fetch_subscription_by_id(self, subscription_id: int) -> list:
+        """
+        Fetches a subscription from the database by its id.
+
+        Args:
+            subscription_id (int): Subscription plan id.
+        Returns:
+            specific_subscription (list): Return the non deleted subscription. Returns a empty list if the subscription is not found.
+        Raises:
+            ValueError: If subscription_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            subscription_id = self.id_checker(subscription_id)
+            query = """
+                    SELECT * FROM non_deleted_subscriptions
+                    WHERE id = %s;
+                    """
+            self.cursor.execute(query, (subscription_id, ))
+            specific_subscription = self.cursor.fetchall()
+
+            if not specific_subscription:
+                logger.error("No subscription found")
+                return []
+
+            logger.info("Subscription fetched")
+            return specific_subscription
+        
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
     def fetch_all_subscriptions(self) -> list:
         """
         Fetches all subscriptions from the database.
@@ -244,7 +338,47 @@ class Subscription_model:
         except mysql.connector.Error as err:
             logger.error(f"Databse connection failed {err}")
             raise DatabaseConnectionError(f"Databse connection failed {err}")
-        
+
+    def fetch_subscriptions_page(self, after_id=0, limit=100) -> list:
+        """
+        Fetches one page of subscriptions ordered by id (keyset pagination).
+
+        Args:
+            after_id (int): Id of the last subscription of the previous page, 0 for the first page.
+            limit (int): Page size, at most 1000.
+        Returns:
+            subscriptions_page (list): Dictionaries with every column of the subscriptions. Empty when there are no more subscriptions.
+                Pass the last id as after_id to get the next page.
+        Raises:
+            InputError: If after_id or limit are invalid.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            subscriptions_page = fetch_page(self.cursor, view="non_deleted_subscriptions", columns="*", after_id=after_id, limit=limit)
+            logger.info(f"Fetched {len(subscriptions_page)} subscriptions after id {after_id}")
+            return subscriptions_page
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
+    def stream_all_subscriptions(self, db_manager, batch_size=1000):
+        """
+        Streams all subscriptions with constant memory.
+
+        Args:
+            db_manager (DatabaseManager): Database manager, the stream runs on a connection leased from its pool.
+            batch_size (int): Rows fetched from the server per round trip.
+        Yields:
+            dict: Every column of one subscription at a time, ordered by id.
+        Raises:
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            yield from stream_rows(db_manager, view="non_deleted_subscriptions", columns="*", batch_size=batch_size)
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
     def soft_delete_user_account(self, subscription: str):
         """
         This function takes a subscription name as input and marks it as deleted in our database.
@@ -274,7 +408,34 @@ class Subscription_model:
             logger.error(f"Database connection failed {err}.")
             raise DatabaseConnectionError(f"Database connection failed {err}")
 
-    
+    def soft_delete_subscription_by_id(self, subscription_id: int):
+        """
+        This function takes a subscription id as input and marks it as deleted in our database.
+
+        Args:
+            subscription_id (int): Id of a subscription.
+                Example: 1
+
+        Raises:
+            ValueError: If subscription_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs during the database creation.
+        """
+
+        try:
+            subscription_id = self.id_checker(subscription_id)
+            
+            query = """
+                    UPDATE `Subscription_plan_info`
+                    SET deleted = 1
+                    WHERE id = %s;
+                    """
+            self.cursor.execute(query, (subscription_id,))
+            logger.info(f"Subscription {subscription_id} has been successfully deleted")
+
+        except mysql.connector.Error as err:
+            logger.error(f"Database connection failed {err}.")
+            raise DatabaseConnectionError(f"Database connection failed {err}")
+
     def close_connection(self):
         self.cursor.close()
         self.conn.close()
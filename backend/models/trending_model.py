@@ -0,0 +1,245 @@
+import os
+import argparse
+import logging
+import mysql.connector
+from dotenv import load_dotenv
+from pathlib import Path
+import sys
+
+base_path = Path(__file__).resolve().parent.parent.parent
+env_path = base_path / 'env_files' / 'special_detail.env'
+log_dir = base_path / 'logger'
+log_file =  log_dir / 'app.log'
+
+sys.path.append(str(base_path))
+
+from utils.errors import InputError
+from utils.errors import DatabaseConnectionError
+from backend.database_manager.database_manager import DatabaseManager
+from backend.cache.catalog_cache import get_catalog_cache
+from backend.database_manager.after_commit import after_commit
+
+# Setup a logger
+
+logging.basicConfig(
+    level=logging.DEBUG,  # Set the log level to DEBUG
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',  # Log format
+    handlers=[
+        logging.FileHandler(log_file),  # Log to a file named app.log in the logs directory
+        logging.StreamHandler()  # Also log to the console
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Connect to the env file and get system variables
+logger.info(f"Loading .env file from: {env_path}")
+load_dotenv(dotenv_path=env_path)
+
+ROLLUP_JOB = "song_activity_rollup"
+# Events younger than this are left for the next roll up, so transactions still in flight are not skipped
+SETTLE_SECONDS = 60
+# Songs kept per window and genre in Trending_songs
+TOP_K = 100
+LIKE_WEIGHT = 1.0
+PLAYLIST_ADD_WEIGHT = 1.5
+
+# Rollup table, how far back a window looks and the half-life of an event's weight
+TRENDING_WINDOWS = {
+    "day": {"table": "Song_activity_hourly", "span_hours": 24, "half_life_hours": 6},
+    "week": {"table": "Song_activity_daily", "span_hours": 24 * 7, "half_life_hours": 48},
+    "month": {"table": "Song_activity_daily", "span_hours": 24 * 30, "half_life_hours": 24 * 7},
+}
+
+# Bucket expression and target of every rollup table, events are the rows added (action = 0)
+ROLLUP_BUCKETS = {
+    "Song_activity_hourly": "TIMESTAMP(DATE(date), MAKETIME(HOUR(date), 0, 0))",
+    "Song_activity_daily": "DATE(date)",
+}
+ROLLUP_SOURCES = {
+    "likes": "Likes",
+    "playlist_adds": "Playlist_tracks",
+}
+
+class Trending_model:
+
+    def __init__(self, cursor):
+        """
+        Maintains the song activity rollups and the precomputed trending songs.
+
+        Likes and Playlist_tracks rows are counted once into hourly and daily buckets, so trending
+        scores are computed from a few rows per song instead of the raw event tables.
+        Like the other models nothing is committed here, the caller commits.
+
+        Args:
+            cursor (mysql.connector.cursor_cext.CMySQLCursorDict): The database cursor.
+        """
+        self.cursor = cursor
+
+    def roll_up(self) -> dict:
+        """
+        Add the events since the last roll up to the hourly and daily tables.
+
+        The watermark row is locked for the whole transaction and moved in it, so concurrent or
+        repeated runs never count an event twice. Commit right after calling this.
+
+        Returns:
+            dict: Start and end of the rolled up range.
+
+        Raises:
+            DatabaseConnectionError: If database error occurs.
+        """
+        try:
+            self.cursor.execute("""
+                    SELECT watermark, NOW() - INTERVAL %s SECOND AS upper_bound FROM Job_watermarks
+                    WHERE job = %s
+                    FOR UPDATE;
+                    """, (SETTLE_SECONDS, ROLLUP_JOB))
+            row = self.cursor.fetchone()
+            if row is None:
+                # First run, everything already in the event tables is rolled up
+                self.cursor.execute("SELECT NOW() - INTERVAL %s SECOND AS upper_bound;", (SETTLE_SECONDS, ))
+                row = {"watermark": "1970-01-01 00:00:01", "upper_bound": self.cursor.fetchone()["upper_bound"]}
+            lower, upper = row["watermark"], row["upper_bound"]
+
+            for table, bucket in ROLLUP_BUCKETS.items():
+                for column, source in ROLLUP_SOURCES.items():
+                    other = "playlist_adds" if column == "likes" else "likes"
+                    query = f"""
+                            INSERT INTO {table}(bucket, song_id, {column}, {other})
+                            SELECT {bucket} AS bucket, song_id, COUNT(*), 0 FROM {source}
+                            WHERE action = 0 AND date > %s AND date <= %s
+                            GROUP BY bucket, song_id
+                            ON DUPLICATE KEY UPDATE {column} = {column} + VALUES({column});
+                            """
+                    self.cursor.execute(query, (lower, upper))
+
+            self.cursor.execute("""
+                    INSERT INTO Job_watermarks(job, watermark)
+                    VALUES(%s, %s)
+                    ON DUPLICATE KEY UPDATE watermark = VALUES(watermark);
+                    """, (ROLLUP_JOB, upper))
+            logger.info(f"Song activity rolled up from {lower} to {upper}")
+            return {"from": lower, "to": upper}
+        except mysql.connector.Error as err:
+            logger.error(f"Error rolling up song activity {err}")
+            raise DatabaseConnectionError(f"Error rolling up song activity {err}")
+
+    def refresh_trending(self, window: str) -> int:
+        """
+        Score every song active in a window and store the top TOP_K overall and per artist genre.
+
+        An event's weight halves every half_life_hours, so recent activity counts more than a
+        burst at the start of the window.
+
+        Args:
+            window (str): Key of TRENDING_WINDOWS. Example: "day"
+
+        Returns:
+            int: Number of rows written to Trending_songs.
+
+        Raises:
+            InputError: If the window is unknown.
+            DatabaseConnectionError: If database error occurs.
+        """
+        if window not in TRENDING_WINDOWS:
+            logger.error(f"Unknown trending window {window}")
+            raise InputError(f"Unknown trending window {window}")
+        config = TRENDING_WINDOWS[window]
+
+        try:
+            query = f"""
+                    SELECT a.song_id, ar.genre,
+                        SUM((a.likes * %s + a.playlist_adds * %s)
+                            * EXP(-LN(2) * TIMESTAMPDIFF(SECOND, a.bucket, NOW()) / 3600 / %s)) AS score
+                    FROM {config["table"]} AS a
+                    JOIN non_deleted_songs AS s ON s.id = a.song_id
+                    JOIN Artists AS ar ON ar.id = s.artist_id
+                    WHERE a.bucket >= NOW() - INTERVAL %s HOUR
+                    GROUP BY a.song_id, ar.genre;
+                    """
+            self.cursor.execute(query, (LIKE_WEIGHT, PLAYLIST_ADD_WEIGHT, config["half_life_hours"], config["span_hours"]))
+            scored = sorted(self.cursor.fetchall(), key=lambda row: row["score"], reverse=True)
+
+            # '' holds the ranking over every genre
+            rankings = {"": scored[:TOP_K]}
+            for row in scored:
+                ranking = rankings.setdefault(row["genre"], [])
+                if len(ranking) < TOP_K:
+                    ranking.append(row)
+
+            values = [
+                (window, genre, rank, row["song_id"], float(row["score"]))
+                for genre, ranking in rankings.items()
+                for rank, row in enumerate(ranking, start=1)
+            ]
+            self.cursor.execute("DELETE FROM Trending_songs WHERE window_name = %s;", (window, ))
+            if values:
+                self.cursor.executemany("""
+                        INSERT INTO Trending_songs(window_name, genre, `rank`, song_id, score)
+                        VALUES(%s, %s, %s, %s, %s)
+                        """, values)
+            # Drop the cached rankings now and again after the commit, a reader may re-cache the old ones in between
+            self._drop_trending_cache(window)
+            after_commit(self.cursor, lambda: self._drop_trending_cache(window))
+            logger.info(f"Trending songs of the {window} window refreshed, {len(scored)} songs scored")
+            return len(values)
+        except mysql.connector.Error as err:
+            logger.error(f"Error refreshing trending songs {err}")
+            raise DatabaseConnectionError(f"Error refreshing trending songs {err}")
+
+    def _drop_trending_cache(self, window: str):
+        """
+        Delete the cached rankings of a window.
+        """
+        get_catalog_cache().delete_prefix(f"trending:{window}:")
+
+    def prune(self, hourly_days=3, daily_days=60):
+        """
+        Delete rollup buckets older than every window that reads them.
+
+        Args:
+            hourly_days (int): Days of hourly buckets kept.
+            daily_days (int): Days of daily buckets kept.
+
+        Raises:
+            DatabaseConnectionError: If database error occurs.
+        """
+        try:
+            self.cursor.execute("DELETE FROM Song_activity_hourly WHERE bucket < NOW() - INTERVAL %s DAY;", (hourly_days, ))
+            self.cursor.execute("DELETE FROM Song_activity_daily WHERE bucket < CURDATE() - INTERVAL %s DAY;", (daily_days, ))
+            logger.info("Old song activity buckets pruned")
+        except mysql.connector.Error as err:
+            logger.error(f"Error pruning song activity {err}")
+            raise DatabaseConnectionError(f"Error pruning song activity {err}")
+
+if __name__ == "__main__":
+    # Run from cron, e.g. every few minutes, to keep Song_model.fetch_trending_songs current
+    parser = argparse.ArgumentParser(description="Roll up song activity and refresh the trending songs")
+    parser.add_argument("--windows", nargs="+", default=list(TRENDING_WINDOWS), help="Windows to refresh")
+    parser.add_argument("--prune", action="store_true", help="Also delete old rollup buckets")
+    args = parser.parse_args()
+
+    db_config = {
+    'host': os.getenv('DB_HOST'),
+    'user': os.getenv('DB_USER'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_NAME')
+    }
+
+    db_manager = DatabaseManager(db_config=db_config)
+    try:
+        trending_model = Trending_model(db_manager.get_cursor())
+        trending_model.roll_up()
+        db_manager.commit()
+        for window in args.windows:
+            trending_model.refresh_trending(window)
+            db_manager.commit()
+        if args.prune:
+            trending_model.prune()
+            db_manager.commit()
+    except Exception:
+        db_manager.rollback()
+        raise
+    finally:
+        db_manager.close()
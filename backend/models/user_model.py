@@ -11,6 +11,7 @@ from dotenv import load_dotenv
 import logging
 import bcrypt
 import sys
+from concurrent.futures import Future
 from faker import Faker
 
 sys.path.append(str(base_path))
@@ -18,6 +19,12 @@ sys.path.append(str(base_path))
 from utils.errors import InputError
 from utils.errors import DatabaseConnectionError
 from backend.database_manager.database_manager import DatabaseManager
+from backend.database_manager.schema_registry import schema_registry
+from backend.database_manager.pagination import fetch_page, stream_rows
+from backend.database_manager.bulk_insert import rows_columns, insert_in_chunks
+from backend.models.password_hasher import PasswordHasher, DEFAULT_ROUNDS, default_hasher
+from backend.cache.local_cache import LocalCache, MISSING
+from backend.database_manager.after_commit import after_commit
 
 # Setup a logger
 logging.basicConfig(
@@ -35,21 +42,32 @@ logger = logging.getLogger(__name__)
 logger.debug(f"Loading .env file from: {env_path}")
 load_dotenv(dotenv_path=env_path)
 
+# username -> password hash, shared by every User_model in the process so logins skip the SELECT.
+# Kept short lived and dropped whenever a password or username changes.
+password_hash_cache = LocalCache(maxsize=50000, ttl=60)
+
 class User_model:
-    def __init__(self, cursor):
+    def __init__(self, cursor, bcrypt_rounds=DEFAULT_ROUNDS, hasher=None, statements=None):
         """
         Initialize the UserModel class with database configuration.
 
         Args:
-            db_config (dict): A dictionary containing database connection details.
+            cursor (mysql.connector.cursor_cext.CMySQLCursorDict): The database cursor.
+            bcrypt_rounds (int): bcrypt cost factor used for new password hashes.
+            hasher (PasswordHasher): Shared hashing pool for the bulk methods.
+                        If None a pool is started for each bulk call.
+            statements (StatementRegistry): Prepared statements of the cursors connection, see DatabaseManager.prepared_connection.
+                        If None statements are sent as plain text.
 
         Raises:
                 DatabaseConnectionError: If connection to the database fails
         """
         try:
             self.cursor = cursor
-            self.cursor.execute("SHOW COLUMNS FROM Users;")
-            self.table_columns = self.cursor.fetchall()
+            self.statements = statements
+            self.bcrypt_rounds = bcrypt_rounds
+            self.hasher = hasher
+            self.table_columns = schema_registry.get_columns(self.cursor, "Users")
             logger.info("Database connection established successfully.")
         except mysql.connector.Error as err:
             logger.error(f"Error connecting to the database: {err}")
@@ -84,6 +102,26 @@ class User_model:
 
         return string_stripped
 
+    def id_checker(self, value) -> int:
+        """
+        Function to check if a input is a valid row id
+
+        Args:
+            value (int): Any id to be checked.
+                        Example: 1
+
+        Raises:
+            ValueError: If input is not a positive integer.
+        Returns:
+            value (int): The checked id
+                        Example: 1
+        """
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            logger.error("Input is not a valid id!")
+            raise ValueError("Id must be a positive integer.")
+
+        return value
+
     def check_if_input_cols_match(self, table_columns: list, input_columns: list, exclude_columns = None, exact_match=True):
         """
         Checks if columns that want to be inputed match the table columns raises a InputError if not.
@@ -108,8 +146,22 @@ class User_model:
         
         if not exact_match and not set([input_columns]).issubset(set(table_columns_filtered)):
             logger.error("Inputed columns that are not in the table schema!")
-            raise InputError("Inputed columns that are not in the table schema!") 
-        
+            raise InputError("Inputed columns that are not in the table schema!")
+
+    def execute_statement(self, key: tuple, query: str, values: tuple):
+        """
+        Runs a write statement, as a server-side prepared statement when the model has a statement registry.
+
+        Args:
+            key (tuple): Table, operation and columns identifying the statement text.
+            query (str): SQL with %s placeholders.
+            values (tuple): Parameters of the statement.
+        """
+        if self.statements is None:
+            self.cursor.execute(query, values)
+        else:
+            self.statements.execute(key, query, values)
+
     def hash_passwords(self, password: str) -> str:
         """
         Function to has passwords
@@ -123,8 +175,27 @@ class User_model:
         # Checks if input is a non empty space string
         password = self.string_checker(password)
 
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=self.bcrypt_rounds))
     
+    def hash_passwords_bulk(self, passwords: list) -> list:
+        """
+        Hash many passwords in parallel on the hashing pool.
+
+        Args:
+            passwords (list): Unhashed passwords.
+
+        Returns:
+            list: Hashed passwords in input order.
+        """
+        # Checks if inputs are non empty space strings before handing them to the workers
+        passwords = [self.string_checker(password) for password in passwords]
+
+        if self.hasher is not None:
+            return self.hasher.hash_many(passwords)
+
+        with PasswordHasher(rounds=self.bcrypt_rounds) as hasher:
+            return hasher.hash_many(passwords)
+
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """
         Verify if a plain password matches the hashed password.
@@ -170,7 +241,7 @@ class User_model:
                     """
             user_data["password"] = self.hash_passwords(user_data["password"])
             user_data_tuple = tuple(user_data.values())
-            self.cursor.execute(query, user_data_tuple)
+            self.execute_statement(("Users", "insert", tuple(user_data.keys())), query, user_data_tuple)
             logger.info(f"Execution for User registration succesful!")
         except mysql.connector.Error as err:
             logger.error(f"Database connection failed {err}.")
@@ -179,6 +250,51 @@ class User_model:
             logger.error(f"Wrong data format: {err}")
             raise InputError(f"Wrong data format: {err}")
 
+    def register_users_bulk(self, users_data: list, chunk_size=500, db_manager=None) -> list:
+        """
+        Inserts many users into the Users database with multi-row inserts.
+
+        Args:
+            users_data (list): List of dictionaries containing details about the users. All need the same columns.
+            chunk_size (int): Number of users sent per INSERT statement.
+            db_manager (DatabaseManager): If given every chunk is committed, otherwise the caller commits.
+
+        Returns:
+            user_ids (list): Ids of the registered users in input order.
+
+        Raises:
+            InputError: If the set of columns does not equal the columns from the table.
+            DatabaseConnectionError: If the database connection fails.
+        """
+        try:
+            columns_table = [row["Field"] for row in self.table_columns]
+            columns_dict = rows_columns(users_data)
+            excluded_cols = ["id", "deleted", "user_type", "date_registration", "date_deletion"]
+
+            # Columns are checked once for the whole batch
+            self.check_if_input_cols_match(table_columns=columns_table, input_columns=columns_dict, exclude_columns=excluded_cols)
+
+            user_ids = []
+            hasher = self.hasher or PasswordHasher(rounds=self.bcrypt_rounds)
+            try:
+                # Every chunk is hashed on the pool and then inserted with one statement
+                for start in range(0, len(users_data), chunk_size):
+                    chunk = users_data[start:start + chunk_size]
+                    hashed = hasher.hash_many([self.string_checker(user["password"]) for user in chunk])
+                    users_hashed = [{**user, "password": password} for user, password in zip(chunk, hashed)]
+                    user_ids.extend(insert_in_chunks(self.cursor, table="Users", columns=columns_dict, rows=users_hashed, chunk_size=chunk_size, db_manager=db_manager))
+            finally:
+                if hasher is not self.hasher:
+                    hasher.close()
+            logger.info(f"{len(user_ids)} users registered")
+            return user_ids
+        except mysql.connector.Error as err:
+            logger.error(f"Database connection failed {err}.")
+            raise DatabaseConnectionError(f"Database connection failed {err}.")
+        except mysql.connector.DataError as err:
+            logger.error(f"Wrong data format: {err}")
+            raise InputError(f"Wrong data format: {err}")
+
     def authenticate_user(self, user_dict: dict) -> bool:
         """
         Authenticates users login credentials
@@ -203,18 +319,13 @@ class User_model:
                 logger.error("Username or password cannot be empty.")
                 raise InputError("Username or password cannot be empty.")
 
-            query = """
-                    SELECT password FROM Users
-                    WHERE username = %s;
-                    """
-            self.cursor.execute(query, (user_dict["username"], ))
-            result = self.cursor.fetchone()
+            hashed_password = self.fetch_password_hash(user_dict["username"])
             
-            if not result:
+            if hashed_password is None:
                 logger.info(f"Authentication failed: {user_dict['username']} does not exist.")
                 return False
             
-            checked_password = self.verify_password(plain_password=user_dict["password"], hashed_password=result["password"])
+            checked_password = self.verify_password(plain_password=user_dict["password"], hashed_password=hashed_password)
             
             if checked_password:
                 logger.info(f"{user_dict['username']} was authenticated")
@@ -225,7 +336,78 @@ class User_model:
         except mysql.connector.Error as err:
             logger.error(f"Database connection failed {err}.")
             raise DatabaseConnectionError(f"Database connection failed {err}")
-    
+
+    def authenticate_user_future(self, user_dict: dict) -> Future:
+        """
+        Authenticates users login credentials without running bcrypt on the calling thread.
+
+        The hash lookup happens here, the bcrypt check runs on the verification pool.
+        asyncio code can await the result with asyncio.wrap_future(...).
+
+        Args:
+            user_dict (dict): Contains users username and his password
+        Returns:
+            concurrent.futures.Future: Resolves to True if the password for the user matches, False otherwise.
+        Raises: InputError: If user_dict is has more than two key-value pairs.
+                            If in the dict you have different columns than username and password.
+                            If the password or username is empty.
+                DatabaseConnectionError: If connection to the database fails.
+        """
+        try:
+            ALLOWED_COLUMNS = ["username", "password"]
+
+            columns = [col for col in user_dict.keys()]
+            values = [val for val in user_dict.values()]
+            
+            self.check_if_input_cols_match(table_columns=ALLOWED_COLUMNS, input_columns=columns)
+            
+            if any(not value for value in values):
+                logger.error("Username or password cannot be empty.")
+                raise InputError("Username or password cannot be empty.")
+
+            hashed_password = self.fetch_password_hash(user_dict["username"])
+        except mysql.connector.Error as err:
+            logger.error(f"Database connection failed {err}.")
+            raise DatabaseConnectionError(f"Database connection failed {err}")
+
+        if hashed_password is None:
+            logger.info(f"Authentication failed: {user_dict['username']} does not exist.")
+            result = Future()
+            result.set_result(False)
+            return result
+
+        plain_password = self.string_checker(user_dict["password"])
+        hasher = self.hasher or default_hasher
+        return hasher.verify_future(plain_password, self.string_checker(hashed_password))
+
+    def fetch_password_hash(self, username: str):
+        """
+        Get the stored password hash of a user, served from the password hash cache when possible.
+
+        Args:
+            username (str): Users username.
+        Returns:
+            str: The password hash or None if the user does not exist.
+        Raises:
+            mysql.connector.Error: If the lookup fails, callers translate it.
+        """
+        hashed_password = password_hash_cache.get(username)
+        if hashed_password is not MISSING:
+            return hashed_password
+
+        query = """
+                SELECT password FROM Users
+                WHERE username = %s;
+                """
+        self.cursor.execute(query, (username, ))
+        result = self.cursor.fetchone()
+
+        if not result:
+            return None
+
+        password_hash_cache.set(username, result["password"])
+        return result["password"]
+
     def update_user_details(self, updated_info: dict, username: str):
         """
         Update a single detail in Users table
@@ -260,13 +442,99 @@ class User_model:
                     SET {column_dict} = %s
                     WHERE username = %s;
                     """
-            self.cursor.execute(query, (value, username))
+            self.execute_statement(("Users", "update", column_dict, "username"), query, (value, username))
+            if column_dict in ("password", "username", "deleted"):
+                self.invalidate_password_hash(username)
             logger.info(f"Execution for {column_dict} has been updated to {value} for {username}")
 
         except mysql.connector.Error as err:
             logger.error(f"Database connection failed {err}.")
             raise DatabaseConnectionError(f"Database connection failed {err}.")
 
+    def update_user_details_by_id(self, updated_info: dict, user_id: int):
+        """
+        Update a single detail in Users table by the user id
+        
+        Args:
+            updated_info (dict): Dictionary containing the column to be updated and the desired value
+                Example: {"email": "my_email@google.com"}
+            user_id (int): Id of the user being updated.
+                Example: 1
+        Raises:
+            InputError: If dict has more than one key-value pair.
+                        If a column passed in the dict is not in the table.
+            ValueError: If user_id is not a positive integer.
+            DatabaseConnectionError: If database connection error occurs.
+        """
+        try:
+            column_table = [row["Field"] for row in self.table_columns]
+
+            column_dict, value = next(iter(updated_info.items()))
+            user_id = self.id_checker(user_id)
+            
+            if  len(updated_info) != 1:
+                logger.error("Dictionary doesnt have just one key-value pair")
+                raise InputError("Dictionary doesnt have just one key-value pair")
+
+            self.check_if_input_cols_match(table_columns=column_table, input_columns=column_dict, exact_match=False)
+
+            if column_dict in ("password", "username", "deleted"):
+                self.invalidate_password_hash_by_id(user_id)
+
+            if column_dict == "password":
+                value = self.hash_passwords(value)
+            query = f"""
+                    UPDATE `Users`
+                    SET {column_dict} = %s
+                    WHERE id = %s;
+                    """
+            self.execute_statement(("Users", "update", column_dict, "id"), query, (value, user_id))
+            logger.info(f"Execution for {column_dict} has been updated to {value} for user {user_id}")
+
+        except mysql.connector.Error as err:
+            logger.error(f"Database connection failed {err}.")
+            raise DatabaseConnectionError(f"Database connection failed {err}.")
+
+    def update_passwords_bulk(self, passwords: dict, chunk_size=500, db_manager=None):
+        """
+        Rotate the passwords of many users. Hashing runs in parallel on the hashing pool.
+
+        Args:
+            passwords (dict): Usernames mapped to their new unhashed passwords.
+                Example: {"my_name": "new_password"}
+            chunk_size (int): Number of users hashed and updated per batch.
+            db_manager (DatabaseManager): If given every chunk is committed, otherwise the caller commits.
+
+        Raises:
+            ValueError: If a username or password is not a non empty string.
+            DatabaseConnectionError: If database connection error occurs.
+        """
+        try:
+            items = [(self.string_checker(username), password) for username, password in passwords.items()]
+            query = """
+                    UPDATE `Users`
+                    SET password = %s
+                    WHERE username = %s;
+                    """
+            hasher = self.hasher or PasswordHasher(rounds=self.bcrypt_rounds)
+            try:
+                for start in range(0, len(items), chunk_size):
+                    chunk = items[start:start + chunk_size]
+                    hashed = hasher.hash_many([self.string_checker(password) for _, password in chunk])
+                    self.cursor.executemany(query, [(password, username) for (username, _), password in zip(chunk, hashed)])
+                    for username, _ in chunk:
+                        self.invalidate_password_hash(username)
+                    if db_manager is not None:
+                        db_manager.commit()
+                    logger.info(f"Passwords rotated for {start + len(chunk)}/{len(items)} users")
+            finally:
+                if hasher is not self.hasher:
+                    hasher.close()
+
+        except mysql.connector.Error as err:
+            logger.error(f"Database connection failed {err}.")
+            raise DatabaseConnectionError(f"Database connection failed {err}.")
+
     def fetch_all_users(self) -> list:
         """
         Fetches all artists from the database.
@@ -296,10 +564,52 @@ class User_model:
         except mysql.connector.Error as err:
             logger.error(f"Databse connection failed {err}")
             raise DatabaseConnectionError(f"Databse connection failed {err}")
-    
+
+    def fetch_users_page(self, after_id=0, limit=100) -> list:
+        """
+        Fetches one page of users ordered by id (keyset pagination).
+
+        Args:
+            after_id (int): Id of the last user of the previous page, 0 for the first page.
+            limit (int): Page size, at most 1000.
+        Returns:
+            users_page (list): Dictionaries with the id and username of the users. Empty when there are no more users.
+                Pass the last id as after_id to get the next page.
+        Raises:
+            InputError: If after_id or limit are invalid.
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            users_page = fetch_page(self.cursor, view="non_deleted_users", columns="id, username", after_id=after_id, limit=limit)
+            logger.info(f"Fetched {len(users_page)} users after id {after_id}")
+            return users_page
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
+    def stream_all_users(self, db_manager, batch_size=1000):
+        """
+        Streams all users with constant memory.
+
+        Args:
+            db_manager (DatabaseManager): Database manager, the stream runs on a connection leased from its pool.
+            batch_size (int): Rows fetched from the server per round trip.
+        Yields:
+            dict: The id and username of one user at a time, ordered by id.
+        Raises:
+            DatabaseConnectionError: If database error occurs during the database creation
+        """
+        try:
+            yield from stream_rows(db_manager, view="non_deleted_users", columns="id, username", batch_size=batch_size)
+        except mysql.connector.Error as err:
+            logger.error(f"Databse connection failed {err}")
+            raise DatabaseConnectionError(f"Databse connection failed {err}")
+
     def soft_delete_user_account(self, username: str):
         """
         This function takes a users username as input and marks him as deleted in our database.
+        Likes and follows are cascaded by Cascade_model.sweep(),
+        use Cascade_model.delete_user to cascade right away.
 
         Args:
             username (string): Name of a user.
@@ -320,16 +630,72 @@ class User_model:
                     WHERE username = %s;
                     """
             self.cursor.execute(query, (username,))
+            self.invalidate_password_hash(username)
             logger.info(f"{username} deletion execution succesful")
 
         except mysql.connector.Error as err:
             logger.error(f"Database connection failed {err}.")
             raise DatabaseConnectionError(f"Database connection failed {err}")
 
+    def soft_delete_user_account_by_id(self, user_id: int):
+        """
+        This function takes a users id as input and marks him as deleted in our database.
+        Likes and follows are cascaded by Cascade_model.sweep(),
+        use Cascade_model.delete_user to cascade right away.
+
+        Args:
+            user_id (int): Id of a user.
+                Example: 1
+
+        Raises:
+            ValueError: If user_id is not a positive integer.
+            DatabaseConnectionError: If database error occurs during the database creation.
+        """
+
+        try:
+            user_id = self.id_checker(user_id)
+            self.invalidate_password_hash_by_id(user_id)
+            
+            query = """
+                    UPDATE `Users`
+                    SET deleted = 1
+                    WHERE id = %s;
+                    """
+            self.cursor.execute(query, (user_id,))
+            logger.info(f"User {user_id} deletion execution succesful")
+
+        except mysql.connector.Error as err:
+            logger.error(f"Database connection failed {err}.")
+            raise DatabaseConnectionError(f"Database connection failed {err}")
+
+    def invalidate_password_hash(self, username: str):
+        """
+        Drops the cached password hash of a user, now and again once the write commits.
+
+        Dropping it only before the commit would let a login cache the old hash again until the TTL runs out.
+
+        Args:
+            username (str): Username of the user.
+        """
+        password_hash_cache.delete(username)
+        after_commit(self.cursor, lambda: password_hash_cache.delete(username))
+
+    def invalidate_password_hash_by_id(self, user_id: int):
+        """
+        Drops the cached password hash of a user, looked up by the primary key.
+
+        Args:
+            user_id (int): Id of a user.
+        """
+        self.cursor.execute("SELECT username FROM `Users` WHERE id = %s;", (user_id, ))
+        result = self.cursor.fetchone()
+        if result:
+            self.invalidate_password_hash(result["username"])
+
 if __name__ == "__main__":
 
     fake = Faker()
-    
+
     def generate_user():
         username = fake.user_name()
         password = fake.password()